@@ -4,27 +4,91 @@ from functools import lru_cache
 
 
 class Settings(BaseSettings):
+    # Banco de dados
+    database_url: str = "sqlite:///./chatbot_agendamento.db"
+    database_profile: str = "production"
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    database_pool_timeout_seconds: float = 30.0
+    database_pool_recycle_seconds: int = 1800
+    database_busy_timeout_ms: int = 5000
+    database_mmap_size: int = 268435456
+    database_cache_size_kb: int = 65536
+    
     # Google Calendar
     google_calendar_credentials_file: str = "credentials.json"
     google_calendar_token_file: str = "token.json"
     google_calendar_id: str = "primary"
+    google_calendar_cache_ttl_seconds: int = 30
+    google_calendar_timeout_seconds: float = 10.0
     
     # Trello
     trello_api_key: str = ""
     trello_token: str = ""
     trello_board_id: str = ""
     trello_list_id: str = ""
+    trello_api_url: str = "https://api.trello.com/1"
+    trello_timeout_seconds: float = 10.0
+    trello_max_retries: int = 3
+    trello_pool_size: int = 10
+    trello_requests_per_second: float = 8.0
+    trello_burst: int = 10
     
     # Google Gemini
     gemini_api_key: str = ""
     
     # OpenAI
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+    intent_cache_size: int = 1000
+    intent_cache_ttl_seconds: int = 600
+    intent_fast_path_threshold: float = 0.85
+    rag_answer_cache_size: int = 500
+    rag_answer_cache_ttl_seconds: int = 3600
+    rag_embedding_cache_size: int = 2000
+    rag_embedding_cost_per_million_tokens: float = 0.02
+    rag_embedding_model: str = "text-embedding-3-small"
+    rag_embedding_batch_size: int = 64
+    rag_embedding_concurrency: int = 4
+    rag_checkpoint_seconds: float = 10.0
+    rag_vector_backend: str = "chroma"
+    rag_modo_busca: str = "hibrido"
+    rag_bm25_cobertura: float = 0.75
+    rag_bm25_margem: float = 1.2
+    rag_rrf_k: int = 60
+    faq_habilitado: bool = True
+    faq_similaridade_minima: float = 0.9
+    
+    # Conversas
+    conversation_store: str = "memory"
+    conversation_store_path: str = "conversations.db"
+    conversation_ttl_seconds: int = 14400
+    conversation_max_sessions: int = 10000
+    
+    # WhatsApp
+    whatsapp_workers: int = 8
+    whatsapp_max_pending: int = 200
+    whatsapp_enqueue_timeout_seconds: float = 5.0
+    whatsapp_metrics_interval_seconds: float = 300.0
     
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     
+    # Integrações externas (Calendar/Trello)
+    integracao_workers: int = 8
+    outbox_batch_size: int = 8
+    outbox_max_tentativas: int = 8
+    outbox_backoff_base_seconds: float = 2.0
+    outbox_backoff_max_seconds: float = 600.0
+    outbox_poll_seconds: float = 5.0
+    outbox_lease_seconds: float = 300.0
+    
+    # Reservas de horário
+    reserva_ttl_seconds: int = 600
+    
+    # Catálogo de especialidades
+    catalogo_ttl_seconds: int = 300
+    
     # Informações da Clínica
     clinica_nome: str = "Clínica Saúde Total"
     clinica_endereco: str = "Rua Exemplo, 123 - Centro, Brasília - DF"
@@ -1,13 +1,72 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from config import get_settings
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./chatbot_agendamento.db"
+settings = get_settings()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+SQLALCHEMY_DATABASE_URL = settings.database_url
+
+
+def _aplicar_pragmas_sqlite(engine, profile: str):
+    @event.listens_for(engine, "connect")
+    def _configurar_conexao(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout={settings.database_busy_timeout_ms}")
+            
+            if profile == "production":
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute(f"PRAGMA mmap_size={settings.database_mmap_size}")
+                cursor.execute(f"PRAGMA cache_size=-{settings.database_cache_size_kb}")
+                cursor.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(url: str = None, profile: str = None):
+    url = url or settings.database_url
+    profile = profile or settings.database_profile
+    backend = make_url(url).get_backend_name()
+    
+    if backend == "sqlite":
+        database = make_url(url).database
+        
+        if not database or database == ":memory:":
+            engine = create_engine(
+                url,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool
+            )
+        else:
+            engine = create_engine(
+                url,
+                connect_args={
+                    "check_same_thread": False,
+                    "timeout": settings.database_busy_timeout_ms / 1000
+                },
+                pool_size=settings.database_pool_size,
+                max_overflow=settings.database_max_overflow,
+                pool_timeout=settings.database_pool_timeout_seconds
+            )
+        
+        _aplicar_pragmas_sqlite(engine, profile)
+        return engine
+    
+    return create_engine(
+        url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout_seconds,
+        pool_recycle=settings.database_pool_recycle_seconds,
+        pool_pre_ping=True
+    )
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -1,8 +1,104 @@
+from sqlalchemy import inspect, text
 from database.database import engine, SessionLocal
-from database.models import Base, Especialidade
+from datetime import datetime
+from database.models import Base, Especialidade, Paciente, Agendamento, ReservaHorario, chave_telefone, normalizar_telefone_e164
+
+
+def migrar_telefones(batch_size: int = 1000):
+    colunas = {coluna['name'] for coluna in inspect(engine).get_columns('pacientes')}
+    
+    with engine.begin() as conn:
+        if 'telefone_e164' not in colunas:
+            conn.execute(text("ALTER TABLE pacientes ADD COLUMN telefone_e164 VARCHAR(20)"))
+        if 'telefone_chave' not in colunas:
+            conn.execute(text("ALTER TABLE pacientes ADD COLUMN telefone_chave VARCHAR(8)"))
+        
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_pacientes_telefone_e164 ON pacientes (telefone_e164)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_pacientes_telefone_chave ON pacientes (telefone_chave)"
+        ))
+    
+    db = SessionLocal()
+    total = 0
+    try:
+        while True:
+            pacientes = db.query(Paciente).filter(
+                Paciente.telefone_chave.is_(None)
+            ).limit(batch_size).all()
+            
+            if not pacientes:
+                break
+            
+            for paciente in pacientes:
+                paciente.telefone_e164 = normalizar_telefone_e164(paciente.telefone)
+                paciente.telefone_chave = chave_telefone(paciente.telefone)
+            
+            db.commit()
+            total += len(pacientes)
+        
+        return total
+    finally:
+        db.close()
+
+
+def migrar_indices():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_agendamentos_paciente_status_data "
+            "ON agendamentos (paciente_id, status, data_hora)"
+        ))
+
+
+def migrar_outbox():
+    colunas = {coluna['name'] for coluna in inspect(engine).get_columns('outbox_integracoes')}
+    
+    if 'reivindicado_em' not in colunas:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE outbox_integracoes ADD COLUMN reivindicado_em TIMESTAMP"))
+
+
+def migrar_reservas():
+    db = SessionLocal()
+    try:
+        reservados = {
+            (especialidade_id, inicio)
+            for especialidade_id, inicio in db.query(ReservaHorario.especialidade_id, ReservaHorario.inicio)
+        }
+        
+        agendamentos = db.query(Agendamento).filter(
+            Agendamento.status == "agendado",
+            Agendamento.data_hora > datetime.now()
+        ).order_by(Agendamento.id).all()
+        
+        total = 0
+        for agendamento in agendamentos:
+            chave = (agendamento.especialidade_id, agendamento.data_hora)
+            if chave in reservados:
+                continue
+            
+            db.add(ReservaHorario(
+                especialidade_id=agendamento.especialidade_id,
+                inicio=agendamento.data_hora,
+                status="confirmado",
+                agendamento_id=agendamento.id
+            ))
+            reservados.add(chave)
+            total += 1
+        
+        db.commit()
+        return total
+    finally:
+        db.close()
+
 
 def init_database():
     Base.metadata.create_all(bind=engine)
+    migrar_telefones()
+    migrar_indices()
+    migrar_outbox()
+    migrar_reservas()
     
     db = SessionLocal()
     
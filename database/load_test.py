@@ -0,0 +1,242 @@
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from database.database import Base, create_db_engine
+from database.models import Agendamento, Especialidade, Paciente
+from services.reserva_service import reservar_horario, confirmar_reserva
+
+
+def _agendar(Session, especialidade_id: int, indice: int) -> float:
+    inicio = time.perf_counter()
+    db = Session()
+    try:
+        data_hora = datetime(2030, 1, 1, 8) + timedelta(hours=indice)
+        
+        db.query(Agendamento).filter(
+            Agendamento.especialidade_id == especialidade_id,
+            Agendamento.data_hora >= data_hora - timedelta(days=1),
+            Agendamento.data_hora <= data_hora + timedelta(days=1)
+        ).all()
+        
+        paciente = Paciente(
+            nome=f"Paciente {indice}",
+            telefone=f"6199{indice:07d}",
+            email=f"paciente{indice}@teste.com"
+        )
+        db.add(paciente)
+        db.flush()
+        
+        db.add(Agendamento(
+            paciente_id=paciente.id,
+            especialidade_id=especialidade_id,
+            data_hora=data_hora
+        ))
+        db.commit()
+        return time.perf_counter() - inicio
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _disputar_horario(Session, especialidade_id: int, indice: int, horarios: int, com_reserva: bool) -> bool:
+    data_hora = datetime(2030, 1, 1, 8) + timedelta(hours=indice % horarios)
+    session_id = f"carga_{indice}"
+    db = Session()
+    try:
+        if com_reserva:
+            if not reservar_horario(db, especialidade_id, data_hora, session_id):
+                return False
+        else:
+            ocupado = db.query(Agendamento).filter(
+                Agendamento.especialidade_id == especialidade_id,
+                Agendamento.data_hora == data_hora
+            ).first()
+            if ocupado:
+                return False
+        
+        paciente = Paciente(
+            nome=f"Paciente {indice}",
+            telefone=f"6199{indice:07d}",
+            email=f"paciente{indice}@teste.com"
+        )
+        db.add(paciente)
+        db.flush()
+        
+        agendamento = Agendamento(
+            paciente_id=paciente.id,
+            especialidade_id=especialidade_id,
+            data_hora=data_hora
+        )
+        db.add(agendamento)
+        db.flush()
+        
+        if com_reserva and not confirmar_reserva(db, especialidade_id, data_hora, agendamento.id, session_id):
+            db.rollback()
+            return False
+        
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _preparar_banco(url: str, profile: str):
+    engine = create_db_engine(url, profile)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    
+    db = Session()
+    especialidade = Especialidade(nome="Clínica Geral")
+    db.add(especialidade)
+    db.commit()
+    especialidade_id = especialidade.id
+    db.close()
+    
+    return engine, Session, especialidade_id
+
+
+def executar_disputa(nome: str, url: str, profile: str, workers: int, total: int, horarios: int, com_reserva: bool) -> dict:
+    engine, Session, especialidade_id = _preparar_banco(url, profile)
+    contagem = {"confirmados": 0, "recusados": 0, "erros": 0}
+    lock = threading.Lock()
+    
+    def tarefa(indice: int):
+        try:
+            resultado = "confirmados" if _disputar_horario(
+                Session, especialidade_id, indice, horarios, com_reserva
+            ) else "recusados"
+        except Exception:
+            resultado = "erros"
+        with lock:
+            contagem[resultado] += 1
+    
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(tarefa, range(total)))
+    duracao = time.perf_counter() - inicio
+    
+    db = Session()
+    duplicados = db.query(Agendamento.data_hora).group_by(
+        Agendamento.especialidade_id, Agendamento.data_hora
+    ).having(func.count(Agendamento.id) > 1).count()
+    db.close()
+    
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    
+    return {
+        "perfil": nome,
+        **contagem,
+        "horarios_duplicados": duplicados,
+        "segundos": round(duracao, 2)
+    }
+
+
+def executar_perfil(nome: str, url: str, profile: str, workers: int, total: int) -> dict:
+    engine, Session, especialidade_id = _preparar_banco(url, profile)
+    
+    latencias = []
+    erros = {"locked": 0, "outros": 0}
+    lock = threading.Lock()
+    
+    def tarefa(indice: int):
+        try:
+            duracao = _agendar(Session, especialidade_id, indice)
+            with lock:
+                latencias.append(duracao)
+        except OperationalError as e:
+            with lock:
+                if "locked" in str(e):
+                    erros["locked"] += 1
+                else:
+                    erros["outros"] += 1
+        except Exception:
+            with lock:
+                erros["outros"] += 1
+    
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(tarefa, range(total)))
+    duracao = time.perf_counter() - inicio
+    
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    
+    latencias.sort()
+    return {
+        "perfil": nome,
+        "agendamentos": len(latencias),
+        "erros_locked": erros["locked"],
+        "erros_outros": erros["outros"],
+        "segundos": round(duracao, 2),
+        "por_segundo": round(len(latencias) / duracao, 1) if duracao else 0,
+        "p50_ms": round(statistics.median(latencias) * 1000, 1) if latencias else None,
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1] * 1000, 1) if latencias else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga de agendamentos concorrentes")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--agendamentos", type=int, default=1000)
+    parser.add_argument("--horarios", type=int, default=20, help="Horários disputados no teste de reservas")
+    parser.add_argument(
+        "--postgres-url",
+        help="URL de um banco Postgres vazio e descartável (as tabelas são recriadas)"
+    )
+    args = parser.parse_args()
+    
+    diretorio = tempfile.mkdtemp(prefix="carga_")
+    perfis = [
+        ("sqlite-padrao", f"sqlite:///{os.path.join(diretorio, 'padrao.db')}", "default"),
+        ("sqlite-producao", f"sqlite:///{os.path.join(diretorio, 'producao.db')}", "production")
+    ]
+    if args.postgres_url:
+        perfis.append(("postgres", args.postgres_url, "production"))
+    
+    print(f"{args.agendamentos} agendamentos, {args.workers} threads\n")
+    for nome, url, profile in perfis:
+        resultado = executar_perfil(nome, url, profile, args.workers, args.agendamentos)
+        print(
+            f"{resultado['perfil']:<16} "
+            f"{resultado['por_segundo']:>8} agend/s  "
+            f"ok={resultado['agendamentos']}  "
+            f"locked={resultado['erros_locked']}  "
+            f"outros={resultado['erros_outros']}  "
+            f"p50={resultado['p50_ms']}ms  "
+            f"p95={resultado['p95_ms']}ms"
+        )
+    
+    print(f"\nDisputa de {args.horarios} horários por {args.agendamentos} pacientes\n")
+    for nome, url, profile in perfis:
+        for com_reserva in (False, True):
+            resultado = executar_disputa(
+                f"{nome}{'+reserva' if com_reserva else ''}",
+                url, profile, args.workers, args.agendamentos, args.horarios, com_reserva
+            )
+            print(
+                f"{resultado['perfil']:<24} "
+                f"confirmados={resultado['confirmados']}  "
+                f"recusados={resultado['recusados']}  "
+                f"erros={resultado['erros']}  "
+                f"duplicados={resultado['horarios_duplicados']}  "
+                f"{resultado['segundos']}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
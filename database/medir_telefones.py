@@ -0,0 +1,143 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from database.database import Base, create_db_engine
+from database.models import Paciente, chave_telefone, normalizar_telefone_e164
+import services.conversation_service as conversas
+
+
+def _telefone(indice: int) -> str:
+    return f"55{11 + indice % 89:02d}9{90000000 + indice}"
+
+
+def _formatos(indice: int) -> list:
+    telefone = _telefone(indice)
+    ddd, numero = telefone[2:4], telefone[4:]
+    return [
+        telefone,
+        f"55{ddd}{numero[1:]}",
+        f"({ddd}) {numero[:5]}-{numero[5:]}"
+    ]
+
+
+def _inserir(engine, inicio: int, fim: int, lote: int = 20000):
+    for parcial in range(inicio, fim, lote):
+        linhas = []
+        for indice in range(parcial, min(parcial + lote, fim)):
+            telefone = _telefone(indice)
+            linhas.append({
+                "id": indice + 1,
+                "nome": f"Paciente {indice}",
+                "telefone": telefone,
+                "telefone_e164": normalizar_telefone_e164(telefone),
+                "telefone_chave": chave_telefone(telefone),
+                "email": f"paciente{indice}@teste.com"
+            })
+        with engine.begin() as conn:
+            conn.execute(Paciente.__table__.insert(), linhas)
+
+
+def _busca_por_varredura(Session, telefone: str):
+    db = Session()
+    try:
+        telefone_limpo = ''.join(filter(str.isdigit, telefone))
+        for paciente in db.query(Paciente).all():
+            if telefone_limpo[-9:] == ''.join(filter(str.isdigit, paciente.telefone))[-9:]:
+                return paciente.id
+        return None
+    finally:
+        db.close()
+
+
+def _medir(funcao, telefones: list) -> tuple:
+    latencias = []
+    resultados = []
+    for telefone in telefones:
+        inicio = time.perf_counter()
+        resultados.append(funcao(telefone))
+        latencias.append(time.perf_counter() - inicio)
+    return resultados, statistics.mean(latencias) * 1000
+
+
+def executar(pacientes: int, buscas: int, buscas_varredura: int, semente: int) -> tuple:
+    falhas = []
+    medicoes = []
+    aleatorio = random.Random(semente)
+    etapas = sorted({max(pacientes // 50, 1), max(pacientes // 5, 1), pacientes})
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = create_db_engine(f"sqlite:///{os.path.join(diretorio, 'telefones.db')}", "production")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        session_local = conversas.SessionLocal
+        conversas.SessionLocal = Session
+        
+        try:
+            with engine.connect() as conn:
+                plano = " ".join(str(linha[-1]) for linha in conn.execute(
+                    text("EXPLAIN QUERY PLAN SELECT id FROM pacientes WHERE telefone_chave = :chave"),
+                    {"chave": "00000000"}
+                ))
+            if "USING INDEX" not in plano and "USING COVERING INDEX" not in plano:
+                falhas.append(f"busca por telefone_chave sem índice: {plano}")
+            
+            inseridos = 0
+            for etapa in etapas:
+                _inserir(engine, inseridos, etapa)
+                inseridos = etapa
+                
+                indices = [aleatorio.randrange(etapa) for _ in range(buscas)]
+                telefones = [aleatorio.choice(_formatos(indice)) for indice in indices]
+                resultados, ms_indice = _medir(conversas.get_paciente_by_telefone, telefones)
+                errados = sum(
+                    1 for indice, resultado in zip(indices, resultados)
+                    if resultado is None or resultado["id"] != indice + 1
+                )
+                if errados:
+                    falhas.append(f"{errados} de {buscas} buscas com {etapa} pacientes devolveram o paciente errado")
+                if conversas.get_paciente_by_telefone(_telefone(etapa + 1)) is not None:
+                    falhas.append(f"telefone inexistente encontrado com {etapa} pacientes")
+                
+                medicao = {"pacientes": etapa, "ms_indice": round(ms_indice, 3)}
+                if buscas_varredura:
+                    amostra = indices[:buscas_varredura]
+                    resultados, ms_varredura = _medir(lambda telefone: _busca_por_varredura(Session, telefone), [_telefone(indice) for indice in amostra])
+                    if resultados != [indice + 1 for indice in amostra]:
+                        falhas.append(f"varredura devolveu {resultados} com {etapa} pacientes")
+                    medicao["ms_varredura"] = round(ms_varredura, 1)
+                medicoes.append(medicao)
+        finally:
+            conversas.SessionLocal = session_local
+            engine.dispose()
+    
+    return falhas, medicoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a busca de pacientes por telefone com o índice e com a varredura anterior")
+    parser.add_argument("--pacientes", type=int, default=500000)
+    parser.add_argument("--buscas", type=int, default=1000)
+    parser.add_argument("--buscas-varredura", type=int, default=1, help="Buscas pela varredura completa anterior em cada etapa (0 desliga)")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    
+    falhas, medicoes = executar(args.pacientes, args.buscas, args.buscas_varredura, args.semente)
+    
+    for medicao in medicoes:
+        print(", ".join(f"{chave}={valor}" for chave, valor in medicao.items()))
+    
+    if falhas:
+        for falha in falhas:
+            print(f"  ✗ {falha}")
+        raise SystemExit(1)
+    
+    print(f"OK: {args.buscas} buscas por etapa até {args.pacientes} pacientes, todas pelo índice de telefone_chave")
+
+
+if __name__ == "__main__":
+    main()
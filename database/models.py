@@ -1,9 +1,26 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 from database.database import Base
 
 
+def normalizar_telefone_e164(telefone: str) -> str:
+    numeros = ''.join(filter(str.isdigit, telefone or ''))
+    
+    if len(numeros) in (10, 11):
+        numeros = '55' + numeros
+    
+    if len(numeros) == 12 and numeros.startswith('55') and numeros[4] in '6789':
+        numeros = numeros[:4] + '9' + numeros[4:]
+    
+    return f"+{numeros}" if numeros else ''
+
+
+def chave_telefone(telefone: str) -> str:
+    numeros = ''.join(filter(str.isdigit, telefone or ''))
+    return numeros[-8:]
+
+
 class Especialidade(Base):
     __tablename__ = "especialidades"
     
@@ -21,14 +38,25 @@ class Paciente(Base):
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(200), nullable=False)
     telefone = Column(String(20), unique=True, nullable=False, index=True)
+    telefone_e164 = Column(String(20), nullable=True, index=True)
+    telefone_chave = Column(String(8), nullable=True, index=True)
     email = Column(String(200), nullable=False)
     criado_em = Column(DateTime, default=datetime.utcnow)
     
     agendamentos = relationship("Agendamento", back_populates="paciente")
+    
+    @validates("telefone")
+    def _normalizar_telefone(self, key, telefone):
+        self.telefone_e164 = normalizar_telefone_e164(telefone)
+        self.telefone_chave = chave_telefone(telefone)
+        return telefone
 
 
 class Agendamento(Base):
     __tablename__ = "agendamentos"
+    __table_args__ = (
+        Index("ix_agendamentos_paciente_status_data", "paciente_id", "status", "data_hora"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
@@ -51,4 +79,45 @@ class Agendamento(Base):
     atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     paciente = relationship("Paciente", back_populates="agendamentos")
-    especialidade = relationship("Especialidade", back_populates="agendamentos")
\ No newline at end of file
+    especialidade = relationship("Especialidade", back_populates="agendamentos")
+
+
+class ReservaHorario(Base):
+    __tablename__ = "reservas_horario"
+    __table_args__ = (
+        UniqueConstraint("especialidade_id", "inicio", name="uq_reservas_especialidade_inicio"),
+        Index("ix_reservas_status_expira", "status", "expira_em"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    especialidade_id = Column(Integer, ForeignKey("especialidades.id"), nullable=False)
+    inicio = Column(DateTime, nullable=False)
+    
+    status = Column(String(20), nullable=False, default="reservado")
+    session_id = Column(String(100), nullable=True, index=True)
+    expira_em = Column(DateTime, nullable=True)
+    agendamento_id = Column(Integer, ForeignKey("agendamentos.id"), nullable=True, index=True)
+    
+    criado_em = Column(DateTime, default=datetime.utcnow)
+
+
+class EventoOutbox(Base):
+    __tablename__ = "outbox_integracoes"
+    __table_args__ = (
+        Index("ix_outbox_status_proxima", "status", "proxima_tentativa_em"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(50), nullable=False)
+    agendamento_id = Column(Integer, ForeignKey("agendamentos.id"), nullable=True, index=True)
+    chave = Column(String(200), unique=True, nullable=False)
+    payload = Column(Text, nullable=True)
+    
+    status = Column(String(20), nullable=False, default="pendente")
+    tentativas = Column(Integer, nullable=False, default=0)
+    proxima_tentativa_em = Column(DateTime, nullable=False, default=datetime.utcnow)
+    ultimo_erro = Column(Text, nullable=True)
+    reivindicado_em = Column(DateTime, nullable=True)
+    
+    criado_em = Column(DateTime, default=datetime.utcnow)
+    processado_em = Column(DateTime, nullable=True)
\ No newline at end of file
@@ -0,0 +1,114 @@
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from database.database import Base, create_db_engine
+from database.models import Agendamento, Especialidade, Paciente
+import services.whatsapp_service as whatsapp
+
+TELEFONE = "5561999990000"
+TELEFONE_HOMONIMO = "5511999990000"
+
+
+def _preparar_banco(url: str, consultas: int):
+    engine = create_db_engine(url, "production")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    
+    db = Session()
+    especialidades = [Especialidade(nome="Cardiologia"), Especialidade(nome="Dermatologia")]
+    paciente = Paciente(nome="Maria", telefone=TELEFONE, email="maria@teste.com")
+    homonimo = Paciente(nome="João", telefone=TELEFONE_HOMONIMO, email="joao@teste.com")
+    db.add_all([*especialidades, paciente, homonimo])
+    db.flush()
+    
+    inicio = datetime.now() + timedelta(days=3)
+    esperado = []
+    for indice in range(consultas):
+        especialidade = especialidades[indice % len(especialidades)]
+        agendamento = Agendamento(
+            paciente_id=paciente.id,
+            especialidade_id=especialidade.id,
+            data_hora=inicio + timedelta(hours=indice)
+        )
+        db.add(agendamento)
+        db.flush()
+        esperado.append((agendamento.id, especialidade.nome))
+    
+    db.add(Agendamento(
+        paciente_id=paciente.id,
+        especialidade_id=especialidades[0].id,
+        data_hora=datetime.now() - timedelta(days=1)
+    ))
+    db.commit()
+    db.close()
+    
+    return engine, Session, esperado
+
+
+def _contar(engine, funcao, *args):
+    comandos = []
+    
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        resultado = funcao(*args)
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+    return resultado, comandos
+
+
+def verificar(consultas: int) -> list:
+    falhas = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine, Session, esperado = _preparar_banco(f"sqlite:///{os.path.join(diretorio, 'queries.db')}", consultas)
+        whatsapp.SessionLocal = Session
+        
+        resultado, comandos = _contar(engine, whatsapp.buscar_consultas_paciente, TELEFONE)
+        if len(comandos) != 1:
+            falhas.append(f"buscar_consultas_paciente: {len(comandos)} comandos, esperado 1")
+        obtido = [(consulta['id'], consulta['especialidade']) for consulta in resultado]
+        if obtido != esperado:
+            falhas.append(f"buscar_consultas_paciente: {obtido} != {esperado}")
+        
+        resultado, comandos = _contar(engine, whatsapp.buscar_consultas_paciente, TELEFONE_HOMONIMO)
+        if resultado:
+            falhas.append(f"buscar_consultas_paciente devolveu {len(resultado)} consultas de outro paciente")
+        
+        nova_data_hora = datetime.now() + timedelta(days=30)
+        resultado, comandos = _contar(engine, whatsapp.remarcar_consulta, esperado[0][0], nova_data_hora)
+        if not resultado["success"]:
+            falhas.append(f"remarcar_consulta: {resultado['message']}")
+        consultas_extras = [
+            comando for comando in comandos
+            if comando.lstrip().upper().startswith("SELECT")
+            and ("FROM pacientes" in comando or "FROM especialidades" in comando)
+        ]
+        if consultas_extras:
+            falhas.append(f"remarcar_consulta consultou pacientes/especialidades {len(consultas_extras)} vezes")
+        
+        engine.dispose()
+    
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o número de queries da listagem e da remarcação de consultas")
+    parser.add_argument("--consultas", type=int, default=5)
+    args = parser.parse_args()
+    
+    falhas = verificar(args.consultas)
+    if falhas:
+        for falha in falhas:
+            print(f"  ✗ {falha}")
+        raise SystemExit(1)
+    
+    print(f"OK: listagem de {args.consultas} consultas e remarcação dentro do limite de queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from services.gemini_service import test_gemini_connection
 from routers import scheduling, chatbot, clinica
 from database.database import engine
 from database.models import Base
+from services.integracao_service import outbox_worker
 
 settings = get_settings()
 
@@ -31,6 +32,16 @@ app.include_router(chatbot.router)
 app.include_router(clinica.router)
 
 
+@app.on_event("startup")
+def iniciar_outbox():
+    outbox_worker.start()
+
+
+@app.on_event("shutdown")
+def parar_outbox():
+    outbox_worker.stop(timeout=5)
+
+
 @app.get("/")
 def root():
     return {
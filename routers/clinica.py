@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter
 from pydantic import BaseModel
-from database.database import get_db
-from database.models import Especialidade
 from config import get_settings
-from services.rag_service import load_and_index_documents, ask_question
+from services.catalogo_service import get_catalogo
+from services.faq_service import get_faq_stats
+from services.rag_service import load_and_index_documents, ask_question, get_rag_cache_stats
 
 settings = get_settings()
 
@@ -26,34 +25,22 @@ def get_clinica_info():
     }
 
 @router.get("/especialidades")
-def get_especialidades(db: Session = Depends(get_db)):
-    especialidades = db.query(Especialidade).all()
+def get_especialidades():
+    especialidades = get_catalogo()["especialidades"]
     
     return {
         "total": len(especialidades),
-        "especialidades": [
-            {
-                "id": esp.id,
-                "nome": esp.nome,
-                "descricao": esp.descricao,
-                "icone": esp.icone
-            }
-            for esp in especialidades
-        ]
+        "especialidades": especialidades
     }
 
 @router.get("/apresentacao")
-def get_apresentacao(db: Session = Depends(get_db)):
-    especialidades = db.query(Especialidade).all()
-    
-    lista_especialidades = "\n".join([
-        f"   {esp.icone} {esp.nome}" for esp in especialidades
-    ])
+def get_apresentacao():
+    catalogo = get_catalogo()
     
     mensagem = f"""Olá! Bem-vindo(a) à {settings.clinica_nome}!
 
 Oferecemos consultas nas seguintes especialidades:
-{lista_especialidades}
+{catalogo["lista_apresentacao"]}
 
 Como posso ajudar você hoje?
 
@@ -69,7 +56,7 @@ Você pode:
             "endereco": settings.clinica_endereco,
             "telefone": settings.clinica_telefone
         },
-        "especialidades": [esp.nome for esp in especialidades]
+        "especialidades": [esp["nome"] for esp in catalogo["especialidades"]]
     }
     
 @router.post("/reindex")
@@ -77,6 +64,14 @@ def reindex_documents():
     return load_and_index_documents()
 
 
+@router.get("/metrics")
+def get_rag_metrics():
+    return {
+        "rag_cache": get_rag_cache_stats(),
+        "faq": get_faq_stats()
+    }
+
+
 @router.post("/ask")
 def ask_clinic_question(request: QuestionRequest):
     return ask_question(request.question)
\ No newline at end of file
@@ -6,6 +6,7 @@ from services.google_calendar_service import (
     get_upcoming_events
 )
 from services.trello_service import create_trello_card
+from services.integracao_service import get_outbox_metrics, outbox_worker
 
 router = APIRouter(
     prefix="/scheduling",
@@ -130,4 +131,26 @@ def list_appointments():
                 "error": str(e),
                 "message": "Erro ao listar agendamentos"
             }
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/outbox/metrics")
+def outbox_metrics():
+    return get_outbox_metrics()
+
+
+@router.post("/outbox/{evento_id}/reprocessar")
+def reprocessar_evento_outbox(evento_id: int):
+    if not outbox_worker.reprocessar(evento_id):
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": "Evento não encontrado na dead-letter"
+            }
+        )
+    
+    return {
+        "success": True,
+        "evento_id": evento_id
+    }
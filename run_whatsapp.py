@@ -1,4 +1,28 @@
-from services.whatsapp_service import start_whatsapp
+import json
+import threading
+import time
+from config import get_settings
+from services.whatsapp_service import start_whatsapp, get_whatsapp_metrics
+
+settings = get_settings()
+
+
+def registrar_metricas(intervalo: float):
+    while True:
+        time.sleep(intervalo)
+        try:
+            print(f"Métricas: {json.dumps(get_whatsapp_metrics(), ensure_ascii=False, default=str)}", flush=True)
+        except Exception as e:
+            print(f"Métricas indisponíveis: {e}", flush=True)
+
 
 if __name__ == "__main__":
-    start_whatsapp()
\ No newline at end of file
+    if settings.whatsapp_metrics_interval_seconds > 0:
+        threading.Thread(
+            target=registrar_metricas,
+            args=(settings.whatsapp_metrics_interval_seconds,),
+            name="whatsapp-metricas",
+            daemon=True
+        ).start()
+    
+    start_whatsapp()
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from google.oauth2.credentials import Credentials
+from config import get_settings
+import services.google_calendar_service as calendar
+
+settings = get_settings()
+
+
+class _Resposta:
+    
+    def __init__(self, dados: dict):
+        self.status = 200
+        self.headers = {'content-type': 'application/json'}
+        self.data = json.dumps(dados).encode()
+
+
+class _TransporteFalso:
+    
+    def __init__(self):
+        self.renovacoes = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, url, method='GET', body=None, headers=None, **kwargs):
+        with self._lock:
+            self.renovacoes += 1
+            return _Resposta({'access_token': f"acesso{self.renovacoes}", 'expires_in': 3600, 'token_type': 'Bearer'})
+
+
+def _gravar_token(caminho: str, expira_em: datetime):
+    creds = Credentials(
+        token='acesso0',
+        refresh_token='renovacao',
+        token_uri='https://oauth2.googleapis.com/token',
+        client_id='cliente',
+        client_secret='segredo',
+        scopes=calendar.SCOPES,
+        expiry=expira_em
+    )
+    with open(caminho, 'w') as token:
+        token.write(creds.to_json())
+
+
+def _servico_sem_cache():
+    creds = Credentials.from_authorized_user_file(settings.google_calendar_token_file, calendar.SCOPES)
+    if not creds.valid:
+        creds.refresh(calendar.Request())
+    return calendar.build('calendar', 'v3', credentials=creds)
+
+
+def _medir(funcao, chamadas: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(chamadas):
+        funcao()
+    return (time.perf_counter() - inicio) / chamadas * 1000
+
+
+def executar(chamadas: int, concorrentes: int, threads: int) -> tuple:
+    falhas = []
+    transporte = _TransporteFalso()
+    construcoes = []
+    construcoes_lock = threading.Lock()
+    build = calendar.build
+    
+    def build_contado(*args, **kwargs):
+        with construcoes_lock:
+            construcoes.append(threading.get_ident())
+        return build(*args, **kwargs)
+    
+    originais = {nome: getattr(settings, nome) for nome in ('google_calendar_token_file', 'google_calendar_credentials_file')}
+    request = calendar.Request
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        settings.google_calendar_token_file = os.path.join(diretorio, 'token.json')
+        settings.google_calendar_credentials_file = os.path.join(diretorio, 'credentials.json')
+        calendar.Request = lambda: transporte
+        calendar.build = build_contado
+        calendar.reset_calendar_service()
+        
+        try:
+            _gravar_token(settings.google_calendar_token_file, datetime.utcnow() + timedelta(hours=1))
+            ms_sem_cache = _medir(_servico_sem_cache, chamadas)
+            
+            calendar.reset_calendar_service()
+            inicio = time.perf_counter()
+            calendar.get_calendar_service()
+            ms_primeira = (time.perf_counter() - inicio) * 1000
+            ms_com_cache = _medir(calendar.get_calendar_service, chamadas)
+            
+            _gravar_token(settings.google_calendar_token_file, datetime.utcnow() + timedelta(minutes=2))
+            calendar.reset_calendar_service()
+            construcoes.clear()
+            transporte.renovacoes = 0
+            threads_usadas = set()
+            
+            def chamar(_):
+                threads_usadas.add(threading.get_ident())
+                return calendar.get_calendar_service()
+            
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                servicos = list(executor.map(chamar, range(concorrentes)))
+            
+            if len(construcoes) != len(threads_usadas):
+                falhas.append(f"{len(construcoes)} construções do cliente para {len(threads_usadas)} threads")
+            if transporte.renovacoes != 1:
+                falhas.append(f"{transporte.renovacoes} renovações do token perto da expiração, esperado 1")
+            if len({id(servico) for servico in servicos}) != len(threads_usadas):
+                falhas.append("threads compartilhando o mesmo cliente do Calendar")
+        finally:
+            for nome, valor in originais.items():
+                setattr(settings, nome, valor)
+            calendar.Request = request
+            calendar.build = build
+            calendar.reset_calendar_service()
+    
+    return falhas, {
+        "ms_sem_cache": round(ms_sem_cache, 3),
+        "ms_primeira_chamada": round(ms_primeira, 3),
+        "ms_com_cache": round(ms_com_cache, 4),
+        "ganho": round(ms_sem_cache / ms_com_cache) if ms_com_cache else 0,
+        "construcoes": len(construcoes),
+        "threads": len(threads_usadas),
+        "renovacoes": transporte.renovacoes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o custo de obter o cliente do Google Calendar com e sem reaproveitamento")
+    parser.add_argument("--chamadas", type=int, default=200)
+    parser.add_argument("--concorrentes", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    
+    falhas, resultado = executar(args.chamadas, args.concorrentes, args.threads)
+    print(", ".join(f"{chave}={valor}" for chave, valor in resultado.items()))
+    
+    if falhas:
+        for falha in falhas:
+            print(f"  ✗ {falha}")
+        raise SystemExit(1)
+    
+    print(
+        f"OK: {resultado['ms_sem_cache']} ms por chamada reconstruindo o cliente, "
+        f"{resultado['ms_com_cache']} ms reaproveitando; {args.concorrentes} chamadas concorrentes "
+        f"com {resultado['construcoes']} construções e {resultado['renovacoes']} renovação"
+    )
+
+
+if __name__ == "__main__":
+    main()
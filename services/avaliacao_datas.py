@@ -0,0 +1,105 @@
+import argparse
+import time
+from datetime import datetime
+from services.date_parser import aplicar_data_local, parse_data_hora
+
+AGORA = datetime(2026, 10, 14, 9, 0)
+
+FRASES = [
+    ("hoje", "2026-10-14T00:00:00", True),
+    ("hj às 16h", "2026-10-14T16:00:00", True),
+    ("amanhã", "2026-10-15T00:00:00", True),
+    ("amanha às 14", "2026-10-15T14:00:00", True),
+    ("amanhã às 14h30", "2026-10-15T14:30:00", True),
+    ("depois de amanhã às 9h", "2026-10-16T09:00:00", True),
+    ("daqui a 3 dias", "2026-10-17T00:00:00", True),
+    ("segunda 9h", "2026-10-19T09:00:00", True),
+    ("segunda-feira às 8", "2026-10-19T08:00:00", True),
+    ("próxima quarta", "2026-10-21T00:00:00", True),
+    ("quarta", "2026-10-21T00:00:00", True),
+    ("pode ser sexta às 10?", "2026-10-16T10:00:00", True),
+    ("sábado de manhã", "2026-10-17T00:00:00", False),
+    ("quinta às 2 da tarde", "2026-10-15T14:00:00", True),
+    ("ter às 15h", "2026-10-20T15:00:00", True),
+    ("sex", "2026-10-16T00:00:00", True),
+    ("qua 14h", "2026-10-21T14:00:00", True),
+    ("20/10", "2026-10-20T00:00:00", True),
+    ("20/10 às 8h", "2026-10-20T08:00:00", True),
+    ("05/01/2027 14:00", "2027-01-05T14:00:00", True),
+    ("10/10", "2027-10-10T00:00:00", True),
+    ("dia 20", "2026-10-20T00:00:00", True),
+    ("dia 5 às 11h", "2026-11-05T11:00:00", True),
+    ("15 de novembro", "2026-11-15T00:00:00", True),
+    ("dia 3 de março às 10h", "2027-03-03T10:00:00", True),
+    ("entre 14h e 16h amanhã", "2026-10-15T14:00:00", True),
+    ("amanhã das 8 às 10", "2026-10-15T08:00:00", True),
+    ("às 8", None, True),
+    ("14h30", None, True),
+    ("2 da tarde", None, True),
+    ("novembro", None, True),
+    ("tem horário em dezembro?", None, False),
+    ("não posso amanhã, pode ser sexta às 10?", "2026-10-15T10:00:00", False),
+    ("não quero segunda, prefiro quarta às 14h", "2026-10-19T14:00:00", False),
+    ("remarcar do dia 10 para o dia 15", "2026-11-10T00:00:00", False),
+    ("vou ter que remarcar, pode ser às 15h?", None, False),
+    ("vou ter que ver", None, None),
+    ("qua sera que tem vaga", None, None),
+    ("o médico que marcou comigo", None, None),
+    ("obrigada", None, None)
+]
+
+SOBREPOSICOES = [
+    ("não posso amanhã, pode ser sexta às 10?", "2026-10-16T10:00:00", "2026-10-16T10:00:00"),
+    ("não quero segunda, prefiro quarta às 14h", "2026-10-21T14:00:00", "2026-10-21T14:00:00"),
+    ("remarcar do dia 10 para o dia 15", "2026-10-15T00:00:00", "2026-10-15T00:00:00"),
+    ("vou ter que remarcar, pode ser às 15h?", "2026-10-16T15:00:00", "2026-10-16T15:00:00"),
+    ("amanhã às 9", "2026-10-15T10:00:00", "2026-10-15T09:00:00"),
+    ("segunda 9h", None, "2026-10-19T09:00:00"),
+    ("às 16h", "2026-10-16T00:00:00", "2026-10-16T16:00:00"),
+    ("prefiro sexta, pode ser?", None, "2026-10-16T00:00:00")
+]
+
+
+def avaliar() -> list:
+    erros = []
+    for frase, start_datetime, completo in FRASES:
+        resultado = parse_data_hora(frase, AGORA)
+        obtido = (resultado['start_datetime'], resultado['completo']) if resultado else (None, None)
+        if obtido != (start_datetime, completo):
+            erros.append((frase, (start_datetime, completo), obtido))
+    
+    for frase, data_modelo, esperado in SOBREPOSICOES:
+        extracted = {"start_datetime": data_modelo} if data_modelo else {}
+        aplicar_data_local(extracted, frase, AGORA)
+        if extracted.get('start_datetime') != esperado:
+            erros.append((frase, esperado, extracted.get('start_datetime')))
+    return erros
+
+
+def medir_vazao(repeticoes: int) -> float:
+    frases = [frase for frase, _, _ in FRASES]
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for frase in frases:
+            parse_data_hora(frase, AGORA)
+    return len(frases) * repeticoes / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acurácia e vazão do parser de datas em português")
+    parser.add_argument("--repeticoes", type=int, default=1000)
+    args = parser.parse_args()
+    
+    erros = avaliar()
+    vazao = medir_vazao(args.repeticoes)
+    total = len(FRASES) + len(SOBREPOSICOES)
+    print(f"{total - len(erros)}/{total} casos corretos, {vazao:,.0f} frases/s")
+    for frase, esperado, obtido in erros:
+        print(f"  ✗ {frase!r}: esperado {esperado}, obtido {obtido}")
+    
+    if erros:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
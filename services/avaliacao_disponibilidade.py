@@ -0,0 +1,125 @@
+import argparse
+import random
+import time as relogio
+from datetime import datetime, timedelta, time
+from services.fake_calendar import FakeCalendarService
+import services.google_calendar_service as calendar
+
+
+def _slots_laco_aninhado(days: int = 30, slot_duration_minutes: int = 60):
+    now = datetime.now()
+    start_date = datetime.combine(now.date(), time(0, 0))
+    end_date = start_date + timedelta(days=days)
+    
+    busy_times = calendar.get_busy_times(start_date, end_date)
+    
+    available_slots = []
+    
+    current_date = start_date
+    while current_date < end_date:
+        work_start_hour, work_end_hour = calendar.get_working_hours(current_date)
+        
+        if work_start_hour is None:
+            current_date += timedelta(days=1)
+            continue
+        
+        day_slots = []
+        
+        current_slot = datetime.combine(current_date.date(), time(work_start_hour, 0))
+        work_end = datetime.combine(current_date.date(), time(work_end_hour, 0))
+        
+        while current_slot < work_end:
+            slot_end = current_slot + timedelta(minutes=slot_duration_minutes)
+            
+            is_free = True
+            for busy in busy_times:
+                busy_start = busy['start'].replace(tzinfo=None)
+                busy_end = busy['end'].replace(tzinfo=None)
+                
+                if not (slot_end <= busy_start or current_slot >= busy_end):
+                    is_free = False
+                    break
+            
+            if current_slot > now and is_free:
+                day_slots.append(current_slot.strftime('%H:%M'))
+            
+            current_slot = slot_end
+        
+        if day_slots:
+            available_slots.append({
+                'date': current_date.strftime('%Y-%m-%d'),
+                'day_of_week': current_date.strftime('%A'),
+                'slots': day_slots
+            })
+        
+        current_date += timedelta(days=1)
+    
+    return available_slots
+
+
+HORAS_LIVRES = (12, 17)
+
+
+def _popular(service: FakeCalendarService, eventos: int, dias: int, semente: int):
+    aleatorio = random.Random(semente)
+    hoje = datetime.combine(datetime.now().date(), time(0, 0))
+    horas = [hora for hora in range(7, 19) if hora not in HORAS_LIVRES]
+    for _ in range(eventos):
+        minuto = aleatorio.choice([0, 15, 30, 45])
+        inicio = hoje + timedelta(days=aleatorio.randrange(dias), hours=aleatorio.choice(horas), minutes=minuto)
+        service.add_event(inicio, inicio + timedelta(minutes=aleatorio.randrange(15, 61 - minuto, 15)))
+
+
+def _medir(funcao, dias: int, repeticoes: int) -> tuple:
+    resultado = funcao(dias)
+    inicio = relogio.perf_counter()
+    for _ in range(repeticoes):
+        funcao(dias)
+    return resultado, (relogio.perf_counter() - inicio) / repeticoes * 1000
+
+
+def executar(eventos: int, dias: int, repeticoes: int, semente: int) -> dict:
+    service = FakeCalendarService()
+    _popular(service, eventos, dias, semente)
+    
+    get_calendar_service = calendar.get_calendar_service
+    calendar.get_calendar_service = lambda: service
+    calendar.reset_busy_times_cache()
+    try:
+        antes, ms_antes = _medir(_slots_laco_aninhado, dias, repeticoes)
+        depois, ms_depois = _medir(calendar.get_available_slots, dias, repeticoes)
+    finally:
+        calendar.get_calendar_service = get_calendar_service
+        calendar.reset_busy_times_cache()
+    
+    return {
+        "iguais": antes == depois,
+        "slots": sum(len(dia['slots']) for dia in depois),
+        "ms_laco_aninhado": round(ms_antes, 2),
+        "ms_indice": round(ms_depois, 2),
+        "ganho": round(ms_antes / ms_depois, 1) if ms_depois else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o índice de horários ocupados com o laço aninhado anterior")
+    parser.add_argument("--eventos", type=int, default=5000)
+    parser.add_argument("--dias", type=int, default=30)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    
+    resultado = executar(args.eventos, args.dias, args.repeticoes, args.semente)
+    if not resultado["iguais"]:
+        print("  ✗ get_available_slots diverge do laço aninhado")
+        raise SystemExit(1)
+    
+    print(
+        f"OK: {args.eventos} eventos em {args.dias} dias, {resultado['slots']} horários livres - "
+        f"laço aninhado {resultado['ms_laco_aninhado']} ms, índice {resultado['ms_indice']} ms "
+        f"({resultado['ganho']}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
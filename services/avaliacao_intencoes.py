@@ -0,0 +1,148 @@
+import argparse
+import re
+import time
+from datetime import datetime
+from config import get_settings
+from services.date_parser import tem_horario
+from services.intent_classifier import classify_intent
+
+settings = get_settings()
+
+AGORA = datetime(2026, 10, 14, 9, 0)
+
+FRASES = [
+    ("Sim", "confirm", None),
+    ("sim!", "confirm", None),
+    ("ok", "confirm", None),
+    ("Pode ser", "confirm", None),
+    ("confirmo", "confirm", None),
+    ("beleza", "confirm", None),
+    ("perfeito", "confirm", None),
+    ("Não", "cancel", None),
+    ("nao obrigado", "cancel", None),
+    ("deixa pra lá", "cancel", None),
+    ("Oi", "greeting", None),
+    ("olá", "greeting", None),
+    ("Bom dia!", "greeting", None),
+    ("boa tarde", "greeting", None),
+    ("1", "other", None),
+    ("2", "other", None),
+    ("quero cancelar minha consulta", "cancel_appointment", None),
+    ("desmarcar", "cancel_appointment", None),
+    ("preciso remarcar a consulta", "reschedule_appointment", None),
+    ("reagendar", "reschedule_appointment", None),
+    ("quero agendar uma consulta", "create_appointment", None),
+    ("marcar consulta", "create_appointment", None),
+    ("quais os horários disponíveis", "check_availability", None),
+    ("tem vagas", "check_availability", None),
+    ("amanhã", "check_availability", "2026-10-15T00:00:00"),
+    ("hoje", "check_availability", "2026-10-14T00:00:00"),
+    ("depois de amanhã", "check_availability", "2026-10-16T00:00:00"),
+    ("sexta", "check_availability", "2026-10-16T00:00:00"),
+    ("segunda-feira", "check_availability", "2026-10-19T00:00:00"),
+    ("próxima terça", "check_availability", "2026-10-20T00:00:00"),
+    ("qua", "check_availability", "2026-10-21T00:00:00"),
+    ("amanhã às 14h30", "provide_datetime", "2026-10-15T14:30:00"),
+    ("segunda 9h", "provide_datetime", "2026-10-19T09:00:00"),
+    ("sex às 10", "provide_datetime", "2026-10-16T10:00:00"),
+    ("dia 20 às 15h", "provide_datetime", "2026-10-20T15:00:00"),
+    ("20/10 às 8h", "provide_datetime", "2026-10-20T08:00:00"),
+    ("pode ser quinta às 2 da tarde", "provide_datetime", "2026-10-15T14:00:00"),
+    ("não posso amanhã, pode ser sexta às 10?", None, None),
+    ("não quero segunda, prefiro quarta às 14h", None, None),
+    ("remarcar do dia 10 para o dia 15", None, None),
+    ("vou ter que remarcar, pode ser às 15h?", None, None),
+    ("vou ter que ver com meu marido", None, None),
+    ("sim, mas só depois das 18h", None, None),
+    ("não sei ainda", None, None),
+    ("quanto custa a consulta?", None, None),
+    ("vocês aceitam unimed?", None, None),
+    ("meu nome é Maria da Silva", None, None),
+    ("maria@email.com", None, None),
+    ("quero marcar com cardiologista amanhã de manhã", None, None),
+    ("tem horário em novembro?", None, None),
+    ("oi, queria saber se tem dermatologista", None, None),
+    ("pode ser às 10", None, None)
+]
+
+ETAPAS = [
+    ("amanhã", "aguardando_data", None),
+    ("sexta", "aguardando_data", None),
+    ("dia 20", "aguardando_data", None),
+    ("20/10", "aguardando_data", None),
+    ("amanhã às 14h30", "aguardando_data", "2026-10-15T14:30:00"),
+    ("segunda 9h", "aguardando_data", "2026-10-19T09:00:00")
+]
+
+
+def _normalizar(frase: str) -> str:
+    return re.sub(r'\s+', ' ', frase.lower()).strip().strip('.!?, ')
+
+
+def avaliar() -> dict:
+    locais = 0
+    corretos = 0
+    erros = []
+    for frase, intent, start_datetime in FRASES:
+        resultado = classify_intent(_normalizar(frase), AGORA)
+        if resultado['confidence'] < settings.intent_fast_path_threshold:
+            if intent is not None:
+                erros.append((frase, intent, "llm"))
+            continue
+        
+        locais += 1
+        obtido = resultado['extracted_data'].get('start_datetime')
+        if resultado['intent'] == intent and obtido == start_datetime:
+            corretos += 1
+        else:
+            erros.append((frase, f"{intent} {start_datetime or ''}".strip(), f"{resultado['intent']} {obtido or ''}".strip()))
+    
+    total = len(FRASES)
+    acuracia = round((total - len(erros)) / total, 3)
+    
+    for frase, etapa, data_hora in ETAPAS:
+        start_datetime = classify_intent(_normalizar(frase), AGORA)['extracted_data'].get('start_datetime')
+        obtido = start_datetime if tem_horario(start_datetime) else None
+        if obtido != data_hora:
+            erros.append((f"{frase} ({etapa})", f"data_hora {data_hora}", f"data_hora {obtido}"))
+    
+    return {
+        "bypass": round(locais / total, 3),
+        "precisao": round(corretos / locais, 3) if locais else 0.0,
+        "acuracia": acuracia,
+        "erros": erros
+    }
+
+
+def medir_vazao(repeticoes: int) -> float:
+    frases = [_normalizar(frase) for frase, _, _ in FRASES]
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for frase in frases:
+            classify_intent(frase, AGORA)
+    return len(frases) * repeticoes / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taxa de bypass do LLM, acurácia e vazão do classificador local")
+    parser.add_argument("--repeticoes", type=int, default=1000)
+    parser.add_argument("--detalhes", action="store_true", help="Lista as frases classificadas errado")
+    args = parser.parse_args()
+    
+    resultado = avaliar()
+    vazao = medir_vazao(args.repeticoes)
+    print(
+        f"{len(FRASES)} frases rotuladas e {len(ETAPAS)} respostas por etapa, limiar {settings.intent_fast_path_threshold}: "
+        f"bypass {resultado['bypass']:.0%}, precisão local {resultado['precisao']:.3f}, "
+        f"acurácia {resultado['acuracia']:.3f}, {vazao:,.0f} frases/s"
+    )
+    if args.detalhes:
+        for frase, esperado, obtido in resultado["erros"]:
+            print(f"  ✗ {frase!r}: esperado {esperado}, obtido {obtido}")
+    
+    if resultado["erros"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
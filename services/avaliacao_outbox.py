@@ -0,0 +1,206 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from config import get_settings
+from database.database import Base, create_db_engine
+from database.models import Agendamento, Especialidade, EventoOutbox, Paciente
+from services.fake_calendar import FakeCalendarService
+from services.fake_trello import FakeTrelloServer
+from services.outbox_service import OutboxWorker, STATUS_CONCLUIDO, STATUS_FALHOU, STATUS_PENDENTE, STATUS_PROCESSANDO
+import services.google_calendar_service as calendar
+import services.integracao_service as integracao
+import services.trello_service as trello
+
+settings = get_settings()
+
+AJUSTES = {
+    "outbox_max_tentativas": 3,
+    "outbox_backoff_base_seconds": 0.01,
+    "outbox_backoff_max_seconds": 0.05,
+    "outbox_lease_seconds": 60.0,
+    "trello_api_key": "chave",
+    "trello_token": "token",
+    "trello_board_id": "board",
+    "trello_list_id": "lista"
+}
+
+
+def _drenar(worker: OutboxWorker, Session, limite: float = 10.0) -> bool:
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if worker.processar_lote():
+            continue
+        
+        db = Session()
+        try:
+            abertos = db.query(EventoOutbox).filter(
+                EventoOutbox.status.in_([STATUS_PENDENTE, STATUS_PROCESSANDO])
+            ).count()
+        finally:
+            db.close()
+        if not abertos:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _agendar(Session, paciente_id: int, especialidade_id: int, data_hora: datetime) -> int:
+    db = Session()
+    try:
+        agendamento = Agendamento(paciente_id=paciente_id, especialidade_id=especialidade_id, data_hora=data_hora)
+        db.add(agendamento)
+        db.flush()
+        integracao.registrar_novo_agendamento(
+            db,
+            agendamento,
+            title="Cardiologia - Maria",
+            calendar_description="Consulta de teste",
+            trello_description="5561999990000",
+            attendee_email="maria@teste.com"
+        )
+        db.commit()
+        return agendamento.id
+    finally:
+        db.close()
+
+
+def _evento(Session, tipo: str, agendamento_id: int) -> EventoOutbox:
+    db = Session()
+    try:
+        return db.query(EventoOutbox).filter(
+            EventoOutbox.tipo == tipo,
+            EventoOutbox.agendamento_id == agendamento_id
+        ).first()
+    finally:
+        db.close()
+
+
+def _agendamento(Session, agendamento_id: int) -> Agendamento:
+    db = Session()
+    try:
+        return db.query(Agendamento).filter(Agendamento.id == agendamento_id).first()
+    finally:
+        db.close()
+
+
+def verificar() -> list:
+    falhas = []
+    
+    def esperar(descricao: str, obtido, esperado):
+        if obtido != esperado:
+            falhas.append(f"{descricao}: esperado {esperado}, obtido {obtido}")
+    
+    originais = {nome: getattr(settings, nome) for nome in [*AJUSTES, "trello_api_url"]}
+    get_calendar_service = calendar.get_calendar_service
+    service = FakeCalendarService()
+    
+    with tempfile.TemporaryDirectory() as diretorio, FakeTrelloServer(AJUSTES["trello_list_id"], AJUSTES["trello_board_id"]) as servidor:
+        engine = create_db_engine(f"sqlite:///{os.path.join(diretorio, 'outbox.db')}", "production")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        
+        for nome, valor in AJUSTES.items():
+            setattr(settings, nome, valor)
+        settings.trello_api_url = servidor.url
+        calendar.get_calendar_service = lambda: service
+        calendar.reset_busy_times_cache()
+        trello.reset_trello_list_cache()
+        
+        try:
+            db = Session()
+            paciente = Paciente(nome="Maria", telefone="5561999990000", email="maria@teste.com")
+            especialidade = Especialidade(nome="Cardiologia")
+            db.add_all([paciente, especialidade])
+            db.commit()
+            paciente_id, especialidade_id = paciente.id, especialidade.id
+            db.close()
+            
+            worker = OutboxWorker(integracao.HANDLERS, integracao.executar_em_paralelo, session_factory=Session)
+            amanha = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            
+            servidor.falhar(2)
+            agendamento_id = _agendar(Session, paciente_id, especialidade_id, amanha)
+            esperar("fila drenada após falhas transitórias", _drenar(worker, Session), True)
+            
+            agendamento = _agendamento(Session, agendamento_id)
+            event_id = agendamento.calendar_event_id
+            esperar("evento criado no Calendar", event_id in service.events_by_id, True)
+            cards = servidor.cards_abertos()
+            esperar("um único card após retentativas", [card['id'] for card in cards], [agendamento.trello_card_id])
+            esperar(
+                "link do evento vinculado ao card",
+                bool(cards) and service.events_by_id[event_id]['htmlLink'] in cards[0]['desc'],
+                True
+            )
+            esperar("retentativas com backoff", worker.get_metrics()["retentativas"], 2)
+            esperar("tentativas do trello.criar", _evento(Session, "trello.criar", agendamento_id).tentativas, 3)
+            
+            db = Session()
+            agendamento = db.query(Agendamento).filter(Agendamento.id == agendamento_id).first()
+            agendamento.status = "cancelado"
+            integracao.registrar_cancelamento(db, agendamento)
+            db.commit()
+            db.close()
+            
+            servidor.falhar(settings.outbox_max_tentativas)
+            _drenar(worker, Session)
+            arquivar = _evento(Session, "trello.arquivar", agendamento_id)
+            esperar("dead-letter após o limite de tentativas", (arquivar.status, arquivar.tentativas), (STATUS_FALHOU, settings.outbox_max_tentativas))
+            esperar("evento excluído do Calendar", service.events_by_id[event_id]['status'], 'cancelled')
+            metricas = worker.get_metrics()
+            esperar("métricas de dead-letter", (metricas["dead_letters"], metricas["dead_letter_total"]), (1, 1))
+            
+            esperar("reprocessar evento em dead-letter", worker.reprocessar(arquivar.id), True)
+            esperar("reprocessar evento não falho", worker.reprocessar(arquivar.id), False)
+            _drenar(worker, Session)
+            esperar("reprocessado com sucesso", _evento(Session, "trello.arquivar", agendamento_id).status, STATUS_CONCLUIDO)
+            esperar("card arquivado", servidor.cards_abertos(), [])
+            
+            outro_id = _agendar(Session, paciente_id, especialidade_id, amanha + timedelta(hours=2))
+            db = Session()
+            db.query(EventoOutbox).filter(
+                EventoOutbox.tipo == "calendar.criar",
+                EventoOutbox.agendamento_id == outro_id
+            ).update({
+                "status": STATUS_PROCESSANDO,
+                "reivindicado_em": datetime.utcnow() - timedelta(seconds=settings.outbox_lease_seconds + 1)
+            }, synchronize_session=False)
+            db.commit()
+            db.close()
+            
+            esperar("fila drenada após lease expirado", _drenar(worker, Session), True)
+            recuperado = _evento(Session, "calendar.criar", outro_id)
+            esperar("evento preso recuperado", (recuperado.status, recuperado.tentativas), (STATUS_CONCLUIDO, 2))
+            esperar("evento recuperado criado no Calendar", _agendamento(Session, outro_id).calendar_event_id in service.events_by_id, True)
+            
+            metricas = worker.get_metrics()
+            esperar("fila vazia nas métricas", (metricas["pendentes"], metricas["dead_letter_total"]), (0, 0))
+        finally:
+            for nome, valor in originais.items():
+                setattr(settings, nome, valor)
+            calendar.get_calendar_service = get_calendar_service
+            calendar.reset_busy_times_cache()
+            trello.reset_trello_list_cache()
+            engine.dispose()
+    
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exercita o outbox de integrações contra um Google Calendar e um Trello falsos")
+    parser.parse_args()
+    
+    falhas = verificar()
+    if falhas:
+        for falha in falhas:
+            print(f"  ✗ {falha}")
+        raise SystemExit(1)
+    
+    print("OK: retentativa com backoff, dead-letter, reprocessamento e recuperação de lease expirado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import re
+import time
+from services.catalogo_service import normalizar_nome
+import services.rag_service as rag
+
+PERGUNTAS = [
+    ("Vocês aceitam Unimed?", ["unimed (todas as modalidades)"]),
+    ("Aceitam Bradesco Saúde?", ["bradesco saude - ambulatorial"]),
+    ("Atendem pelo CASSI do Banco do Brasil?", ["cassi (banco do brasil)"]),
+    ("O plano Porto Seguro Diamante é aceito?", ["porto seguro saude - ouro, diamante"]),
+    ("Amil S750 cobre consulta aí?", ["amil - s400, s750"]),
+    ("Quanto custa a consulta particular de clínica geral?", ["consulta particular r$ 150,00"]),
+    ("Qual o valor da consulta com cardiologista?", ["consulta cardiologica r$ 250,00"]),
+    ("Quanto custa o teste ergométrico?", ["teste ergometrico r$ 300,00"]),
+    ("Qual o preço do LASIK?", ["lasik: r$ 4.000,00", "lasik (por olho) r$ 4.000,00"]),
+    ("Quanto fica um implante dentário completo?", ["implante unitario: r$ 2.500,00"]),
+    ("Quanto custa o holter?", ["holter 24h r$ 350,00"]),
+    ("Qual o valor da limpeza nos dentes?", ["limpeza dental r$ 120,00"]),
+    ("Que horas a clínica abre no sábado?", ["sabados: 8h as 13h"]),
+    ("Vocês abrem domingo?", ["domingos e feriados: fechado"]),
+    ("Qual o endereço da clínica?", ["av. paulista, 1000"]),
+    ("Qual a estação de metrô mais próxima?", ["estacao trianon-masp"]),
+    ("Tem estacionamento?", ["convenio com estacionamento na rua augusta"]),
+    ("Posso cancelar sem pagar taxa?", ["ate 24 horas antes: sem custo"]),
+    ("Quanto tempo de atraso vocês toleram?", ["tolerancia: ate 15 minutos de atraso"]),
+    ("Dá pra parcelar no cartão?", ["ate 3x sem juros"]),
+    ("Tem desconto pagando no pix?", ["pix - a vista: 10% de desconto"]),
+    ("Qual a senha do wifi?", ["senha: saudemed2024"]),
+    ("Criança precisa de acompanhante?", ["menores de 18 anos: acompanhante obrigatorio", "criancas ate 18 anos: 1 responsavel"]),
+    ("Quem é o médico especialista em glaucoma?", ["dr. bruno alves"]),
+    ("Qual dentista faz implante?", ["dr. felipe martins"]),
+    ("Vocês fazem atendimento em casa?", ["atendimento domiciliar", "consulta domiciliar"]),
+    ("Como peço reembolso do meu plano?", ["codigo tuss para facilitar reembolso", "solicitar reembolso ao plano"]),
+    ("A clínica tem acesso para cadeirante?", ["rampa de acesso", "acessivel para cadeirantes"]),
+    ("O que é campimetria?", ["campimetria: exame do campo de visao"]),
+    ("Qual o email para falar sobre convênio?", ["convenios@saudemed.com.br"])
+]
+
+
+def _normalizar(texto: str) -> str:
+    return re.sub(r'\s+', ' ', normalizar_nome(texto))
+
+
+def _posicao_relevante(docs: list, esperados: list) -> int:
+    alvos = [_normalizar(esperado) for esperado in esperados]
+    for posicao, doc in enumerate(docs):
+        texto = _normalizar(doc.page_content)
+        if any(alvo in texto for alvo in alvos):
+            return posicao
+    return None
+
+
+def avaliar(modo: str, k: int) -> dict:
+    with rag._cache_lock:
+        rag._embeddings_cache.clear()
+        lexicas_antes = rag._rag_stats["buscas_lexicas"]
+    
+    acertos = 0
+    reciprocos = 0.0
+    latencias = []
+    erros = []
+    for pergunta, esperados in PERGUNTAS:
+        inicio = time.perf_counter()
+        docs = rag.recuperar_trechos(pergunta, k, modo=modo)
+        latencias.append(time.perf_counter() - inicio)
+        
+        posicao = _posicao_relevante(docs, esperados)
+        if posicao is None:
+            erros.append(pergunta)
+        else:
+            acertos += 1
+            reciprocos += 1 / (posicao + 1)
+    
+    latencias.sort()
+    total = len(PERGUNTAS)
+    return {
+        "modo": modo,
+        "recall": round(acertos / total, 3),
+        "mrr": round(reciprocos / total, 3),
+        "p50_ms": round(latencias[total // 2] * 1000, 2),
+        "p95_ms": round(latencias[int(total * 0.95)] * 1000, 2),
+        "sem_embedding": round((rag._rag_stats["buscas_lexicas"] - lexicas_antes) / total, 3),
+        "erros": erros
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall e latência da busca vetorial, BM25 e híbrida")
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--cobertura", type=float, help="Sobrescreve RAG_BM25_COBERTURA")
+    parser.add_argument("--margem", type=float, help="Sobrescreve RAG_BM25_MARGEM")
+    parser.add_argument("--detalhes", action="store_true", help="Lista as perguntas que erraram")
+    args = parser.parse_args()
+    
+    if args.cobertura is not None:
+        rag.settings.rag_bm25_cobertura = args.cobertura
+    if args.margem is not None:
+        rag.settings.rag_bm25_margem = args.margem
+    
+    rag.vectorstore = rag._abrir_vectorstore()
+    rag.get_bm25()
+    print(
+        f"{len(PERGUNTAS)} perguntas rotuladas, top-{args.k}, atalho lexical com cobertura >= "
+        f"{rag.settings.rag_bm25_cobertura} e margem >= {rag.settings.rag_bm25_margem}"
+    )
+    
+    for modo in ("vetorial", "lexical", "hibrido"):
+        resultado = avaliar(modo, args.k)
+        print(
+            f"{modo:>9}: recall@{args.k} {resultado['recall']:.3f}, MRR {resultado['mrr']:.3f}, "
+            f"p50 {resultado['p50_ms']} ms, p95 {resultado['p95_ms']} ms, "
+            f"sem embedding {resultado['sem_embedding']:.0%}"
+        )
+        if args.detalhes:
+            for pergunta in resultado["erros"]:
+                print(f"           ✗ {pergunta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+from services.conversation_service import ConversationState, HISTORY_MAX_MESSAGES
+
+
+class _ConversationStateAnterior:
+    
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.step = "apresentacao"
+        self.data = {
+            "nome": None,
+            "telefone": None,
+            "email": None,
+            "especialidade_id": None,
+            "especialidade_nome": None,
+            "data_hora": None,
+            "intent": None,
+            "paciente_id": None,
+            "consulta_remarcar_id": None,
+            "consulta_cancelar_id": None,
+            "consultas_disponiveis": None
+        }
+        self.last_question = None
+        self.history = []
+        self.created_at = datetime.now()
+        self.last_interaction = datetime.now()
+        self.descartada = False
+    
+    def update(self, **kwargs):
+        for key, value in kwargs.items():
+            if key in self.data:
+                self.data[key] = value
+            elif key == 'last_question':
+                self.last_question = value
+        self.last_interaction = datetime.now()
+    
+    def add_message(self, role: str, content: str):
+        self.history.append({
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat()
+        })
+        if len(self.history) > 20:
+            self.history = self.history[-20:]
+        self.last_interaction = datetime.now()
+
+
+def _criar_sessoes(classe, sessoes: int, mensagens: int) -> list:
+    estados = []
+    for indice in range(sessoes):
+        estado = classe(f"55619{indice:08d}")
+        estado.update(
+            nome=f"Paciente {indice}",
+            telefone=f"55619{indice:08d}",
+            email=f"paciente{indice}@teste.com",
+            especialidade_id=indice % 12 + 1,
+            intent="agendar"
+        )
+        for mensagem in range(mensagens):
+            estado.add_message("user" if mensagem % 2 == 0 else "assistant", f"Mensagem {mensagem} da sessão {indice}")
+        estados.append(estado)
+    return estados
+
+
+def medir_bytes_por_sessao(classe, sessoes: int, mensagens: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        inicio = tracemalloc.get_traced_memory()[0]
+        estados = _criar_sessoes(classe, sessoes, mensagens)
+        gc.collect()
+        total = tracemalloc.get_traced_memory()[0] - inicio
+    finally:
+        tracemalloc.stop()
+    del estados
+    return total / sessoes
+
+
+def verificar_historico(mensagens: int) -> list:
+    falhas = []
+    estado = _criar_sessoes(ConversationState, 1, mensagens)[0]
+    esperado = min(mensagens, HISTORY_MAX_MESSAGES)
+    if len(estado.history) != esperado:
+        falhas.append(f"histórico com {len(estado.history)} mensagens, esperado {esperado}")
+    if mensagens and estado.history[-1].content != f"Mensagem {mensagens - 1} da sessão 0":
+        falhas.append("última mensagem do histórico não é a mais recente")
+    if estado.history and not isinstance(estado.history[-1].timestamp, float):
+        falhas.append("timestamp do histórico não é epoch float")
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a memória por sessão do ConversationState atual e do anterior")
+    parser.add_argument("--sessoes", type=int, default=100000)
+    parser.add_argument("--mensagens", type=int, default=6)
+    args = parser.parse_args()
+    
+    antes = medir_bytes_por_sessao(_ConversationStateAnterior, args.sessoes, args.mensagens)
+    depois = medir_bytes_por_sessao(ConversationState, args.sessoes, args.mensagens)
+    
+    falhas = verificar_historico(HISTORY_MAX_MESSAGES + 5)
+    if depois >= antes:
+        falhas.append(f"{depois:.0f} bytes por sessão, não menor que os {antes:.0f} anteriores")
+    
+    if falhas:
+        for falha in falhas:
+            print(f"  ✗ {falha}")
+        raise SystemExit(1)
+    
+    print(
+        f"OK: {args.sessoes} sessões com {args.mensagens} mensagens - "
+        f"antes {antes:.0f} bytes por sessão, depois {depois:.0f} ({(1 - depois / antes) * 100:.0f}% menos)"
+    )
+
+
+if __name__ == "__main__":
+    main()
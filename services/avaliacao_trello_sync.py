@@ -0,0 +1,170 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from config import get_settings
+from database.database import Base, create_db_engine
+from database.models import Agendamento, Especialidade, Paciente
+from services.fake_trello import FakeTrelloServer
+import services.trello_service as trello
+import services.trello_sync as trello_sync
+
+settings = get_settings()
+
+AJUSTES = {
+    "trello_api_key": "chave",
+    "trello_token": "token",
+    "trello_board_id": "board",
+    "trello_list_id": "lista"
+}
+
+
+def _preparar_banco(url: str, agendamentos: int):
+    engine = create_db_engine(url, "production")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    
+    db = Session()
+    especialidade = Especialidade(nome="Cardiologia")
+    pacientes = [
+        Paciente(nome=f"Paciente {indice}", telefone=f"55619{indice:08d}", email=f"paciente{indice}@teste.com")
+        for indice in range(50)
+    ]
+    db.add_all([especialidade, *pacientes])
+    db.flush()
+    
+    inicio = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    db.add_all([
+        Agendamento(
+            paciente_id=pacientes[indice % len(pacientes)].id,
+            especialidade_id=especialidade.id,
+            data_hora=inicio + timedelta(minutes=indice)
+        )
+        for indice in range(agendamentos)
+    ])
+    db.commit()
+    db.close()
+    
+    return engine, Session
+
+
+def _alterar_agenda(Session, canceladas: int, remarcadas: int):
+    db = Session()
+    agendamentos = db.query(Agendamento).order_by(Agendamento.id).limit(canceladas + remarcadas).all()
+    for agendamento in agendamentos[:canceladas]:
+        agendamento.status = "cancelado"
+    for agendamento in agendamentos[canceladas:]:
+        agendamento.data_hora += timedelta(minutes=30)
+    db.commit()
+    db.close()
+
+
+def _sincronizar(servidor: FakeTrelloServer, dry_run: bool = False, concorrencia: int = 4) -> dict:
+    requisicoes = sum(servidor.calls[metodo] for metodo in ('GET', 'POST', 'PUT'))
+    respostas_429 = servidor.calls['429']
+    inicio = time.monotonic()
+    
+    relatorio = trello_sync.sincronizar_trello(dias=3, concorrencia=concorrencia, dry_run=dry_run)
+    
+    segundos = time.monotonic() - inicio
+    relatorio["requisicoes"] = sum(servidor.calls[metodo] for metodo in ('GET', 'POST', 'PUT')) - requisicoes
+    relatorio["respostas_429"] = servidor.calls['429'] - respostas_429
+    relatorio["req_por_s"] = round(relatorio["requisicoes"] / segundos, 1) if segundos else 0
+    return relatorio
+
+
+def executar(agendamentos: int, taxa: float, burst: int, limite: int, janela: float, concorrencia: int) -> tuple:
+    falhas = []
+    relatorios = []
+    
+    def esperar(descricao: str, obtido, esperado):
+        if obtido != esperado:
+            falhas.append(f"{descricao}: esperado {esperado}, obtido {obtido}")
+    
+    canceladas = agendamentos // 15
+    remarcadas = agendamentos * 2 // 15
+    forcadas_429 = settings.trello_max_retries
+    
+    originais = {nome: getattr(settings, nome) for nome in [*AJUSTES, "trello_api_url"]}
+    limitador = trello._limitador
+    session_local = trello_sync.SessionLocal
+    
+    with tempfile.TemporaryDirectory() as diretorio, FakeTrelloServer(
+        AJUSTES["trello_list_id"], AJUSTES["trello_board_id"], limite=limite, janela=janela
+    ) as servidor:
+        engine, Session = _preparar_banco(f"sqlite:///{os.path.join(diretorio, 'trello_sync.db')}", agendamentos)
+        
+        for nome, valor in AJUSTES.items():
+            setattr(settings, nome, valor)
+        settings.trello_api_url = servidor.url
+        trello._limitador = trello.TokenBucket(taxa, burst)
+        trello_sync.SessionLocal = Session
+        trello.reset_trello_list_cache()
+        
+        try:
+            primeira = _sincronizar(servidor, concorrencia=concorrencia)
+            relatorios.append(("primeira sincronização", primeira))
+            esperar("cards criados", (primeira["criar"], primeira["erros"]), (agendamentos, 0))
+            esperar("cards abertos no Trello", len(servidor.cards_abertos()), agendamentos)
+            
+            _alterar_agenda(Session, canceladas, remarcadas)
+            servidor.falhar(forcadas_429, status=429)
+            segunda = _sincronizar(servidor, concorrencia=concorrencia)
+            relatorios.append(("após cancelar e remarcar", segunda))
+            esperar(
+                "arquivar/atualizar/inalterados",
+                (segunda["arquivar"], segunda["atualizar"], segunda["inalterados"], segunda["erros"]),
+                (canceladas, remarcadas, agendamentos - canceladas - remarcadas, 0)
+            )
+            if segunda["respostas_429"] < forcadas_429:
+                falhas.append(f"429 forçados não chegaram ao cliente: {segunda['respostas_429']} de {forcadas_429}")
+            
+            terceira = _sincronizar(servidor, dry_run=True, concorrencia=concorrencia)
+            relatorios.append(("dry run final", terceira))
+            esperar("nada a fazer", (terceira["criar"], terceira["atualizar"], terceira["arquivar"]), (0, 0, 0))
+            
+            maximo = servidor.max_por_segundo()
+            relatorios.append(("pico", {"requisicoes_em_1s": maximo, "teto_do_limitador": int(taxa + burst)}))
+            if maximo > taxa + burst:
+                falhas.append(f"pico de {maximo} requisições em 1s acima de taxa + burst ({taxa + burst:g})")
+            limite_429 = servidor.calls['429'] - forcadas_429
+            if limite is not None and limite_429:
+                falhas.append(f"{limite_429} respostas 429 pelo limite do servidor")
+        finally:
+            for nome, valor in originais.items():
+                setattr(settings, nome, valor)
+            trello._limitador = limitador
+            trello_sync.SessionLocal = session_local
+            trello.reset_trello_list_cache()
+            engine.dispose()
+    
+    return falhas, relatorios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza milhares de cards contra um Trello local com limite de requisições")
+    parser.add_argument("--agendamentos", type=int, default=2000)
+    parser.add_argument("--taxa", type=float, default=40.0, help="Requisições por segundo do token bucket")
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--limite", type=int, default=100, help="Requisições aceitas pelo servidor por janela")
+    parser.add_argument("--janela", type=float, default=2.0, help="Janela do limite do servidor em segundos")
+    parser.add_argument("--concorrencia", type=int, default=4)
+    args = parser.parse_args()
+    
+    falhas, relatorios = executar(args.agendamentos, args.taxa, args.burst, args.limite, args.janela, args.concorrencia)
+    
+    for titulo, relatorio in relatorios:
+        print(f"{titulo}: " + ", ".join(f"{chave}={valor}" for chave, valor in relatorio.items()))
+    
+    if falhas:
+        for falha in falhas:
+            print(f"  ✗ {falha}")
+        raise SystemExit(1)
+    
+    print(f"OK: {args.agendamentos} agendamentos sincronizados a {args.taxa:g} req/s sem estourar o limite do servidor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import threading
+import time
+import unicodedata
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from database.database import SessionLocal
+from database.models import Especialidade
+from config import get_settings
+
+settings = get_settings()
+
+_catalogo = None
+_catalogo_lock = threading.Lock()
+
+
+def normalizar_nome(texto: str) -> str:
+    decomposto = unicodedata.normalize('NFKD', texto.lower().strip())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def _montar_catalogo(especialidades: list) -> dict:
+    itens = [
+        {
+            "id": esp.id,
+            "nome": esp.nome,
+            "descricao": esp.descricao,
+            "icone": esp.icone
+        }
+        for esp in especialidades
+    ]
+    
+    indice = {}
+    for item in itens:
+        nome = normalizar_nome(item["nome"])
+        for inicio in range(len(nome)):
+            for fim in range(inicio + 1, len(nome) + 1):
+                indice.setdefault(nome[inicio:fim], item)
+    
+    lista_apresentacao = "\n".join(
+        f"   {item['icone']} {item['nome']}" for item in itens
+    )
+    
+    return {
+        "especialidades": itens,
+        "indice": indice,
+        "lista_apresentacao": lista_apresentacao,
+        "apresentacao": f"""Olá! 👋 Bem-vindo(a) à {settings.clinica_nome}!
+
+Oferecemos consultas nas seguintes especialidades:
+{lista_apresentacao}
+
+Como posso ajudar você hoje?""",
+        "carregado_em": time.monotonic()
+    }
+
+
+def get_catalogo() -> dict:
+    global _catalogo
+    
+    catalogo = _catalogo
+    if catalogo and time.monotonic() - catalogo["carregado_em"] < settings.catalogo_ttl_seconds:
+        return catalogo
+    
+    with _catalogo_lock:
+        if _catalogo is None or _catalogo is catalogo:
+            db = SessionLocal()
+            try:
+                _catalogo = _montar_catalogo(db.query(Especialidade).order_by(Especialidade.id).all())
+            finally:
+                db.close()
+        return _catalogo
+
+
+def invalidar_catalogo():
+    global _catalogo
+    
+    with _catalogo_lock:
+        _catalogo = None
+
+
+def buscar_especialidade(nome: str) -> Optional[dict]:
+    return get_catalogo()["indice"].get(normalizar_nome(nome))
+
+
+@event.listens_for(Session, "after_flush")
+def _marcar_catalogo_alterado(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Especialidade):
+            session.info["catalogo_alterado"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(session):
+    if session.info.pop("catalogo_alterado", False):
+        invalidar_catalogo()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_alteracao(session):
+    session.info.pop("catalogo_alterado", None)
@@ -1,33 +1,116 @@
 from datetime import datetime
 from typing import Optional
+from collections import deque
+import json
+import time
+import weakref
+from sqlalchemy import case, or_
 from database.database import SessionLocal
-from database.models import Especialidade, Paciente
+from database.models import Paciente, chave_telefone, normalizar_telefone_e164
+from services.catalogo_service import get_catalogo, buscar_especialidade
+from services.session_store import MemorySessionStore, SQLiteSessionStore
 
-conversations = {}
+
+HISTORY_MAX_MESSAGES = 20
+
+REQUIRED_FIELDS = ("nome", "telefone", "email", "especialidade_id", "data_hora")
+
+
+class Mensagem:
+    
+    __slots__ = ("role", "content", "timestamp")
+    
+    def __init__(self, role: str, content: str, timestamp: float):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+    
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+
+class ConversationData:
+    
+    __slots__ = (
+        "nome",
+        "telefone",
+        "email",
+        "especialidade_id",
+        "especialidade_nome",
+        "data_hora",
+        "intent",
+        "paciente_id",
+        "consulta_remarcar_id",
+        "consulta_cancelar_id",
+        "consultas_disponiveis"
+    )
+    
+    def __init__(self):
+        self.nome: Optional[str] = None
+        self.telefone: Optional[str] = None
+        self.email: Optional[str] = None
+        self.especialidade_id: Optional[int] = None
+        self.especialidade_nome: Optional[str] = None
+        self.data_hora: Optional[str] = None
+        self.intent: Optional[str] = None
+        self.paciente_id: Optional[int] = None
+        self.consulta_remarcar_id: Optional[int] = None
+        self.consulta_cancelar_id: Optional[int] = None
+        self.consultas_disponiveis: Optional[list] = None
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+    
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __setitem__(self, key: str, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+    
+    def get(self, key: str, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+    
+    def keys(self):
+        return self.__slots__
+    
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+    
+    def update(self, values: dict):
+        for key, value in values.items():
+            self[key] = value
 
 
 class ConversationState:
     
+    __slots__ = (
+        "session_id",
+        "step",
+        "data",
+        "last_question",
+        "history",
+        "created_at",
+        "last_interaction",
+        "descartada",
+        "__weakref__"
+    )
+    
     def __init__(self, session_id: str):
-        self.session_id = session_id
-        self.step = "apresentacao"
-        self.data = {
-            "nome": None,
-            "telefone": None,
-            "email": None,
-            "especialidade_id": None,
-            "especialidade_nome": None,
-            "data_hora": None,
-            "intent": None,
-            "paciente_id": None,
-            "consulta_remarcar_id": None,
-            "consulta_cancelar_id": None,
-            "consultas_disponiveis": None
-        }
-        self.last_question = None
-        self.history = []
-        self.created_at = datetime.now()
-        self.last_interaction = datetime.now()
+        agora = time.time()
+        self.session_id: str = session_id
+        self.step: str = "apresentacao"
+        self.data = ConversationData()
+        self.last_question: Optional[str] = None
+        self.history = deque(maxlen=HISTORY_MAX_MESSAGES)
+        self.created_at: float = agora
+        self.last_interaction: float = agora
+        self.descartada: bool = False
     
     def update(self, **kwargs):
         for key, value in kwargs.items():
@@ -35,108 +118,213 @@ class ConversationState:
                 self.data[key] = value
             elif key == 'last_question':
                 self.last_question = value
-        self.last_interaction = datetime.now()
+        self.last_interaction = time.time()
     
     def add_message(self, role: str, content: str):
-        self.history.append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        if len(self.history) > 20:
-            self.history = self.history[-20:]
-        self.last_interaction = datetime.now()
+        agora = time.time()
+        self.history.append(Mensagem(role, content, agora))
+        self.last_interaction = agora
     
     def is_complete(self) -> bool:
-        required = ["nome", "telefone", "email", "especialidade_id", "data_hora"]
-        return all(self.data.get(field) for field in required)
+        return all(self.data.get(field) for field in REQUIRED_FIELDS)
     
     def get_missing_fields(self) -> list:
-        required = ["nome", "telefone", "email", "especialidade_id", "data_hora"]
-        return [field for field in required if not self.data.get(field)]
+        return [field for field in REQUIRED_FIELDS if not self.data.get(field)]
+    
+    def to_dict(self) -> dict:
+        return {
+            "s": self.session_id,
+            "st": self.step,
+            "d": {key: value for key, value in self.data.items() if value is not None},
+            "q": self.last_question,
+            "h": [[msg.role, msg.content, msg.timestamp] for msg in self.history],
+            "c": self.created_at,
+            "l": self.last_interaction
+        }
+    
+    @classmethod
+    def from_dict(cls, payload: dict) -> "ConversationState":
+        state = cls(payload["s"])
+        state.step = payload["st"]
+        state.data.update(payload["d"])
+        state.last_question = payload["q"]
+        
+        for role, content, timestamp in payload["h"]:
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp).timestamp()
+            state.history.append(Mensagem(role, content, timestamp))
+        
+        state.created_at = payload["c"]
+        state.last_interaction = payload["l"]
+        return state
 
 
-def get_or_create_conversation(session_id: str) -> ConversationState:
-    if session_id not in conversations:
-        conversations[session_id] = ConversationState(session_id)
-    return conversations[session_id]
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
 
 
-def reset_conversation(session_id: str):
-    if session_id in conversations:
-        del conversations[session_id]
+def _json_object_hook(obj: dict):
+    if len(obj) == 1 and "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    return obj
 
 
-def get_apresentacao() -> str:
+def serialize_conversation(state: ConversationState) -> str:
+    return json.dumps(
+        state.to_dict(),
+        default=_json_default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+
+def deserialize_conversation(payload: str) -> ConversationState:
+    return ConversationState.from_dict(json.loads(payload, object_hook=_json_object_hook))
+
+
+def create_session_store():
     from config import get_settings
     settings = get_settings()
     
-    db = SessionLocal()
-    try:
-        especialidades = db.query(Especialidade).all()
-        
-        lista_especialidades = "\n".join([
-            f"   {esp.icone} {esp.nome}" for esp in especialidades
-        ])
-        
-        mensagem = f"""Olá! 👋 Bem-vindo(a) à {settings.clinica_nome}!
+    if settings.conversation_store == "sqlite":
+        return SQLiteSessionStore(
+            settings.conversation_store_path,
+            serialize=serialize_conversation,
+            deserialize=deserialize_conversation,
+            ttl_seconds=settings.conversation_ttl_seconds
+        )
+    
+    return MemorySessionStore(
+        max_sessions=settings.conversation_max_sessions,
+        ttl_seconds=settings.conversation_ttl_seconds,
+        measure=lambda state: len(serialize_conversation(state).encode())
+    )
 
-Oferecemos consultas nas seguintes especialidades:
-{lista_especialidades}
 
-Como posso ajudar você hoje?"""
-        
-        return mensagem
-    finally:
-        db.close()
+session_store = create_session_store()
+_conversas_ativas = weakref.WeakValueDictionary()
+
+
+def get_or_create_conversation(session_id: str) -> ConversationState:
+    conversation = _conversas_ativas.get(session_id)
+    if conversation is not None and time.time() - conversation.last_interaction > session_store.ttl_seconds:
+        conversation.descartada = True
+        _conversas_ativas.pop(session_id, None)
+        session_store.delete(session_id)
+        conversation = None
+    if conversation is None:
+        conversation = session_store.get(session_id)
+    if conversation is None:
+        conversation = ConversationState(session_id)
+        session_store.save(session_id, conversation, conversation.last_interaction)
+    _conversas_ativas[session_id] = conversation
+    return conversation
+
+
+def save_conversation(conversation: ConversationState):
+    if conversation.descartada:
+        return
+    session_store.save(
+        conversation.session_id,
+        conversation,
+        conversation.last_interaction
+    )
+
+
+def reset_conversation(session_id: str):
+    conversation = _conversas_ativas.pop(session_id, None)
+    if conversation is not None:
+        conversation.descartada = True
+    session_store.delete(session_id)
+
+
+def get_session_store_stats() -> dict:
+    return session_store.stats()
+
+
+def get_apresentacao() -> str:
+    return get_catalogo()["apresentacao"]
 
 
 def get_especialidade_by_name(nome: str) -> Optional[dict]:
-    db = SessionLocal()
-    try:
-        especialidades = db.query(Especialidade).all()
-        
-        nome_lower = nome.lower()
-        for esp in especialidades:
-            if nome_lower in esp.nome.lower():
-                return {
-                    "id": esp.id,
-                    "nome": esp.nome,
-                    "icone": esp.icone
-                }
+    esp = buscar_especialidade(nome)
+    if not esp:
         return None
-    finally:
-        db.close()
+    
+    return {
+        "id": esp["id"],
+        "nome": esp["nome"],
+        "icone": esp["icone"]
+    }
 
 
 def get_all_especialidades() -> list:
-    db = SessionLocal()
-    try:
-        especialidades = db.query(Especialidade).all()
-        return [
-            {"id": esp.id, "nome": esp.nome, "icone": esp.icone}
-            for esp in especialidades
-        ]
-    finally:
-        db.close()
-        
+    return [
+        {"id": esp["id"], "nome": esp["nome"], "icone": esp["icone"]}
+        for esp in get_catalogo()["especialidades"]
+    ]
+
+
+def find_paciente_by_telefone(db, telefone: str) -> Optional[Paciente]:
+    chave = chave_telefone(telefone)
+    if not chave:
+        return None
+    
+    candidatos = db.query(Paciente).filter(Paciente.telefone_chave == chave).all()
+    return escolher_paciente(candidatos, telefone)
+
+
+def subconsulta_paciente_id(db, telefone: str):
+    chave = chave_telefone(telefone)
+    if not chave:
+        return None
+    
+    e164 = normalizar_telefone_e164(telefone)
+    sufixo = ''.join(filter(str.isdigit, telefone))[-9:]
+    
+    correspondencias = [Paciente.telefone_e164 == e164]
+    if len(sufixo) == 9:
+        correspondencias.append(Paciente.telefone_e164.like(f"%{sufixo}"))
+    
+    return db.query(Paciente.id).filter(
+        Paciente.telefone_chave == chave,
+        or_(*correspondencias)
+    ).order_by(
+        case((Paciente.telefone_e164 == e164, 0), else_=1),
+        Paciente.id
+    ).limit(1).scalar_subquery()
+
+
+def escolher_paciente(candidatos: list, telefone: str) -> Optional[Paciente]:
+    e164 = normalizar_telefone_e164(telefone)
+    telefone_limpo = ''.join(filter(str.isdigit, telefone))
+    
+    for paciente in candidatos:
+        if paciente.telefone_e164 == e164:
+            return paciente
+    
+    for paciente in candidatos:
+        if paciente.telefone_e164 and paciente.telefone_e164[-9:] == telefone_limpo[-9:]:
+            return paciente
+    
+    return None
+
 
 def get_paciente_by_telefone(telefone: str) -> Optional[dict]:
     db = SessionLocal()
     try:
-        telefone_limpo = ''.join(filter(str.isdigit, telefone))
-        todos_pacientes = db.query(Paciente).all()
+        paciente = find_paciente_by_telefone(db, telefone)
         
-        for paciente in todos_pacientes:
-            tel_banco_limpo = ''.join(filter(str.isdigit, paciente.telefone))
-            if telefone_limpo[-9:] == tel_banco_limpo[-9:]:
-                return {
-                    "id": paciente.id,
-                    "nome": paciente.nome,
-                    "telefone": paciente.telefone,
-                    "email": paciente.email
-                }
+        if not paciente:
+            return None
         
-        return None
+        return {
+            "id": paciente.id,
+            "nome": paciente.nome,
+            "telefone": paciente.telefone,
+            "email": paciente.email
+        }
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
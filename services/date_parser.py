@@ -0,0 +1,283 @@
+import re
+from datetime import datetime, timedelta, time
+
+MESES = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'marco': 3,
+    'abril': 4, 'maio': 5, 'junho': 6,
+    'julho': 7, 'agosto': 8, 'setembro': 9,
+    'outubro': 10, 'novembro': 11, 'dezembro': 12
+}
+
+DIAS_SEMANA = {
+    'segunda': 0,
+    'terça': 1, 'terca': 1,
+    'quarta': 2,
+    'quinta': 3,
+    'sexta': 4,
+    'sábado': 5, 'sabado': 5,
+    'domingo': 6
+}
+
+DIAS_ABREVIADOS = {
+    'seg': 0, 'ter': 1, 'qua': 2, 'qui': 3, 'sex': 4, 'sab': 5, 'sáb': 5, 'dom': 6
+}
+
+PERIODOS = {'manhã': 0, 'manha': 0, 'tarde': 12, 'noite': 12}
+
+PALAVRAS_NEUTRAS = {
+    'pode', 'ser', 'pra', 'para', 'na', 'no', 'dia', 'de', 'do', 'da', 'às', 'as',
+    'a', 'o', 'e', 'então', 'entao', 'por', 'favor', 'melhor', 'que', 'tal',
+    'umas', 'uns', 'lá', 'la', 'pelas', 'feira', 'quero', 'prefiro'
+}
+
+
+def _alternativas(palavras) -> str:
+    return '|'.join(sorted(palavras, key=len, reverse=True))
+
+
+_MES = r'(?P<mes>' + _alternativas(MESES) + r')'
+_HORA = (
+    r'(?P<{h}>\d{{1,2}})(?:\s*(?::|h(?!ora))\s*(?P<{m}>\d{{2}})?)?(?:\s*(?:horas?|hs|h))?'
+    r'(?:\s+da\s+(?P<{p}>manhã|manha|tarde|noite))?'
+)
+
+REGEX_DATA_NUMERICA = re.compile(r'\b(?P<dia>\d{1,2})/(?P<mes>\d{1,2})(?:/(?P<ano>\d{2,4}))?\b')
+REGEX_DATA_EXTENSO = re.compile(r'\b(?:dia\s+)?(?P<dia>\d{1,2})\s+de\s+' + _MES + r'\b')
+REGEX_DIA_DO_MES = re.compile(r'\bdia\s+(?P<dia>\d{1,2})\b')
+REGEX_RELATIVO = re.compile(r'\b(?P<rel>depois de amanh[ãa]|amanh[ãa]|hoje|hj)\b')
+REGEX_DAQUI = re.compile(r'\bdaqui a\s+(?P<n>\d{1,2})\s+dias?\b')
+REGEX_DIA_SEMANA = re.compile(
+    r'\b(?:(?:pr[óo]xim[ao]|essa|esta)\s+)?(?P<dia>' + _alternativas(DIAS_SEMANA) + r')(?:[- ]feira)?\b'
+)
+REGEX_DIA_ABREVIADO = re.compile(r'\b(?P<dia>' + _alternativas(DIAS_ABREVIADOS) + r')\b')
+REGEX_MES = re.compile(r'\b' + _MES + r'\b')
+REGEX_INTERVALO = re.compile(
+    r'\b(?:entre|das?)\s+'
+    + _HORA.format(h='h1', m='m1', p='p1')
+    + r'\s+(?:e|até|ate|às|as|a)\s+'
+    + _HORA.format(h='h2', m='m2', p='p2')
+)
+REGEX_HORA = re.compile(
+    r'(?:\b(?:[àa]s|umas|pelas)\s+' + _HORA.format(h='h1', m='m1', p='p1') + r'(?!\d)'
+    r'|\b(?P<h2>\d{1,2})\s*(?:(?:h|:)\s*(?P<m2>\d{2})|horas?|hs|h)(?:\s+da\s+(?P<p2>manhã|manha|tarde|noite))?(?!\d)'
+    r'|\b(?P<h3>\d{1,2})\s+da\s+(?P<p3>manhã|manha|tarde|noite))'
+)
+REGEX_PALAVRA = re.compile(r'\w+')
+
+
+def _hora(hora: str, minuto: str = None, periodo: str = None):
+    h = int(hora)
+    m = int(minuto or 0)
+    
+    if periodo and PERIODOS.get(periodo) and h < 12:
+        h += PERIODOS[periodo]
+    
+    if h > 23 or m > 59:
+        return None
+    return time(h, m)
+
+
+def _proximo_dia_semana(hoje: datetime, weekday: int) -> datetime:
+    dias_ate = (weekday - hoje.weekday()) % 7
+    if dias_ate == 0:
+        dias_ate = 7
+    return hoje + timedelta(days=dias_ate)
+
+
+def _data(ano: int, mes: int, dia: int):
+    try:
+        return datetime(ano, mes, dia)
+    except ValueError:
+        return None
+
+
+def _proxima_data(hoje: datetime, mes: int, dia: int):
+    data = _data(hoje.year, mes, dia)
+    if data and data.date() < hoje.date():
+        data = _data(hoje.year + 1, mes, dia)
+    return data
+
+
+def _extrair_data(texto: str, hoje: datetime):
+    match = REGEX_DATA_NUMERICA.search(texto)
+    if match:
+        dia, mes = int(match.group('dia')), int(match.group('mes'))
+        if match.group('ano'):
+            ano = int(match.group('ano'))
+            if ano < 100:
+                ano += 2000
+            return _data(ano, mes, dia), match.span()
+        return _proxima_data(hoje, mes, dia), match.span()
+    
+    match = REGEX_DATA_EXTENSO.search(texto)
+    if match:
+        return _proxima_data(hoje, MESES[match.group('mes')], int(match.group('dia'))), match.span()
+    
+    match = REGEX_RELATIVO.search(texto)
+    if match:
+        rel = match.group('rel')
+        if rel.startswith('depois'):
+            return hoje + timedelta(days=2), match.span()
+        if rel.startswith('amanh'):
+            return hoje + timedelta(days=1), match.span()
+        return hoje, match.span()
+    
+    match = REGEX_DAQUI.search(texto)
+    if match:
+        return hoje + timedelta(days=int(match.group('n'))), match.span()
+    
+    match = REGEX_DIA_SEMANA.search(texto)
+    if match:
+        return _proximo_dia_semana(hoje, DIAS_SEMANA[match.group('dia')]), match.span()
+    
+    match = REGEX_DIA_DO_MES.search(texto)
+    if match:
+        dia = int(match.group('dia'))
+        data = _data(hoje.year, hoje.month, dia)
+        if data is None or data.date() < hoje.date():
+            proximo_mes = (hoje.replace(day=1) + timedelta(days=32)).replace(day=1)
+            data = _data(proximo_mes.year, proximo_mes.month, dia)
+        return data, match.span()
+    
+    return None, None
+
+
+def _extrair_hora(texto: str):
+    match = REGEX_INTERVALO.search(texto)
+    if match:
+        fim = _hora(match.group('h2'), match.group('m2'), match.group('p2') or match.group('p1'))
+        inicio = _hora(match.group('h1'), match.group('m1'), match.group('p1') or match.group('p2'))
+        if inicio and fim and inicio > fim:
+            inicio = _hora(match.group('h1'), match.group('m1'), match.group('p1'))
+        if inicio and fim:
+            return inicio, fim, match.span()
+    
+    match = REGEX_HORA.search(texto)
+    if match:
+        for h, m, p in (('h1', 'm1', 'p1'), ('h2', 'm2', 'p2'), ('h3', None, 'p3')):
+            if match.group(h):
+                hora = _hora(match.group(h), match.group(m) if m else None, match.group(p))
+                if hora:
+                    return hora, None, match.span()
+    
+    return None, None, None
+
+
+def detectar_mes(texto: str, now: datetime = None):
+    match = REGEX_MES.search(texto.lower())
+    if not match:
+        return None
+    
+    if now is None:
+        now = datetime.now()
+    
+    nome_mes = match.group('mes')
+    numero = MESES[nome_mes]
+    ano = now.year
+    if numero < now.month:
+        ano += 1
+    
+    return {
+        'mes_nome': nome_mes.capitalize(),
+        'mes_numero': numero,
+        'ano': ano
+    }
+
+
+def parse_data_hora(texto: str, now: datetime = None):
+    if now is None:
+        now = datetime.now()
+    
+    texto = texto.lower()
+    hoje = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    hora, hora_fim, span_hora = _extrair_hora(texto)
+    texto_sem_hora = texto
+    if span_hora:
+        texto_sem_hora = texto[:span_hora[0]] + ' ' + texto[span_hora[1]:]
+    
+    data, span_data = _extrair_data(texto_sem_hora, hoje)
+    abreviado = None
+    if not span_data:
+        match = REGEX_DIA_ABREVIADO.search(texto_sem_hora)
+        if match:
+            abreviado = match.group('dia')
+            data, span_data = _proximo_dia_semana(hoje, DIAS_ABREVIADOS[abreviado]), match.span()
+    
+    mes = None
+    if not span_data:
+        mes = detectar_mes(texto_sem_hora, now)
+    
+    if not span_data and not span_hora and not mes:
+        return None
+    
+    resto = texto_sem_hora
+    if span_data:
+        resto = resto[:span_data[0]] + ' ' + resto[span_data[1]:]
+    if mes:
+        resto = REGEX_MES.sub(' ', resto, count=1)
+    
+    palavras_restantes = [
+        palavra for palavra in REGEX_PALAVRA.findall(resto)
+        if palavra not in PALAVRAS_NEUTRAS
+    ]
+    
+    if abreviado and palavras_restantes:
+        if not span_hora and not mes:
+            return None
+        data = None
+        palavras_restantes.append(abreviado)
+    
+    start_datetime = None
+    end_datetime = None
+    if data:
+        inicio = datetime.combine(data.date(), hora or time(0, 0))
+        start_datetime = inicio.strftime('%Y-%m-%dT%H:%M:%S')
+        if hora_fim:
+            end_datetime = datetime.combine(data.date(), hora_fim).strftime('%Y-%m-%dT%H:%M:%S')
+    
+    return {
+        'data': data.date() if data else None,
+        'hora': hora,
+        'hora_fim': hora_fim,
+        'mes': mes,
+        'start_datetime': start_datetime,
+        'end_datetime': end_datetime,
+        'completo': not palavras_restantes
+    }
+
+
+def aplicar_data_local(extracted: dict, mensagem: str, now: datetime = None):
+    data_hora = parse_data_hora(mensagem, now)
+    if not data_hora:
+        return
+    
+    if not data_hora['completo']:
+        if data_hora['start_datetime'] and not extracted.get('start_datetime'):
+            extracted['start_datetime'] = data_hora['start_datetime']
+        return
+    
+    if data_hora['start_datetime']:
+        extracted['start_datetime'] = data_hora['start_datetime']
+        return
+    
+    if data_hora['hora'] and extracted.get('start_datetime'):
+        try:
+            data_llm = datetime.fromisoformat(extracted['start_datetime'])
+        except (TypeError, ValueError):
+            return
+        extracted['start_datetime'] = datetime.combine(
+            data_llm.date(), data_hora['hora']
+        ).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def tem_horario(start_datetime: str) -> bool:
+    if not start_datetime:
+        return False
+    
+    try:
+        data_hora = datetime.fromisoformat(start_datetime)
+    except (TypeError, ValueError):
+        return False
+    
+    return data_hora.hour != 0 or data_hora.minute != 0
@@ -0,0 +1,252 @@
+import argparse
+import itertools
+from datetime import datetime, timedelta, time
+import httplib2
+from googleapiclient.errors import HttpError
+import services.google_calendar_service as calendar
+
+
+def _http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({'status': status}), b'')
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+class _Request:
+    
+    def __init__(self, run):
+        self._run = run
+    
+    def execute(self):
+        return self._run()
+
+
+class _Batch:
+    
+    def __init__(self, callback):
+        self._callback = callback
+        self._requests = []
+    
+    def add(self, request, request_id: str = None):
+        self._requests.append((request_id, request))
+    
+    def execute(self):
+        for request_id, request in self._requests:
+            try:
+                response = request.execute()
+            except HttpError as e:
+                self._callback(request_id, None, e)
+            else:
+                self._callback(request_id, response, None)
+
+
+class _Events:
+    
+    def __init__(self, service):
+        self._service = service
+    
+    def list(self, calendarId=None, singleEvents=True, pageToken=None, timeMin=None, timeMax=None, syncToken=None, showDeleted=False):
+        return _Request(lambda: self._service._list(pageToken, timeMin, timeMax, syncToken, showDeleted))
+    
+    def insert(self, calendarId=None, body=None, sendUpdates=None):
+        return _Request(lambda: self._service._insert(body))
+    
+    def get(self, calendarId=None, eventId=None):
+        return _Request(lambda: self._service._get(eventId))
+    
+    def patch(self, calendarId=None, eventId=None, body=None):
+        return _Request(lambda: self._service._patch(eventId, body))
+    
+    def delete(self, calendarId=None, eventId=None):
+        return _Request(lambda: self._service._delete(eventId))
+
+
+class _CalendarList:
+    
+    def get(self, calendarId=None):
+        return _Request(lambda: {'id': calendarId, 'summary': 'Agenda de teste', 'timeZone': 'America/Sao_Paulo'})
+
+
+class FakeCalendarService:
+    
+    def __init__(self, page_size: int = 250):
+        self.page_size = page_size
+        self.events_by_id = {}
+        self.calls = {'list': 0, 'insert': 0, 'get': 0, 'patch': 0, 'delete': 0}
+        self._changed_at = {}
+        self._version = 0
+        self._valid_since = 0
+        self._ids = itertools.count(1)
+    
+    def events(self):
+        return _Events(self)
+    
+    def calendarList(self):
+        return _CalendarList()
+    
+    def new_batch_http_request(self, callback=None):
+        return _Batch(callback)
+    
+    def add_event(self, start: datetime, end: datetime, summary: str = 'Ocupado') -> str:
+        return self._insert(calendar.build_event_body(summary, start, end), count=False)['id']
+    
+    def cancel_event(self, event_id: str):
+        self._store({**self.events_by_id[event_id], 'status': 'cancelled'})
+    
+    def expire_sync_tokens(self):
+        self._valid_since = self._version + 1
+    
+    def _store(self, event: dict) -> dict:
+        self._version += 1
+        self.events_by_id[event['id']] = event
+        self._changed_at[event['id']] = self._version
+        return dict(event)
+    
+    def _active(self, event_id: str) -> dict:
+        event = self.events_by_id.get(event_id)
+        if event is None:
+            raise _http_error(404)
+        if event['status'] == 'cancelled':
+            raise _http_error(410)
+        return event
+    
+    def _list(self, page_token, time_min, time_max, sync_token, show_deleted) -> dict:
+        self.calls['list'] += 1
+        
+        if sync_token is not None:
+            if time_min is not None or time_max is not None:
+                raise _http_error(400)
+            since = int(sync_token)
+            if since < self._valid_since:
+                raise _http_error(410)
+            items = [event for event_id, event in self.events_by_id.items() if self._changed_at[event_id] > since]
+        else:
+            items = [
+                event for event in self.events_by_id.values()
+                if (show_deleted or event['status'] != 'cancelled')
+                and (time_min is None or _parse_datetime(event['end'].get('dateTime', event['end'].get('date'))) > _parse_datetime(time_min))
+                and (time_max is None or _parse_datetime(event['start'].get('dateTime', event['start'].get('date'))) < _parse_datetime(time_max))
+            ]
+        
+        items.sort(key=lambda event: self._changed_at[event['id']])
+        offset = int(page_token or 0)
+        result = {'items': [dict(event) for event in items[offset:offset + self.page_size]]}
+        
+        if offset + self.page_size < len(items):
+            result['nextPageToken'] = str(offset + self.page_size)
+        else:
+            result['nextSyncToken'] = str(self._version)
+        return result
+    
+    def _insert(self, body: dict, count: bool = True) -> dict:
+        if count:
+            self.calls['insert'] += 1
+        
+        event_id = body.get('id') or f"evento{next(self._ids)}"
+        if event_id in self.events_by_id and self.events_by_id[event_id]['status'] != 'cancelled':
+            raise _http_error(409)
+        
+        return self._store({
+            **body,
+            'id': event_id,
+            'status': 'confirmed',
+            'htmlLink': f"https://calendar.google.com/event?eid={event_id}",
+            'created': datetime.now().isoformat()
+        })
+    
+    def _get(self, event_id: str) -> dict:
+        self.calls['get'] += 1
+        if event_id not in self.events_by_id:
+            raise _http_error(404)
+        return dict(self.events_by_id[event_id])
+    
+    def _patch(self, event_id: str, body: dict) -> dict:
+        self.calls['patch'] += 1
+        return self._store({**self._active(event_id), **body})
+    
+    def _delete(self, event_id: str) -> str:
+        self.calls['delete'] += 1
+        self._store({**self._active(event_id), 'status': 'cancelled'})
+        return ''
+
+
+def verificar() -> list:
+    falhas = []
+    service = FakeCalendarService(page_size=2)
+    get_calendar_service = calendar.get_calendar_service
+    calendar.get_calendar_service = lambda: service
+    calendar.reset_busy_times_cache()
+    
+    hoje = datetime.combine(datetime.now().date(), time(0, 0))
+    fim = hoje + timedelta(days=30)
+    
+    def ocupados() -> list:
+        return sorted(busy['start'].replace(tzinfo=None) for busy in calendar.get_busy_times(hoje, fim))
+    
+    def esperar(descricao: str, obtido, esperado):
+        if obtido != esperado:
+            falhas.append(f"{descricao}: esperado {esperado}, obtido {obtido}")
+    
+    try:
+        ontem = hoje - timedelta(days=1) + timedelta(hours=9)
+        amanha = hoje + timedelta(days=1, hours=9)
+        service.add_event(ontem, ontem + timedelta(hours=1))
+        externos = [service.add_event(amanha + timedelta(hours=indice), amanha + timedelta(hours=indice, minutes=30)) for indice in range(3)]
+        
+        esperar("sincronização completa", ocupados(), [amanha + timedelta(hours=indice) for indice in range(3)])
+        esperar("listagens paginadas", service.calls['list'], 2)
+        
+        ocupados()
+        esperar("cache dentro do TTL", service.calls['list'], 2)
+        
+        service.cancel_event(externos[0])
+        calendar.invalidate_busy_times()
+        esperar("exclusão externa por delta", ocupados(), [amanha + timedelta(hours=1), amanha + timedelta(hours=2)])
+        
+        criado = calendar.create_calendar_event("Consulta", amanha + timedelta(hours=5), amanha + timedelta(hours=6))
+        esperar("evento criado visível", amanha + timedelta(hours=5) in ocupados(), True)
+        
+        calendar.update_calendar_event(criado['event_id'], amanha + timedelta(hours=6), amanha + timedelta(hours=7))
+        esperar("evento remarcado visível", amanha + timedelta(hours=6) in ocupados(), True)
+        
+        calendar.delete_calendar_event(criado['event_id'])
+        esperar("evento excluído removido", ocupados(), [amanha + timedelta(hours=1), amanha + timedelta(hours=2)])
+        
+        service.expire_sync_tokens()
+        service.add_event(amanha + timedelta(hours=8), amanha + timedelta(hours=9))
+        calendar.invalidate_busy_times()
+        esperar("token expirado (410)", ocupados(), [amanha + timedelta(hours=1), amanha + timedelta(hours=2), amanha + timedelta(hours=8)])
+        
+        distante = hoje + calendar.BOOKING_WINDOW + timedelta(days=10)
+        service.add_event(distante, distante + timedelta(hours=1))
+        calendar.reset_busy_times_cache()
+        ocupados()
+        esperar("full sync limitado à janela", len(calendar._busy_cache['events']), 3)
+        
+        service.add_event(distante + timedelta(days=1), distante + timedelta(days=1, hours=1))
+        calendar.sync_busy_times(amanha + timedelta(hours=2))
+        esperar("eventos encerrados e fora da janela descartados", len(calendar._busy_cache['events']), 2)
+    finally:
+        calendar.get_calendar_service = get_calendar_service
+        calendar.reset_busy_times_cache()
+    
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exercita o cache de horários ocupados contra um Google Calendar falso")
+    parser.parse_args()
+    
+    falhas = verificar()
+    if falhas:
+        for falha in falhas:
+            print(f"  ✗ {falha}")
+        raise SystemExit(1)
+    
+    print("OK: sincronização completa, deltas, escritas próprias, token expirado, janela de sincronização e descarte de eventos fora dela")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _responder(self, status: int, corpo=None, headers: dict = None):
+        dados = json.dumps(corpo).encode() if corpo is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+    
+    def _tratar(self, metodo: str):
+        url = urlparse(self.path)
+        params = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        status, corpo, headers = self.server.trello.atender(metodo, url.path.strip('/').split('/'), params)
+        self._responder(status, corpo, headers)
+    
+    def do_GET(self):
+        self._tratar('GET')
+    
+    def do_POST(self):
+        self._tratar('POST')
+    
+    def do_PUT(self):
+        self._tratar('PUT')
+
+
+class FakeTrelloServer:
+    
+    def __init__(self, list_id: str = 'lista', board_id: str = 'board', limite: int = None, janela: float = 10.0):
+        self.list_id = list_id
+        self.board_id = board_id
+        self.limite = limite
+        self.janela = janela
+        self.cards = {}
+        self.calls = {'GET': 0, 'POST': 0, 'PUT': 0, 'falhas': 0, '429': 0}
+        self.instantes = []
+        self._aceitas = deque()
+        self._falhas_restantes = 0
+        self._status_falha = 500
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, porta = self._server.server_address[:2]
+        return f"http://{host}:{porta}"
+    
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.trello = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-trello", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def falhar(self, vezes: int, status: int = 500):
+        with self._lock:
+            self._falhas_restantes = vezes
+            self._status_falha = status
+    
+    def cards_abertos(self) -> list:
+        with self._lock:
+            return [dict(card) for card in self.cards.values() if not card['closed']]
+    
+    def max_por_segundo(self) -> int:
+        with self._lock:
+            instantes = sorted(self.instantes)
+        maximo = inicio = 0
+        for fim, instante in enumerate(instantes):
+            while instante - instantes[inicio] >= 1.0:
+                inicio += 1
+            maximo = max(maximo, fim - inicio + 1)
+        return maximo
+    
+    def _headers_limite(self) -> dict:
+        return {
+            'x-rate-limit-api-token-interval-ms': str(int(self.janela * 1000)),
+            'x-rate-limit-api-token-max': str(self.limite),
+            'x-rate-limit-api-token-remaining': str(max(self.limite - len(self._aceitas), 0))
+        }
+    
+    def atender(self, metodo: str, partes: list, params: dict):
+        agora = time.monotonic()
+        with self._lock:
+            self.calls[metodo] += 1
+            self.instantes.append(agora)
+            
+            if self._falhas_restantes > 0:
+                self._falhas_restantes -= 1
+                if self._status_falha == 429:
+                    self.calls['429'] += 1
+                    return 429, {'message': 'API_TOKEN_LIMIT_EXCEEDED'}, {'Retry-After': '0.05'}
+                self.calls['falhas'] += 1
+                return self._status_falha, {'message': 'falha simulada'}, None
+            
+            headers = None
+            if self.limite is not None:
+                while self._aceitas and agora - self._aceitas[0] >= self.janela:
+                    self._aceitas.popleft()
+                if len(self._aceitas) >= self.limite:
+                    self.calls['429'] += 1
+                    return 429, {'message': 'API_TOKEN_LIMIT_EXCEEDED'}, self._headers_limite()
+                self._aceitas.append(agora)
+                headers = self._headers_limite()
+            
+            status, corpo = self._rota(metodo, partes, params)
+            return status, corpo, headers
+    
+    def _rota(self, metodo: str, partes: list, params: dict):
+        if metodo == 'GET' and partes == ['lists', self.list_id]:
+            return 200, {'id': self.list_id, 'name': 'Consultas', 'idBoard': self.board_id}
+        
+        if metodo == 'GET' and partes == ['lists', self.list_id, 'cards']:
+            return 200, [dict(card) for card in self.cards.values() if not card['closed']]
+        
+        if metodo == 'GET' and partes == ['boards', self.board_id]:
+            return 200, {'id': self.board_id, 'name': 'Clínica'}
+        
+        if metodo == 'GET' and partes == ['boards', self.board_id, 'lists']:
+            return 200, [{'id': self.list_id, 'name': 'Consultas'}]
+        
+        if metodo == 'POST' and partes == ['cards']:
+            if params.get('idList') != self.list_id:
+                return 400, {'message': 'invalid value for idList'}
+            card_id = f"card{next(self._ids)}"
+            self.cards[card_id] = {
+                'id': card_id,
+                'name': params.get('name'),
+                'desc': params.get('desc', ''),
+                'due': params.get('due'),
+                'url': f"https://trello.com/c/{card_id}",
+                'closed': False
+            }
+            return 200, dict(self.cards[card_id])
+        
+        if metodo == 'PUT' and len(partes) == 2 and partes[0] == 'cards':
+            card = self.cards.get(partes[1])
+            if card is None:
+                return 404, {'message': 'card not found'}
+            for campo in ('name', 'desc', 'due'):
+                if campo in params:
+                    card[campo] = params[campo]
+            if 'closed' in params:
+                card['closed'] = params['closed'] == 'true'
+            return 200, dict(card)
+        
+        return 404, {'message': 'not found'}
@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import get_settings
+
+settings = get_settings()
+
+ARQUIVO_FAQ = "faq.json"
+ARQUIVO_FAQ_VETORES = "faq_vetores.npy"
+
+TOPICOS = [
+    {
+        "id": "valores",
+        "pergunta": "Quanto custa uma consulta?",
+        "variantes": ["Qual o valor da consulta?", "Qual o preço da consulta particular?", "Quanto é a consulta?"]
+    },
+    {
+        "id": "valores_odontologia",
+        "pergunta": "Quanto custa a consulta com dentista?",
+        "variantes": ["Qual o valor da consulta odontológica?", "Quanto custa uma limpeza nos dentes?"]
+    },
+    {
+        "id": "valores_oftalmologia",
+        "pergunta": "Quanto custa a consulta com oftalmologista?",
+        "variantes": ["Qual o valor da consulta de oftalmologia?", "Quanto custa o exame de vista?"]
+    },
+    {
+        "id": "valores_cardiologia",
+        "pergunta": "Quanto custa a consulta com cardiologista?",
+        "variantes": ["Qual o valor da consulta de cardiologia?", "Quanto custa um eletrocardiograma?"]
+    },
+    {
+        "id": "horario",
+        "pergunta": "Qual o horário de funcionamento da clínica?",
+        "variantes": ["Que horas vocês abrem?", "Vocês abrem no sábado?", "Até que horas a clínica funciona?"]
+    },
+    {
+        "id": "convenios",
+        "pergunta": "Quais convênios vocês aceitam?",
+        "variantes": ["Vocês aceitam plano de saúde?", "Atendem por convênio?", "Quais planos são aceitos?"]
+    },
+    {
+        "id": "especialidades",
+        "pergunta": "Quais especialidades a clínica atende?",
+        "variantes": ["Que tipos de médico vocês têm?", "Quais são as especialidades disponíveis?"]
+    },
+    {
+        "id": "endereco",
+        "pergunta": "Qual o endereço da clínica?",
+        "variantes": ["Onde fica a clínica?", "Como chego na clínica?"]
+    },
+    {
+        "id": "pagamento",
+        "pergunta": "Quais as formas de pagamento?",
+        "variantes": ["Aceitam cartão de crédito?", "Posso pagar com pix?", "Dá pra parcelar?"]
+    },
+    {
+        "id": "cancelamento",
+        "pergunta": "Como funciona o cancelamento de consulta?",
+        "variantes": ["Posso cancelar minha consulta?", "Tem taxa para cancelar?"]
+    }
+]
+
+_faq = None
+_faq_lock = threading.Lock()
+_faq_stats = {
+    "consultas": 0,
+    "hits_exatos": 0,
+    "hits_semanticos": 0,
+    "misses": 0,
+    "sem_embedding": 0,
+    "indisponivel": 0
+}
+_latencias_hit = deque(maxlen=1000)
+_latencias_miss = deque(maxlen=1000)
+
+
+def _normalizar_matriz(vetores) -> np.ndarray:
+    matriz = np.array(vetores, dtype=np.float32)
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    return matriz / np.where(normas == 0, 1, normas)
+
+
+def _mtime_faq(diretorio: str) -> int:
+    try:
+        return os.stat(os.path.join(diretorio, ARQUIVO_FAQ)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def carregar_faq(diretorio: str, assinatura: str) -> dict:
+    mtime = _mtime_faq(diretorio)
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_FAQ), encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        matriz = np.load(os.path.join(diretorio, ARQUIVO_FAQ_VETORES))
+    except (FileNotFoundError, ValueError):
+        return {"assinatura": assinatura, "mtime": mtime, "itens": [], "disponivel": False}
+    
+    if dados["assinatura"] != assinatura or not dados["itens"]:
+        return {"assinatura": assinatura, "mtime": mtime, "itens": [], "disponivel": False}
+    
+    return {
+        "assinatura": assinatura,
+        "mtime": mtime,
+        "itens": dados["itens"],
+        "dono": dados["dono"],
+        "exatos": dados["exatos"],
+        "matriz": matriz,
+        "gerado_em": dados.get("gerado_em"),
+        "disponivel": True
+    }
+
+
+def _get_faq(diretorio: str, assinatura: str) -> dict:
+    global _faq
+    
+    mtime = _mtime_faq(diretorio)
+    faq = _faq
+    if faq is not None and faq["assinatura"] == assinatura and faq["mtime"] == mtime:
+        return faq
+    
+    with _faq_lock:
+        if _faq is None or _faq["assinatura"] != assinatura or _faq["mtime"] != mtime:
+            _faq = carregar_faq(diretorio, assinatura)
+        return _faq
+
+
+def invalidar_faq():
+    global _faq
+    
+    with _faq_lock:
+        _faq = None
+
+
+def buscar_resposta_faq(question: str, normalizada: str, diretorio: str, assinatura: str, embedding_pergunta) -> dict:
+    inicio = time.perf_counter()
+    faq = _get_faq(diretorio, assinatura)
+    
+    with _faq_lock:
+        _faq_stats["consultas"] += 1
+        if not faq["disponivel"]:
+            _faq_stats["indisponivel"] += 1
+            return None
+    
+    posicao = faq["exatos"].get(normalizada)
+    tipo = "hits_exatos"
+    similaridade = 1.0
+    
+    if posicao is None and embedding_pergunta is None:
+        with _faq_lock:
+            _faq_stats["sem_embedding"] += 1
+            _latencias_miss.append(time.perf_counter() - inicio)
+        return None
+    
+    if posicao is None:
+        vetor = np.asarray(embedding_pergunta(question), dtype=np.float32)
+        norma = np.linalg.norm(vetor)
+        similaridades = faq["matriz"] @ (vetor / norma if norma else vetor)
+        melhor = int(np.argmax(similaridades))
+        similaridade = float(similaridades[melhor])
+        
+        if similaridade < settings.faq_similaridade_minima:
+            with _faq_lock:
+                _faq_stats["misses"] += 1
+                _latencias_miss.append(time.perf_counter() - inicio)
+            return None
+        
+        posicao = faq["dono"][melhor]
+        tipo = "hits_semanticos"
+    
+    item = faq["itens"][posicao]
+    with _faq_lock:
+        _faq_stats[tipo] += 1
+        _latencias_hit.append(time.perf_counter() - inicio)
+    
+    return {
+        "success": True,
+        "answer": item["resposta"],
+        "faq": {
+            "topico": item["id"],
+            "similaridade": round(similaridade, 4)
+        }
+    }
+
+
+def _percentis(latencias: list) -> dict:
+    if not latencias:
+        return {}
+    latencias = sorted(latencias)
+    return {
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 3),
+        "p95_ms": round(latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)] * 1000, 3)
+    }
+
+
+def get_faq_stats() -> dict:
+    with _faq_lock:
+        stats = dict(_faq_stats)
+        latencias_hit = list(_latencias_hit)
+        latencias_miss = list(_latencias_miss)
+        faq = _faq
+    
+    hits = stats["hits_exatos"] + stats["hits_semanticos"]
+    stats["hit_ratio"] = round(hits / stats["consultas"], 4) if stats["consultas"] else 0.0
+    stats["latencia_hit"] = _percentis(latencias_hit)
+    stats["latencia_miss"] = _percentis(latencias_miss)
+    stats["topicos"] = len(faq["itens"]) if faq else 0
+    stats["gerado_em"] = faq.get("gerado_em") if faq else None
+    return stats
+
+
+def gerar_faq(diretorio: str, assinatura: str, gerar_resposta, embeddings, normalizar, topicos: list = None) -> dict:
+    topicos = topicos or TOPICOS
+    inicio = time.monotonic()
+    
+    itens = []
+    falhas = []
+    for topico in topicos:
+        resultado = gerar_resposta(topico["pergunta"])
+        if not resultado.get("success"):
+            falhas.append(topico["id"])
+            continue
+        itens.append({
+            "id": topico["id"],
+            "pergunta": topico["pergunta"],
+            "variantes": topico["variantes"],
+            "resposta": resultado["answer"]
+        })
+    
+    if not itens:
+        return {
+            "topicos": 0,
+            "perguntas_canonicas": 0,
+            "falhas": falhas,
+            "assinatura": assinatura,
+            "segundos": round(time.monotonic() - inicio, 2)
+        }
+    
+    perguntas = []
+    dono = []
+    for posicao, item in enumerate(itens):
+        for texto in [item["pergunta"], *item["variantes"]]:
+            perguntas.append(texto)
+            dono.append(posicao)
+    
+    matriz = _normalizar_matriz(embeddings.embed_documents(perguntas))
+    exatos = {normalizar(texto): dono[indice] for indice, texto in enumerate(perguntas)}
+    
+    os.makedirs(diretorio, exist_ok=True)
+    caminho_vetores = os.path.join(diretorio, ARQUIVO_FAQ_VETORES)
+    with open(f"{caminho_vetores}.tmp", "wb") as arquivo:
+        np.save(arquivo, matriz)
+    os.replace(f"{caminho_vetores}.tmp", caminho_vetores)
+    
+    caminho = os.path.join(diretorio, ARQUIVO_FAQ)
+    with open(f"{caminho}.tmp", "w", encoding="utf-8") as arquivo:
+        json.dump({
+            "assinatura": assinatura,
+            "gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "itens": itens,
+            "dono": dono,
+            "exatos": exatos
+        }, arquivo, ensure_ascii=False, indent=2)
+    os.replace(f"{caminho}.tmp", caminho)
+    
+    invalidar_faq()
+    return {
+        "topicos": len(itens),
+        "perguntas_canonicas": len(perguntas),
+        "falhas": falhas,
+        "assinatura": assinatura,
+        "segundos": round(time.monotonic() - inicio, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera as respostas canônicas do FAQ para o índice atual")
+    parser.parse_args()
+    
+    import services.rag_service as rag
+    
+    relatorio = rag.gerar_faq_canonico()
+    if not relatorio.get("success"):
+        print(relatorio["message"])
+        return
+    
+    print(f"{relatorio['topicos']} tópicos, {relatorio['perguntas_canonicas']} perguntas canônicas em {relatorio['segundos']}s")
+    if relatorio["falhas"]:
+        print(f"Sem resposta para: {', '.join(relatorio['falhas'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+import httplib2
 import os
+import threading
 from datetime import datetime, timedelta, time
 from config import get_settings
 
@@ -10,8 +14,25 @@ settings = get_settings()
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+_busy_cache = {
+    'events': {},
+    'sync_token': None,
+    'time_min': None,
+    'time_max': None,
+    'synced_at': None
+}
+_busy_cache_lock = threading.RLock()
 
-def get_calendar_service():
+CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=5)
+CALENDAR_BATCH_SIZE = 50
+BOOKING_WINDOW = timedelta(days=31)
+
+_calendar_credentials = None
+_calendar_lock = threading.Lock()
+_calendar_local = threading.local()
+
+
+def _load_credentials():
     creds = None
     token_file = settings.google_calendar_token_file
     credentials_file = settings.google_calendar_credentials_file
@@ -34,13 +55,60 @@ def get_calendar_service():
             )
             creds = flow.run_local_server(port=0)
         
-        with open(token_file, 'w') as token:
-            token.write(creds.to_json())
+        _save_credentials(creds)
+    
+    return creds
+
+
+def _save_credentials(creds):
+    with open(settings.google_calendar_token_file, 'w') as token:
+        token.write(creds.to_json())
+
+
+def _credentials_need_refresh(creds) -> bool:
+    if not creds.valid:
+        return True
+    
+    if creds.expiry is None:
+        return False
+    
+    return creds.expiry - CREDENTIALS_REFRESH_MARGIN <= datetime.utcnow()
+
+
+def get_calendar_credentials():
+    global _calendar_credentials
+    
+    with _calendar_lock:
+        if _calendar_credentials is None:
+            _calendar_credentials = _load_credentials()
+        elif _credentials_need_refresh(_calendar_credentials) and _calendar_credentials.refresh_token:
+            _calendar_credentials.refresh(Request())
+            _save_credentials(_calendar_credentials)
+        
+        return _calendar_credentials
+
+
+def get_calendar_service():
+    creds = get_calendar_credentials()
+    
+    service = getattr(_calendar_local, 'service', None)
+    if service is None or _calendar_local.credentials is not creds:
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=settings.google_calendar_timeout_seconds))
+        service = build('calendar', 'v3', http=http, cache_discovery=False)
+        _calendar_local.service = service
+        _calendar_local.credentials = creds
     
-    service = build('calendar', 'v3', credentials=creds)
     return service
 
 
+def reset_calendar_service():
+    global _calendar_credentials
+    
+    with _calendar_lock:
+        _calendar_credentials = None
+        _calendar_local.__dict__.clear()
+
+
 def is_working_day(date: datetime) -> bool:
     weekday = date.weekday()
     
@@ -65,44 +133,187 @@ def get_working_hours(date: datetime) -> tuple:
     return (None, None)
 
 
-def get_busy_times(start_date: datetime, end_date: datetime):
-    service = get_calendar_service()
-    calendar_id = settings.google_calendar_id
+def parse_busy_event(event: dict):
+    if event.get('status') == 'cancelled':
+        return None
+    
+    start = event['start'].get('dateTime', event['start'].get('date'))
+    end = event['end'].get('dateTime', event['end'].get('date'))
     
-    events_result = service.events().list(
-        calendarId=calendar_id,
-        timeMin=start_date.isoformat() + 'Z',
-        timeMax=end_date.isoformat() + 'Z',
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute()
+    if 'T' not in start:
+        return None
     
-    events = events_result.get('items', [])
+    return {
+        'start': datetime.fromisoformat(start.replace('Z', '+00:00')),
+        'end': datetime.fromisoformat(end.replace('Z', '+00:00')),
+        'title': event.get('summary', 'Sem título')
+    }
+
+
+def _list_events(service, **params):
+    events = []
+    page_token = None
     
-    busy_times = []
+    while True:
+        result = service.events().list(
+            calendarId=settings.google_calendar_id,
+            singleEvents=True,
+            pageToken=page_token,
+            **params
+        ).execute()
+        
+        events.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        
+        if not page_token:
+            return events, result.get('nextSyncToken')
+
+
+def _apply_events(events: list):
     for event in events:
-        start = event['start'].get('dateTime', event['start'].get('date'))
-        end = event['end'].get('dateTime', event['end'].get('date'))
+        busy = parse_busy_event(event)
+        if busy:
+            _busy_cache['events'][event['id']] = busy
+        else:
+            _busy_cache['events'].pop(event['id'], None)
+
+
+def _full_sync(service, time_min: datetime, time_max: datetime):
+    events, sync_token = _list_events(
+        service,
+        timeMin=time_min.isoformat() + 'Z',
+        timeMax=time_max.isoformat() + 'Z'
+    )
+    
+    _busy_cache['events'] = {}
+    _apply_events(events)
+    _busy_cache['sync_token'] = sync_token
+    _busy_cache['time_min'] = time_min
+    _busy_cache['time_max'] = time_max
+
+
+def _incremental_sync(service):
+    try:
+        events, sync_token = _list_events(
+            service,
+            syncToken=_busy_cache['sync_token'],
+            showDeleted=True
+        )
+    except HttpError as e:
+        if e.resp.status != 410:
+            raise
+        _full_sync(service, _busy_cache['time_min'], _busy_cache['time_max'])
+        return
+    
+    _apply_events(events)
+    _busy_cache['sync_token'] = sync_token
+
+
+def _prune_events(time_min: datetime):
+    time_max = _busy_cache['time_max']
+    outside = [
+        event_id for event_id, busy in _busy_cache['events'].items()
+        if busy['end'].replace(tzinfo=None) <= time_min
+        or busy['start'].replace(tzinfo=None) >= time_max
+    ]
+    for event_id in outside:
+        del _busy_cache['events'][event_id]
+    
+    _busy_cache['time_min'] = time_min
+
+
+def sync_busy_times(time_min: datetime, time_max: datetime = None, service=None):
+    time_max = time_max or time_min
+    
+    with _busy_cache_lock:
+        if service is None:
+            service = get_calendar_service()
         
-        if 'T' in start:
-            start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-            end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-            
-            busy_times.append({
-                'start': start_dt,
-                'end': end_dt,
-                'title': event.get('summary', 'Sem título')
-            })
+        cache_time_min = _busy_cache['time_min']
+        cache_time_max = _busy_cache['time_max']
+        
+        if (
+            not _busy_cache['sync_token']
+            or cache_time_min is None
+            or time_min < cache_time_min
+            or time_max > cache_time_max
+        ):
+            _full_sync(service, time_min, max(time_max, time_min + BOOKING_WINDOW))
+        else:
+            _incremental_sync(service)
+        
+        _prune_events(time_min)
+        _busy_cache['synced_at'] = datetime.now()
+
+
+def invalidate_busy_times(event: dict = None, deleted_event_id: str = None):
+    with _busy_cache_lock:
+        if event:
+            _apply_events([event])
+        if deleted_event_id:
+            _busy_cache['events'].pop(deleted_event_id, None)
+        _busy_cache['synced_at'] = None
+
+
+def reset_busy_times_cache():
+    with _busy_cache_lock:
+        _busy_cache.update(events={}, sync_token=None, time_min=None, time_max=None, synced_at=None)
+
+
+def _busy_cache_is_fresh(time_min: datetime, time_max: datetime) -> bool:
+    synced_at = _busy_cache['synced_at']
+    cache_time_min = _busy_cache['time_min']
+    cache_time_max = _busy_cache['time_max']
     
+    if synced_at is None or cache_time_min is None or time_min < cache_time_min or time_max > cache_time_max:
+        return False
+    
+    ttl = timedelta(seconds=settings.google_calendar_cache_ttl_seconds)
+    return datetime.now() - synced_at < ttl
+
+
+def get_busy_times(start_date: datetime, end_date: datetime, service=None):
+    if not _busy_cache_is_fresh(start_date, end_date):
+        sync_busy_times(start_date, end_date, service=service)
+    
+    with _busy_cache_lock:
+        busy_times = [
+            busy for busy in _busy_cache['events'].values()
+            if busy['end'].replace(tzinfo=None) > start_date
+            and busy['start'].replace(tzinfo=None) < end_date
+        ]
+    
+    busy_times.sort(key=lambda busy: busy['start'].replace(tzinfo=None))
     return busy_times
 
 
+def build_busy_index(busy_times: list) -> tuple:
+    intervals = sorted(
+        (busy['start'].replace(tzinfo=None), busy['end'].replace(tzinfo=None))
+        for busy in busy_times
+    )
+    
+    busy_starts = []
+    busy_ends = []
+    for start, end in intervals:
+        if busy_ends and start <= busy_ends[-1]:
+            if end > busy_ends[-1]:
+                busy_ends[-1] = end
+        else:
+            busy_starts.append(start)
+            busy_ends.append(end)
+    
+    return busy_starts, busy_ends
+
+
 def get_available_slots(days: int = 30, slot_duration_minutes: int = 60):
     now = datetime.now()
     start_date = datetime.combine(now.date(), time(0, 0))
     end_date = start_date + timedelta(days=days)
     
     busy_times = get_busy_times(start_date, end_date)
+    busy_starts, busy_ends = build_busy_index(busy_times)
+    cursor = 0
     
     available_slots = []
     
@@ -128,14 +339,10 @@ def get_available_slots(days: int = 30, slot_duration_minutes: int = 60):
         while current_slot < work_end:
             slot_end = current_slot + timedelta(minutes=slot_duration_minutes)
             
-            is_free = True
-            for busy in busy_times:
-                busy_start = busy['start'].replace(tzinfo=None)
-                busy_end = busy['end'].replace(tzinfo=None)
-                
-                if not (slot_end <= busy_start or current_slot >= busy_end):
-                    is_free = False
-                    break
+            while cursor < len(busy_ends) and busy_ends[cursor] <= current_slot:
+                cursor += 1
+            
+            is_free = cursor == len(busy_ends) or busy_starts[cursor] >= slot_end
             
             if current_slot > now and is_free:
                 day_slots.append(current_slot.strftime('%H:%M'))
@@ -154,26 +361,24 @@ def get_available_slots(days: int = 30, slot_duration_minutes: int = 60):
     return available_slots
 
 
-def create_calendar_event(
+def _event_datetime(value: datetime) -> dict:
+    return {
+        'dateTime': value.isoformat(),
+        'timeZone': 'America/Sao_Paulo',
+    }
+
+
+def build_event_body(
     title: str,
     start_datetime: datetime,
     end_datetime: datetime,
     description: str = None,
     attendee_email: str = None
-):
-    service = get_calendar_service()
-    calendar_id = settings.google_calendar_id
-    
+) -> dict:
     event_body = {
         'summary': title,
-        'start': {
-            'dateTime': start_datetime.isoformat(),
-            'timeZone': 'America/Sao_Paulo',
-        },
-        'end': {
-            'dateTime': end_datetime.isoformat(),
-            'timeZone': 'America/Sao_Paulo',
-        },
+        'start': _event_datetime(start_datetime),
+        'end': _event_datetime(end_datetime),
         'reminders': {
             'useDefault': False,
             'overrides': [
@@ -191,11 +396,38 @@ def create_calendar_event(
             {'email': attendee_email, 'responseStatus': 'needsAction'}
         ]
     
-    event = service.events().insert(
-        calendarId=calendar_id,
-        body=event_body,
-        sendUpdates='all'
-    ).execute()
+    return event_body
+
+
+def create_calendar_event(
+    title: str,
+    start_datetime: datetime,
+    end_datetime: datetime,
+    description: str = None,
+    attendee_email: str = None,
+    event_id: str = None
+):
+    service = get_calendar_service()
+    calendar_id = settings.google_calendar_id
+    
+    event_body = build_event_body(
+        title, start_datetime, end_datetime, description, attendee_email
+    )
+    if event_id:
+        event_body['id'] = event_id
+    
+    try:
+        event = service.events().insert(
+            calendarId=calendar_id,
+            body=event_body,
+            sendUpdates='all'
+        ).execute()
+    except HttpError as e:
+        if not event_id or e.resp.status != 409:
+            raise
+        event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
+    
+    invalidate_busy_times(event=event)
     
     return {
         'event_id': event.get('id'),
@@ -241,7 +473,13 @@ def delete_calendar_event(event_id: str) -> bool:
             calendarId=settings.google_calendar_id,
             eventId=event_id
         ).execute()
+        invalidate_busy_times(deleted_event_id=event_id)
         return True
+    except HttpError as e:
+        if e.resp.status in (404, 410):
+            invalidate_busy_times(deleted_event_id=event_id)
+            return True
+        return False
     except Exception:
         return False
 
@@ -250,26 +488,110 @@ def update_calendar_event(event_id: str, start_datetime: datetime, end_datetime:
     try:
         service = get_calendar_service()
         
-        event = service.events().get(
-            calendarId=settings.google_calendar_id,
-            eventId=event_id
-        ).execute()
-        
-        event['start'] = {
-            'dateTime': start_datetime.isoformat(),
-            'timeZone': 'America/Sao_Paulo'
-        }
-        event['end'] = {
-            'dateTime': end_datetime.isoformat(),
-            'timeZone': 'America/Sao_Paulo'
-        }
-        
-        service.events().update(
+        updated = service.events().patch(
             calendarId=settings.google_calendar_id,
             eventId=event_id,
-            body=event
+            body={
+                'start': _event_datetime(start_datetime),
+                'end': _event_datetime(end_datetime)
+            }
         ).execute()
         
+        invalidate_busy_times(event=updated)
         return True
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+
+def _batch_request(events, operation: dict):
+    calendar_id = settings.google_calendar_id
+    action = operation['action']
+    
+    if action == 'insert':
+        return events.insert(
+            calendarId=calendar_id,
+            body=build_event_body(
+                operation['title'],
+                operation['start_datetime'],
+                operation['end_datetime'],
+                operation.get('description'),
+                operation.get('attendee_email')
+            ),
+            sendUpdates='all'
+        )
+    
+    if action == 'patch':
+        return events.patch(
+            calendarId=calendar_id,
+            eventId=operation['event_id'],
+            body={
+                'start': _event_datetime(operation['start_datetime']),
+                'end': _event_datetime(operation['end_datetime'])
+            }
+        )
+    
+    if action == 'delete':
+        return events.delete(
+            calendarId=calendar_id,
+            eventId=operation['event_id']
+        )
+    
+    raise ValueError(f"Operação de calendário inválida: {action}")
+
+
+def batch_calendar_operations(operations: list) -> list:
+    service = get_calendar_service()
+    events = service.events()
+    
+    results = [
+        {
+            'ref': operation.get('ref'),
+            'action': operation['action'],
+            'event_id': operation.get('event_id'),
+            'success': False,
+            'error': None
+        }
+        for operation in operations
+    ]
+    
+    def on_response(request_id, response, exception):
+        index = int(request_id)
+        result = results[index]
+        
+        if exception is not None:
+            status = getattr(getattr(exception, 'resp', None), 'status', None)
+            if result['action'] == 'delete' and status in (404, 410):
+                result['success'] = True
+                invalidate_busy_times(deleted_event_id=result['event_id'])
+            else:
+                result['error'] = str(exception)
+            return
+        
+        result['success'] = True
+        
+        if result['action'] == 'delete':
+            invalidate_busy_times(deleted_event_id=result['event_id'])
+        else:
+            result['event_id'] = response.get('id')
+            result['event_link'] = response.get('htmlLink')
+            invalidate_busy_times(event=response)
+    
+    for offset in range(0, len(operations), CALENDAR_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        
+        for index in range(offset, min(offset + CALENDAR_BATCH_SIZE, len(operations))):
+            try:
+                request = _batch_request(events, operations[index])
+            except (KeyError, ValueError) as e:
+                results[index]['error'] = str(e)
+                continue
+            batch.add(request, request_id=str(index))
+        
+        try:
+            batch.execute()
+        except Exception as e:
+            for result in results[offset:offset + CALENDAR_BATCH_SIZE]:
+                if not result['success'] and result['error'] is None:
+                    result['error'] = str(e)
+    
+    return results
@@ -0,0 +1,362 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import get_settings
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+settings = get_settings()
+
+
+class EmbeddingsFalsos:
+    
+    def __init__(self, dimensao: int = 256, latencia: float = 0.0):
+        self.dimensao = dimensao
+        self.latencia = latencia
+    
+    def _vetor(self, texto: str) -> list:
+        bruto = hashlib.shake_256(texto.encode()).digest(self.dimensao)
+        vetor = [b / 255 - 0.5 for b in bruto]
+        norma = math.sqrt(sum(v * v for v in vetor)) or 1.0
+        return [v / norma for v in vetor]
+    
+    def embed_documents(self, textos: list) -> list:
+        if self.latencia:
+            time.sleep(self.latencia)
+        return [self._vetor(texto) for texto in textos]
+    
+    def embed_query(self, texto: str) -> list:
+        return self._vetor(texto)
+
+
+def hash_arquivo(filepath: str) -> str:
+    sha = hashlib.sha256()
+    with open(filepath, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def id_chunk(filename: str, conteudo: str) -> str:
+    return hashlib.sha256(f"{filename}\0{conteudo}".encode()).hexdigest()
+
+
+def carregar_manifesto(caminho: str, parametros: dict) -> dict:
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            manifesto = json.load(arquivo)
+    except (FileNotFoundError, ValueError):
+        return None
+    
+    if manifesto.get("parametros") != parametros:
+        return None
+    return manifesto
+
+
+def salvar_manifesto(caminho: str, manifesto: dict):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def memoria_pico_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for linha in status:
+                if linha.startswith("VmHWM:"):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        pico /= 1024
+    return round(pico / 1024, 1)
+
+
+def _embedar(embeddings, lote: list) -> list:
+    return embeddings.embed_documents([chunk.page_content for _, chunk in lote])
+
+
+def indexar_documentos(
+    arquivos: dict,
+    caminho_manifesto: str,
+    parametros: dict,
+    destino,
+    embeddings,
+    dividir,
+    tamanho_lote: int = None,
+    concorrencia: int = None,
+    checkpoint_segundos: float = None,
+    progresso=None
+) -> dict:
+    tamanho_lote = tamanho_lote or settings.rag_embedding_batch_size
+    concorrencia = concorrencia or settings.rag_embedding_concurrency
+    if checkpoint_segundos is None:
+        checkpoint_segundos = settings.rag_checkpoint_seconds
+    
+    inicio = time.monotonic()
+    manifesto = carregar_manifesto(caminho_manifesto, parametros)
+    recriado = manifesto is None
+    if recriado:
+        destino.recriar()
+        manifesto = {"parametros": parametros, "arquivos": {}}
+        salvar_manifesto(caminho_manifesto, manifesto)
+    
+    estado = manifesto["arquivos"]
+    relatorio = {
+        "recriado": recriado,
+        "arquivos_inalterados": 0,
+        "arquivos_processados": 0,
+        "arquivos_removidos": 0,
+        "chunks_mantidos": 0,
+        "chunks_novos": 0,
+        "chunks_removidos": 0,
+        "lotes": 0,
+        "embedding_caracteres": 0,
+        "chunks_em_voo_pico": 0
+    }
+    
+    pendentes = {}
+    
+    def finalizar(filename: str):
+        info = pendentes.pop(filename)
+        obsoletos = list(info["anteriores"] - info["ids"])
+        if obsoletos:
+            destino.excluir(obsoletos)
+            relatorio["chunks_removidos"] += len(obsoletos)
+        estado[filename] = {"sha256": info["sha256"], "chunks": sorted(info["ids"])}
+        relatorio["arquivos_processados"] += 1
+    
+    def checkpoint():
+        for filename, info in pendentes.items():
+            estado[filename] = {
+                "sha256": None,
+                "chunks": sorted(info["anteriores"] | info["concluidos"])
+            }
+        destino.persistir()
+        salvar_manifesto(caminho_manifesto, manifesto)
+    
+    def lotes():
+        for filename, filepath in sorted(arquivos.items()):
+            sha = hash_arquivo(filepath)
+            anterior = estado.get(filename)
+            
+            if anterior and anterior["sha256"] == sha:
+                relatorio["arquivos_inalterados"] += 1
+                relatorio["chunks_mantidos"] += len(anterior["chunks"])
+                continue
+            
+            info = {
+                "sha256": sha,
+                "anteriores": set(anterior["chunks"]) if anterior else set(),
+                "ids": set(),
+                "concluidos": set(),
+                "lotes_pendentes": 0,
+                "lido": False
+            }
+            pendentes[filename] = info
+            
+            lote = []
+            for chunk in dividir(filepath, filename):
+                chunk_id = id_chunk(filename, chunk.page_content)
+                if chunk_id in info["ids"]:
+                    continue
+                info["ids"].add(chunk_id)
+                
+                if chunk_id in info["anteriores"]:
+                    relatorio["chunks_mantidos"] += 1
+                    continue
+                
+                lote.append((chunk_id, chunk))
+                if len(lote) >= tamanho_lote:
+                    info["lotes_pendentes"] += 1
+                    yield filename, lote
+                    lote = []
+            
+            if lote:
+                info["lotes_pendentes"] += 1
+                yield filename, lote
+            
+            info["lido"] = True
+            if not info["lotes_pendentes"]:
+                finalizar(filename)
+    
+    def gravar(filename: str, lote: list, vetores: list):
+        destino.upsert(
+            [chunk_id for chunk_id, _ in lote],
+            [chunk.page_content for _, chunk in lote],
+            vetores,
+            [chunk.metadata for _, chunk in lote]
+        )
+        
+        info = pendentes[filename]
+        info["concluidos"].update(chunk_id for chunk_id, _ in lote)
+        info["lotes_pendentes"] -= 1
+        relatorio["chunks_novos"] += len(lote)
+        relatorio["lotes"] += 1
+        relatorio["embedding_caracteres"] += sum(len(chunk.page_content) for _, chunk in lote)
+        
+        if info["lido"] and not info["lotes_pendentes"]:
+            finalizar(filename)
+    
+    ultimo_checkpoint = time.monotonic()
+    em_voo = {}
+    erro = None
+    
+    with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix="embedding") as executor:
+        def drenar():
+            nonlocal erro
+            concluidos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                filename, lote = em_voo.pop(futuro)
+                try:
+                    vetores = futuro.result()
+                except Exception as e:
+                    erro = erro or e
+                    continue
+                if erro is None:
+                    gravar(filename, lote, vetores)
+        
+        for filename, lote in lotes():
+            em_voo[executor.submit(_embedar, embeddings, lote)] = (filename, lote)
+            relatorio["chunks_em_voo_pico"] = max(
+                relatorio["chunks_em_voo_pico"],
+                sum(len(lote) for _, lote in em_voo.values())
+            )
+            
+            if len(em_voo) >= concorrencia:
+                drenar()
+            if erro is not None:
+                break
+            
+            if time.monotonic() - ultimo_checkpoint >= checkpoint_segundos:
+                checkpoint()
+                ultimo_checkpoint = time.monotonic()
+                if progresso:
+                    progresso(relatorio, time.monotonic() - inicio)
+        
+        while em_voo:
+            drenar()
+    
+    if erro is not None:
+        checkpoint()
+        raise erro
+    
+    for filename in list(estado):
+        if filename not in arquivos:
+            removidos = estado.pop(filename)["chunks"]
+            if removidos:
+                destino.excluir(removidos)
+            relatorio["chunks_removidos"] += len(removidos)
+            relatorio["arquivos_removidos"] += 1
+    
+    destino.persistir()
+    salvar_manifesto(caminho_manifesto, manifesto)
+    
+    segundos = time.monotonic() - inicio
+    relatorio["embedding_tokens_estimados"] = relatorio["embedding_caracteres"] // 4
+    relatorio["embedding_custo_estimado_usd"] = round(
+        relatorio["embedding_caracteres"] / 4 / 1_000_000 * settings.rag_embedding_cost_per_million_tokens, 6
+    )
+    relatorio["chunks_por_segundo"] = round(relatorio["chunks_novos"] / segundos, 1) if segundos else 0.0
+    relatorio["memoria_pico_mb"] = memoria_pico_mb()
+    relatorio["segundos"] = round(segundos, 2)
+    return relatorio
+
+
+class _Chunk:
+    
+    def __init__(self, page_content: str, metadata: dict):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+class _DestinoContador:
+    
+    def __init__(self):
+        self.total = 0
+    
+    def recriar(self):
+        self.total = 0
+    
+    def upsert(self, ids: list, textos: list, vetores: list, metadados: list):
+        self.total += len(ids)
+    
+    def excluir(self, ids: list):
+        self.total -= len(ids)
+    
+    def persistir(self):
+        pass
+
+
+def _dividir_texto(filepath: str, filename: str):
+    with open(filepath, encoding="utf-8") as arquivo:
+        for pagina, texto in enumerate(arquivo.read().split("\f")):
+            for inicio in range(0, len(texto), 800):
+                yield _Chunk(texto[inicio:inicio + 800], {"source": filename, "page": pagina})
+
+
+def _gerar_corpus(diretorio: str, arquivos: int, paginas: int) -> dict:
+    caminhos = {}
+    for indice in range(arquivos):
+        filename = f"manual_{indice:04d}.txt"
+        filepath = os.path.join(diretorio, filename)
+        with open(filepath, "w", encoding="utf-8") as arquivo:
+            arquivo.write("\f".join(
+                " ".join(f"{filename} pagina {pagina} linha {linha} procedimento valor convenio" for linha in range(40))
+                for pagina in range(paginas)
+            ))
+        caminhos[filename] = filepath
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de indexação com embeddings falsos")
+    parser.add_argument("--arquivos", type=int, default=200)
+    parser.add_argument("--paginas", type=int, default=20)
+    parser.add_argument("--lote", type=int, default=settings.rag_embedding_batch_size)
+    parser.add_argument("--concorrencia", type=int, default=settings.rag_embedding_concurrency)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência simulada por lote, em segundos")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivos = _gerar_corpus(diretorio, args.arquivos, args.paginas)
+        manifesto = os.path.join(diretorio, "manifest.json")
+        embeddings = EmbeddingsFalsos(latencia=args.latencia)
+        
+        for titulo, concorrencia in (("Sequencial", 1), ("Concorrente", args.concorrencia)):
+            if os.path.exists(manifesto):
+                os.remove(manifesto)
+            relatorio = indexar_documentos(
+                arquivos, manifesto, {"modelo": "falso"}, _DestinoContador(), embeddings,
+                _dividir_texto, tamanho_lote=args.lote, concorrencia=concorrencia
+            )
+            print(
+                f"{titulo} (concorrência {concorrencia}): {relatorio['chunks_novos']} chunks em "
+                f"{relatorio['segundos']}s - {relatorio['chunks_por_segundo']} chunks/s, "
+                f"pico de {relatorio['chunks_em_voo_pico']} chunks em voo, {relatorio['memoria_pico_mb']} MB"
+            )
+        
+        relatorio = indexar_documentos(
+            arquivos, manifesto, {"modelo": "falso"}, _DestinoContador(), embeddings,
+            _dividir_texto, tamanho_lote=args.lote, concorrencia=args.concorrencia
+        )
+        print(f"Reindexação sem mudanças: {relatorio['chunks_novos']} chunks novos em {relatorio['segundos']}s")
+
+
+if __name__ == "__main__":
+    main()
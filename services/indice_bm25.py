@@ -0,0 +1,102 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from services.catalogo_service import normalizar_nome
+
+ARQUIVO_BM25 = "bm25.json"
+TAMANHO_RADICAL = 5
+
+STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "ela", "ele", "em",
+    "eu", "isso", "me", "meu", "minha", "na", "nas", "no", "nos", "o", "os", "ou", "para", "pela",
+    "pelo", "por", "pra", "qual", "quais", "quando", "quanto", "que", "se", "sua", "seu", "tem",
+    "um", "uma", "voce", "voces", "vcs", "vc", "gostaria", "saber", "queria", "oi", "ola"
+}
+
+
+def tokenizar(texto: str) -> list:
+    return [
+        termo[:TAMANHO_RADICAL] for termo in re.findall(r'\w+', normalizar_nome(texto))
+        if len(termo) > 1 and termo not in STOPWORDS
+    ]
+
+
+class IndiceBM25:
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.textos = []
+        self.metadados = []
+        self.postings = {}
+    
+    def __len__(self) -> int:
+        return len(self.textos)
+    
+    def construir(self, textos: list, metadados: list = None):
+        self.textos = list(textos)
+        self.metadados = list(metadados) if metadados else [{} for _ in textos]
+        
+        frequencias = [Counter(tokenizar(texto)) for texto in self.textos]
+        tamanhos = [sum(contagem.values()) for contagem in frequencias]
+        total = len(frequencias)
+        media = sum(tamanhos) / total if total else 0.0
+        
+        documentos_por_termo = Counter()
+        for contagem in frequencias:
+            documentos_por_termo.update(contagem.keys())
+        
+        postings = {}
+        for posicao, contagem in enumerate(frequencias):
+            normalizacao = self.k1 * (1 - self.b + self.b * tamanhos[posicao] / media) if media else self.k1
+            for termo, tf in contagem.items():
+                df = documentos_por_termo[termo]
+                idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                peso = idf * tf * (self.k1 + 1) / (tf + normalizacao)
+                postings.setdefault(termo, []).append((posicao, round(peso, 6)))
+        
+        self.postings = postings
+        return self
+    
+    def buscar(self, consulta: str, k: int = 10) -> tuple:
+        termos = set(tokenizar(consulta))
+        scores = Counter()
+        termos_por_documento = Counter()
+        for termo in termos:
+            for posicao, peso in self.postings.get(termo, ()):
+                scores[posicao] += peso
+                termos_por_documento[posicao] += 1
+        
+        if not scores:
+            return [], 0.0, 0.0
+        
+        melhores = scores.most_common(k)
+        cobertura = termos_por_documento[melhores[0][0]] / len(termos)
+        margem = melhores[0][1] / melhores[1][1] if len(melhores) > 1 else float("inf")
+        return melhores, cobertura, margem
+    
+    def salvar(self, diretorio: str):
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, ARQUIVO_BM25)
+        with open(f"{caminho}.tmp", "w", encoding="utf-8") as arquivo:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "textos": self.textos,
+                "metadados": self.metadados,
+                "postings": self.postings
+            }, arquivo, ensure_ascii=False)
+        os.replace(f"{caminho}.tmp", caminho)
+    
+    @classmethod
+    def carregar(cls, diretorio: str):
+        with open(os.path.join(diretorio, ARQUIVO_BM25), encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        
+        indice = cls(dados["k1"], dados["b"])
+        indice.textos = dados["textos"]
+        indice.metadados = dados["metadados"]
+        indice.postings = {termo: [tuple(item) for item in lista] for termo, lista in dados["postings"].items()}
+        return indice
@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from services.indexacao_service import EmbeddingsFalsos, memoria_pico_mb
+
+ARQUIVO_VETORES = "vetores.npy"
+ARQUIVO_METADADOS = "metadados.json"
+
+
+class Documento:
+    
+    def __init__(self, page_content: str, metadata: dict = None, score: float = None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+        self.score = score
+
+
+class IndiceNumpy:
+    
+    def __init__(self, diretorio: str, embeddings=None, criar: bool = True):
+        self.diretorio = diretorio
+        self.embeddings = embeddings
+        self._novos = {}
+        self._excluidos = set()
+        
+        if not os.path.exists(os.path.join(diretorio, ARQUIVO_METADADOS)):
+            if not criar:
+                raise FileNotFoundError(f"Índice vetorial não encontrado em {diretorio}")
+            self._carregar_vazio()
+        else:
+            self._carregar()
+    
+    def _carregar_vazio(self):
+        self._ids = []
+        self._textos = []
+        self._metadados = []
+        self._vetores = None
+    
+    def _carregar(self):
+        with open(os.path.join(self.diretorio, ARQUIVO_METADADOS), encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        
+        self._ids = dados["ids"]
+        self._textos = dados["textos"]
+        self._metadados = dados["metadados"]
+        self._vetores = np.load(os.path.join(self.diretorio, ARQUIVO_VETORES), mmap_mode="r") if self._ids else None
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def recriar(self):
+        self._novos.clear()
+        self._excluidos.clear()
+        self._carregar_vazio()
+        for nome in (ARQUIVO_VETORES, ARQUIVO_METADADOS):
+            caminho = os.path.join(self.diretorio, nome)
+            if os.path.exists(caminho):
+                os.remove(caminho)
+    
+    def upsert(self, ids: list, textos: list, vetores: list, metadados: list):
+        matriz = np.array(vetores, dtype=np.float32)
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        matriz /= np.where(normas == 0, 1, normas)
+        
+        for chunk_id, texto, vetor, metadado in zip(ids, textos, matriz, metadados):
+            self._novos[chunk_id] = (texto, vetor, metadado or {})
+            self._excluidos.discard(chunk_id)
+    
+    def excluir(self, ids: list):
+        for chunk_id in ids:
+            self._novos.pop(chunk_id, None)
+            self._excluidos.add(chunk_id)
+    
+    def persistir(self):
+        if not self._novos and not self._excluidos:
+            return
+        
+        mantidos = [
+            posicao for posicao, chunk_id in enumerate(self._ids)
+            if chunk_id not in self._excluidos and chunk_id not in self._novos
+        ]
+        blocos = []
+        if mantidos:
+            blocos.append(np.asarray(self._vetores[mantidos], dtype=np.float32))
+        if self._novos:
+            blocos.append(np.stack([vetor for _, vetor, _ in self._novos.values()]))
+        
+        ids = [self._ids[posicao] for posicao in mantidos] + list(self._novos)
+        textos = [self._textos[posicao] for posicao in mantidos] + [texto for texto, _, _ in self._novos.values()]
+        metadados = [self._metadados[posicao] for posicao in mantidos] + [meta for _, _, meta in self._novos.values()]
+        
+        self._vetores = None
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho_vetores = os.path.join(self.diretorio, ARQUIVO_VETORES)
+        caminho_metadados = os.path.join(self.diretorio, ARQUIVO_METADADOS)
+        
+        if blocos:
+            with open(f"{caminho_vetores}.tmp", "wb") as arquivo:
+                np.save(arquivo, np.concatenate(blocos))
+            os.replace(f"{caminho_vetores}.tmp", caminho_vetores)
+        elif os.path.exists(caminho_vetores):
+            os.remove(caminho_vetores)
+        
+        with open(f"{caminho_metadados}.tmp", "w", encoding="utf-8") as arquivo:
+            json.dump({"ids": ids, "textos": textos, "metadados": metadados}, arquivo, ensure_ascii=False)
+        os.replace(f"{caminho_metadados}.tmp", caminho_metadados)
+        
+        self._novos.clear()
+        self._excluidos.clear()
+        self._carregar()
+    
+    def buscar(self, vetor: list, k: int = 4) -> list:
+        if self._vetores is None:
+            return []
+        
+        consulta = np.asarray(vetor, dtype=np.float32)
+        norma = np.linalg.norm(consulta)
+        if norma:
+            consulta /= norma
+        
+        scores = self._vetores @ consulta
+        k = min(k, len(scores))
+        melhores = np.argpartition(-scores, k - 1)[:k]
+        melhores = melhores[np.argsort(-scores[melhores])]
+        
+        return [
+            Documento(self._textos[posicao], self._metadados[posicao], float(scores[posicao]))
+            for posicao in melhores
+        ]
+    
+    def documentos(self) -> tuple:
+        return list(self._textos), list(self._metadados)
+    
+    def similarity_search_by_vector(self, embedding: list, k: int = 4) -> list:
+        return self.buscar(embedding, k)
+    
+    def similarity_search(self, query: str, k: int = 4) -> list:
+        return self.buscar(self.embeddings.embed_query(query), k)
+
+
+def _medir(backend: str, diretorio: str, dimensao: int, consultas: int, k: int):
+    inicio = time.perf_counter()
+    if backend == "numpy":
+        indice = IndiceNumpy(diretorio, criar=False)
+    else:
+        from langchain_community.vectorstores import Chroma
+        indice = Chroma(persist_directory=diretorio, embedding_function=EmbeddingsFalsos(dimensao))
+    
+    gerador = np.random.default_rng(1)
+    primeira = gerador.standard_normal(dimensao).tolist()
+    indice.similarity_search_by_vector(primeira, k=k)
+    cold_start = time.perf_counter() - inicio
+    
+    latencias = []
+    for _ in range(consultas):
+        vetor = gerador.standard_normal(dimensao).tolist()
+        inicio = time.perf_counter()
+        indice.similarity_search_by_vector(vetor, k=k)
+        latencias.append(time.perf_counter() - inicio)
+    
+    latencias.sort()
+    print(json.dumps({
+        "cold_start_ms": round(cold_start * 1000, 1),
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 3),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95)] * 1000, 3),
+        "rss_mb": memoria_pico_mb()
+    }))
+
+
+def _popular(backend: str, diretorio: str, vetores: np.ndarray):
+    ids = [f"chunk-{indice}" for indice in range(len(vetores))]
+    textos = [f"Trecho {indice} sobre valores, convênios e horários" for indice in range(len(vetores))]
+    metadados = [{"source": "benchmark", "page": indice} for indice in range(len(vetores))]
+    
+    if backend == "numpy":
+        indice = IndiceNumpy(diretorio)
+        indice.upsert(ids, textos, vetores, metadados)
+        indice.persistir()
+        return
+    
+    from langchain_community.vectorstores import Chroma
+    colecao = Chroma(persist_directory=diretorio)._collection
+    for inicio in range(0, len(ids), 1000):
+        fim = inicio + 1000
+        colecao.upsert(
+            ids=ids[inicio:fim],
+            documents=textos[inicio:fim],
+            embeddings=vetores[inicio:fim].tolist(),
+            metadatas=metadados[inicio:fim]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o índice NumPy com o Chroma")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dimensao", type=int, default=1536)
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--medir", choices=["numpy", "chroma"], help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.medir:
+        _medir(args.medir, args.diretorio, args.dimensao, args.consultas, args.k)
+        return
+    
+    vetores = np.random.default_rng(0).standard_normal((args.chunks, args.dimensao)).astype(np.float32)
+    print(f"{args.chunks} chunks, dimensão {args.dimensao}, {args.consultas} consultas top-{args.k}")
+    
+    with tempfile.TemporaryDirectory() as raiz:
+        for backend in ("numpy", "chroma"):
+            diretorio = os.path.join(raiz, backend)
+            try:
+                _popular(backend, diretorio, vetores)
+            except ImportError:
+                print(f"{backend}: não instalado, ignorado")
+                continue
+            
+            resultado = subprocess.run(
+                [
+                    sys.executable, "-m", "services.indice_numpy",
+                    "--medir", backend, "--diretorio", diretorio,
+                    "--dimensao", str(args.dimensao), "--consultas", str(args.consultas), "-k", str(args.k)
+                ],
+                capture_output=True, text=True, check=True
+            )
+            metricas = json.loads(resultado.stdout.strip().splitlines()[-1])
+            print(
+                f"{backend}: cold start {metricas['cold_start_ms']} ms, "
+                f"p50 {metricas['p50_ms']} ms, p95 {metricas['p95_ms']} ms, RSS {metricas['rss_mb']} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from services.google_calendar_service import (
+    create_calendar_event,
+    delete_calendar_event,
+    update_calendar_event
+)
+from services.trello_service import (
+    create_trello_card,
+    archive_trello_card,
+    update_trello_card,
+    montar_descricao_card,
+    buscar_card_por_agendamento
+)
+from services.outbox_service import OutboxWorker, registrar_evento
+from config import get_settings
+
+settings = get_settings()
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.integracao_workers,
+    thread_name_prefix="integracao"
+)
+
+
+def executar_em_paralelo(chamadas: dict) -> dict:
+    futuros = {nome: _executor.submit(chamada) for nome, chamada in chamadas.items()}
+    
+    resultados = {}
+    for nome, futuro in futuros.items():
+        try:
+            resultado = futuro.result()
+            resultados[nome] = {
+                "success": resultado is not False,
+                "resultado": resultado,
+                "erro": None if resultado is not False else "A chamada retornou falha"
+            }
+        except Exception as e:
+            resultados[nome] = {"success": False, "resultado": None, "erro": str(e)}
+    
+    return resultados
+
+
+def referencia_card(agendamento_id: int) -> str:
+    return f"Agendamento #{agendamento_id}"
+
+
+def _evento_calendar_id(chave: str) -> str:
+    return hashlib.sha1(chave.encode()).hexdigest()
+
+
+def _calendar_criar(evento: dict) -> dict:
+    agendamento = evento["agendamento"]
+    if not agendamento or agendamento["calendar_event_id"]:
+        return {}
+    
+    payload = evento["payload"]
+    criado = create_calendar_event(
+        title=payload["title"],
+        start_datetime=datetime.fromisoformat(payload["start_datetime"]),
+        end_datetime=datetime.fromisoformat(payload["end_datetime"]),
+        description=payload.get("description"),
+        attendee_email=payload.get("attendee_email"),
+        event_id=_evento_calendar_id(evento["chave"])
+    )
+    
+    return {
+        "agendamento": {"calendar_event_id": criado["event_id"]},
+        "eventos": [{
+            "tipo": "trello.vincular",
+            "chave": f"trello.vincular:{agendamento['id']}:{criado['event_id']}",
+            "payload": {**payload, "calendar_event_link": criado.get("event_link")}
+        }] if criado.get("event_link") else []
+    }
+
+
+def _calendar_atualizar(evento: dict):
+    agendamento = evento["agendamento"]
+    if not agendamento or not agendamento["calendar_event_id"]:
+        return {}
+    
+    payload = evento["payload"]
+    atualizado = update_calendar_event(
+        event_id=agendamento["calendar_event_id"],
+        start_datetime=datetime.fromisoformat(payload["start_datetime"]),
+        end_datetime=datetime.fromisoformat(payload["end_datetime"])
+    )
+    if not atualizado:
+        raise RuntimeError("Falha ao atualizar evento no Google Calendar")
+    return {}
+
+
+def _calendar_excluir(evento: dict):
+    agendamento = evento["agendamento"]
+    if not agendamento or not agendamento["calendar_event_id"]:
+        return {}
+    
+    if not delete_calendar_event(agendamento["calendar_event_id"]):
+        raise RuntimeError("Falha ao excluir evento no Google Calendar")
+    return {}
+
+
+def _trello_criar(evento: dict) -> dict:
+    agendamento = evento["agendamento"]
+    if not agendamento or agendamento["trello_card_id"]:
+        return {}
+    
+    payload = evento["payload"]
+    referencia = referencia_card(agendamento['id'])
+    
+    card = None
+    if evento["tentativas"] > 0:
+        card = buscar_card_por_agendamento(agendamento['id'])
+    
+    if card is None:
+        card = create_trello_card(
+            title=payload["title"],
+            description=f"{payload['trello_description']}\n{referencia}",
+            start_datetime=datetime.fromisoformat(payload["start_datetime"]),
+            due_datetime=datetime.fromisoformat(payload["end_datetime"])
+        )
+    
+    return {"agendamento": {"trello_card_id": card["card_id"]}}
+
+
+def _trello_vincular(evento: dict):
+    agendamento = evento["agendamento"]
+    if not agendamento or not agendamento["trello_card_id"]:
+        return {}
+    
+    payload = evento["payload"]
+    atualizado = update_trello_card(
+        agendamento["trello_card_id"],
+        description=montar_descricao_card(
+            f"{payload['trello_description']}\n{referencia_card(agendamento['id'])}",
+            datetime.fromisoformat(payload["start_datetime"]),
+            datetime.fromisoformat(payload["end_datetime"]),
+            payload["calendar_event_link"]
+        )
+    )
+    if not atualizado:
+        raise RuntimeError("Falha ao vincular o evento ao card do Trello")
+    return {}
+
+
+def _trello_atualizar(evento: dict):
+    agendamento = evento["agendamento"]
+    if not agendamento or not agendamento["trello_card_id"]:
+        return {}
+    
+    atualizado = update_trello_card(
+        card_id=agendamento["trello_card_id"],
+        due_datetime=datetime.fromisoformat(evento["payload"]["end_datetime"])
+    )
+    if not atualizado:
+        raise RuntimeError("Falha ao atualizar card do Trello")
+    return {}
+
+
+def _trello_arquivar(evento: dict):
+    agendamento = evento["agendamento"]
+    if not agendamento or not agendamento["trello_card_id"]:
+        return {}
+    
+    if not archive_trello_card(agendamento["trello_card_id"]):
+        raise RuntimeError("Falha ao arquivar card do Trello")
+    return {}
+
+
+HANDLERS = {
+    "calendar.criar": _calendar_criar,
+    "calendar.atualizar": _calendar_atualizar,
+    "calendar.excluir": _calendar_excluir,
+    "trello.criar": _trello_criar,
+    "trello.vincular": _trello_vincular,
+    "trello.atualizar": _trello_atualizar,
+    "trello.arquivar": _trello_arquivar
+}
+
+outbox_worker = OutboxWorker(HANDLERS, executar_em_paralelo)
+
+
+def registrar_novo_agendamento(
+    db,
+    agendamento,
+    title: str,
+    calendar_description: str = None,
+    trello_description: str = None,
+    attendee_email: str = None
+):
+    payload = {
+        "title": title,
+        "start_datetime": agendamento.data_hora.isoformat(),
+        "end_datetime": (agendamento.data_hora + timedelta(hours=1)).isoformat(),
+        "description": calendar_description,
+        "trello_description": trello_description or "",
+        "attendee_email": attendee_email
+    }
+    
+    registrar_evento(db, "calendar.criar", f"calendar.criar:{agendamento.id}", agendamento.id, payload)
+    registrar_evento(db, "trello.criar", f"trello.criar:{agendamento.id}", agendamento.id, payload)
+
+
+def registrar_remarcacao(db, agendamento):
+    payload = {
+        "start_datetime": agendamento.data_hora.isoformat(),
+        "end_datetime": (agendamento.data_hora + timedelta(hours=1)).isoformat()
+    }
+    versao = agendamento.num_remarcacoes
+    
+    registrar_evento(db, "calendar.atualizar", f"calendar.atualizar:{agendamento.id}:{versao}", agendamento.id, payload)
+    registrar_evento(db, "trello.atualizar", f"trello.atualizar:{agendamento.id}:{versao}", agendamento.id, payload)
+
+
+def registrar_cancelamento(db, agendamento):
+    registrar_evento(db, "calendar.excluir", f"calendar.excluir:{agendamento.id}", agendamento.id)
+    registrar_evento(db, "trello.arquivar", f"trello.arquivar:{agendamento.id}", agendamento.id)
+
+
+def get_outbox_metrics() -> dict:
+    return outbox_worker.get_metrics()
@@ -0,0 +1,52 @@
+import re
+from datetime import datetime
+from services.date_parser import parse_data_hora
+
+REGRAS = [
+    (re.compile(r'^(?:sim|s|ok|okay|pode ser|pode|quero|confirmo|isso|claro|beleza|fechado|certo|perfeito|combinado)(?: sim)?$'), 'confirm', 0.95),
+    (re.compile(r'^(?:n[ãa]o|n|desisto|deixa pra l[áa]|esquece)(?: obrigad[oa])?$'), 'cancel', 0.95),
+    (re.compile(r'^(?:oi+|ol[áa]|opa|e a[ií]|bom dia|boa tarde|boa noite)$'), 'greeting', 0.9),
+    (re.compile(r'^\d{1,2}$'), 'other', 0.9),
+    (re.compile(r'^(?:quero |preciso |gostaria de )?(?:cancelar|desmarcar)(?: (?:a |minha )?consulta)?$'), 'cancel_appointment', 0.9),
+    (re.compile(r'^(?:quero |preciso |gostaria de )?(?:remarcar|reagendar|mudar)(?: (?:a |minha )?consulta)?$'), 'reschedule_appointment', 0.9),
+    (re.compile(r'^(?:quero |preciso |gostaria de )?(?:agendar|marcar)(?: (?:uma )?consulta)?$'), 'create_appointment', 0.9),
+    (re.compile(r'^(?:quais (?:os )?|tem |ver (?:os )?)?(?:hor[áa]rios?|vagas?)(?: dispon[íi]ve(?:l|is))?$'), 'check_availability', 0.85)
+]
+
+
+def _resultado(intent: str, confidence: float, extracted_data: dict = None) -> dict:
+    return {
+        "intent": intent,
+        "confidence": confidence,
+        "extracted_data": extracted_data or {},
+        "reasoning": "Classificado por regra local"
+    }
+
+
+def classify_intent(mensagem: str, now: datetime = None) -> dict:
+    if now is None:
+        now = datetime.now()
+    
+    for regra, intent, confidence in REGRAS:
+        if regra.match(mensagem):
+            return _resultado(intent, confidence)
+    
+    data_hora = parse_data_hora(mensagem, now)
+    if data_hora and data_hora['completo']:
+        if data_hora['data'] and data_hora['hora']:
+            return _resultado(
+                'provide_datetime',
+                0.9,
+                {"start_datetime": data_hora['start_datetime']}
+            )
+        
+        if data_hora['data']:
+            return _resultado(
+                'check_availability',
+                0.9,
+                {"start_datetime": data_hora['start_datetime']}
+            )
+        
+        return _resultado('provide_datetime', 0.5)
+    
+    return _resultado('other', 0.0)
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import deque
+
+
+class MessageDispatcher:
+    
+    def __init__(self, num_workers: int = 8, max_pending: int = 200):
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._chats = {}
+        self._ready = deque()
+        self._pending = 0
+        self._running = False
+        self._workers = []
+        
+        self._counters = {
+            "submitted": 0,
+            "processed": 0,
+            "failed": 0,
+            "rejected": 0
+        }
+        self._latencies = {}
+    
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"whatsapp-worker-{i}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+    
+    def stop(self, timeout: float = None):
+        with self._lock:
+            self._running = False
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+    
+    def submit(self, chat_key: str, job, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        with self._lock:
+            while self._running and self._pending >= self.max_pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._counters["rejected"] += 1
+                    return False
+                self._not_full.wait(remaining)
+            
+            if not self._running:
+                self._counters["rejected"] += 1
+                return False
+            
+            queue = self._chats.get(chat_key)
+            if queue is None:
+                queue = deque()
+                self._chats[chat_key] = queue
+                self._ready.append(chat_key)
+                self._not_empty.notify()
+            
+            queue.append((job, time.monotonic()))
+            self._pending += 1
+            self._counters["submitted"] += 1
+            return True
+    
+    def record_latency(self, stage: str, seconds: float):
+        with self._lock:
+            stats = self._latencies.get(stage)
+            if stats is None:
+                stats = {"count": 0, "total": 0.0, "max": 0.0}
+                self._latencies[stage] = stats
+            
+            stats["count"] += 1
+            stats["total"] += seconds
+            if seconds > stats["max"]:
+                stats["max"] = seconds
+    
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._pending,
+                "active_chats": len(self._chats),
+                "max_pending": self.max_pending,
+                "workers": self.num_workers,
+                **self._counters,
+                "latency": {
+                    stage: {
+                        "count": stats["count"],
+                        "avg_ms": round(stats["total"] / stats["count"] * 1000, 2),
+                        "max_ms": round(stats["max"] * 1000, 2)
+                    }
+                    for stage, stats in self._latencies.items()
+                }
+            }
+    
+    def _worker_loop(self):
+        while True:
+            with self._lock:
+                while self._running and not self._ready:
+                    self._not_empty.wait()
+                
+                if not self._running:
+                    return
+                
+                chat_key = self._ready.popleft()
+                job, enqueued_at = self._chats[chat_key][0]
+            
+            self.record_latency("queue_wait", time.monotonic() - enqueued_at)
+            
+            try:
+                job()
+                counter = "processed"
+            except Exception:
+                counter = "failed"
+            self.record_latency("total", time.monotonic() - enqueued_at)
+            
+            with self._lock:
+                self._counters[counter] += 1
+                
+                queue = self._chats[chat_key]
+                queue.popleft()
+                self._pending -= 1
+                
+                if queue:
+                    self._ready.append(chat_key)
+                    self._not_empty.notify()
+                else:
+                    del self._chats[chat_key]
+                
+                self._not_full.notify()
@@ -1,23 +1,119 @@
 from openai import OpenAI
+from cachetools import TTLCache
 from config import get_settings
+from services.intent_classifier import classify_intent
+from services.date_parser import aplicar_data_local
 from datetime import datetime, timedelta
+import copy
 import json
+import re
+import threading
+import time
 
 settings = get_settings()
 client = OpenAI(api_key=settings.openai_api_key)
 
+CONTEXT_CACHE_FIELDS = ('especialidade_nome', 'nome', 'email', 'telefone')
+
+_intent_cache = TTLCache(
+    maxsize=settings.intent_cache_size,
+    ttl=settings.intent_cache_ttl_seconds
+)
+_intent_cache_lock = threading.Lock()
+_intent_stats = {
+    "hits": 0,
+    "misses": 0,
+    "fast_path": 0,
+    "llm_calls": 0,
+    "llm_seconds": 0.0,
+    "saved_seconds": 0.0
+}
+
+
+def normalizar_mensagem(user_message: str) -> str:
+    texto = re.sub(r'\s+', ' ', user_message.lower()).strip()
+    return texto.strip('.!?, ')
+
+
+def _intent_cache_key(mensagem: str, context: dict, history: list) -> tuple:
+    ultima_resposta = None
+    for msg in reversed(history or []):
+        if msg['role'] == 'assistant':
+            ultima_resposta = msg['content']
+            break
+    
+    return (
+        mensagem,
+        context.get('step', 'início'),
+        tuple(context.get(field) for field in CONTEXT_CACHE_FIELDS),
+        ultima_resposta,
+        datetime.now().strftime('%Y-%m-%d %H')
+    )
+
+
+def _economia_estimada() -> float:
+    if not _intent_stats["llm_calls"]:
+        return 0.0
+    return _intent_stats["llm_seconds"] / _intent_stats["llm_calls"]
+
+
+def get_intent_cache_stats() -> dict:
+    with _intent_cache_lock:
+        consultas = _intent_stats["hits"] + _intent_stats["misses"] + _intent_stats["fast_path"]
+        evitadas = _intent_stats["hits"] + _intent_stats["fast_path"]
+        return {
+            **_intent_stats,
+            "cache_size": len(_intent_cache),
+            "hit_ratio": round(evitadas / consultas, 4) if consultas else 0.0,
+            "fast_path_ratio": round(_intent_stats["fast_path"] / consultas, 4) if consultas else 0.0
+        }
+
 
 def detect_intent_and_extract(user_message: str, context: dict = None, history: list = None) -> dict:
     if context is None:
         context = {}
     
+    mensagem = normalizar_mensagem(user_message)
+    
+    resultado_local = classify_intent(mensagem)
+    if resultado_local['confidence'] >= settings.intent_fast_path_threshold:
+        with _intent_cache_lock:
+            _intent_stats["fast_path"] += 1
+            _intent_stats["saved_seconds"] += _economia_estimada()
+        return resultado_local
+    
+    chave = _intent_cache_key(mensagem, context, history)
+    with _intent_cache_lock:
+        resultado = _intent_cache.get(chave)
+        if resultado is not None:
+            _intent_stats["hits"] += 1
+            _intent_stats["saved_seconds"] += _economia_estimada()
+            return copy.deepcopy(resultado)
+        _intent_stats["misses"] += 1
+    
+    inicio = time.monotonic()
+    resultado = _detect_intent_llm(user_message, context, history)
+    duracao = time.monotonic() - inicio
+    
+    aplicar_data_local(resultado['extracted_data'], mensagem)
+    
+    with _intent_cache_lock:
+        _intent_stats["llm_calls"] += 1
+        _intent_stats["llm_seconds"] += duracao
+        if resultado.get('confidence'):
+            _intent_cache[chave] = resultado
+    
+    return copy.deepcopy(resultado)
+
+
+def _detect_intent_llm(user_message: str, context: dict, history: list) -> dict:
     current_date = datetime.now()
     step = context.get('step', 'início')
     
     historico_formatado = ""
     if history and len(history) > 0:
         historico_formatado = "\n\nHISTÓRICO DA CONVERSA (últimas mensagens):\n"
-        for msg in history[-10:]:
+        for msg in list(history)[-10:]:
             role = "Cliente" if msg['role'] == 'user' else "Assistente"
             historico_formatado += f"{role}: {msg['content']}\n"
     
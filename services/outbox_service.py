@@ -0,0 +1,326 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, or_
+from database.database import SessionLocal
+from database.models import Agendamento, EventoOutbox
+from config import get_settings
+
+settings = get_settings()
+
+STATUS_PENDENTE = "pendente"
+STATUS_PROCESSANDO = "processando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_FALHOU = "falhou"
+
+
+def registrar_evento(db, tipo: str, chave: str, agendamento_id: int = None, payload: dict = None):
+    evento = EventoOutbox(
+        tipo=tipo,
+        chave=chave,
+        agendamento_id=agendamento_id,
+        payload=json.dumps(payload, default=str, ensure_ascii=False) if payload else None,
+        status=STATUS_PENDENTE,
+        tentativas=0,
+        proxima_tentativa_em=datetime.utcnow()
+    )
+    db.add(evento)
+    return evento
+
+
+def calcular_backoff(tentativas: int) -> float:
+    atraso = min(
+        settings.outbox_backoff_base_seconds * (2 ** (tentativas - 1)),
+        settings.outbox_backoff_max_seconds
+    )
+    return atraso * random.uniform(0.8, 1.2)
+
+
+def _servico(tipo: str) -> str:
+    return tipo.split(".", 1)[0]
+
+
+class OutboxWorker:
+    
+    def __init__(self, handlers: dict, executar, session_factory=SessionLocal):
+        self.handlers = handlers
+        servicos = sorted({_servico(tipo) for tipo in handlers})
+        self._coluna_servico = case(
+            *[(EventoOutbox.tipo.like(f"{servico}.%"), servico) for servico in servicos],
+            else_=EventoOutbox.tipo
+        )
+        self._executar = executar
+        self._session_factory = session_factory
+        
+        self._lock = threading.Lock()
+        self._acordar = threading.Condition(self._lock)
+        self._running = False
+        self._thread = None
+        
+        self._counters = {
+            "processados": 0,
+            "falhas": 0,
+            "retentativas": 0,
+            "dead_letters": 0
+        }
+        self._concluidos = deque(maxlen=1000)
+        self._atrasos = deque(maxlen=1000)
+        self._atrasos_retentativa = deque(maxlen=1000)
+    
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        
+        db = self._session_factory()
+        try:
+            self._recuperar_processando(db)
+            db.commit()
+        finally:
+            db.close()
+        self._thread = threading.Thread(target=self._loop, name="outbox-worker", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = None):
+        with self._lock:
+            self._running = False
+            self._acordar.notify_all()
+        
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def notificar(self):
+        with self._lock:
+            self._acordar.notify()
+    
+    def _loop(self):
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+            
+            try:
+                processados = self.processar_lote()
+            except Exception as e:
+                print(f"Erro no worker do outbox: {e}")
+                processados = 0
+            
+            if processados:
+                continue
+            
+            with self._lock:
+                if self._running:
+                    self._acordar.wait(settings.outbox_poll_seconds)
+    
+    def _recuperar_processando(self, db):
+        agora = datetime.utcnow()
+        db.query(EventoOutbox).filter(
+            EventoOutbox.status == STATUS_PROCESSANDO,
+            or_(
+                EventoOutbox.reivindicado_em.is_(None),
+                EventoOutbox.reivindicado_em < agora - timedelta(seconds=settings.outbox_lease_seconds)
+            )
+        ).update(
+            {
+                "status": STATUS_PENDENTE,
+                "tentativas": EventoOutbox.tentativas + 1,
+                "proxima_tentativa_em": agora
+            },
+            synchronize_session=False
+        )
+    
+    def _reivindicar(self, db) -> list:
+        self._recuperar_processando(db)
+        
+        agora = datetime.utcnow()
+        primeiros = db.query(func.min(EventoOutbox.id)).filter(
+            EventoOutbox.status.in_([STATUS_PENDENTE, STATUS_PROCESSANDO])
+        ).group_by(EventoOutbox.agendamento_id, self._coluna_servico)
+        
+        candidatos = db.query(EventoOutbox).filter(
+            EventoOutbox.id.in_(primeiros),
+            EventoOutbox.status == STATUS_PENDENTE,
+            EventoOutbox.proxima_tentativa_em <= agora
+        ).order_by(EventoOutbox.id).limit(settings.outbox_batch_size).all()
+        
+        reivindicados = []
+        for evento in candidatos:
+            atualizados = db.query(EventoOutbox).filter(
+                EventoOutbox.id == evento.id,
+                EventoOutbox.status == STATUS_PENDENTE
+            ).update({"status": STATUS_PROCESSANDO, "reivindicado_em": agora}, synchronize_session=False)
+            if atualizados:
+                reivindicados.append(evento.id)
+        db.commit()
+        
+        if not reivindicados:
+            return []
+        
+        eventos = db.query(EventoOutbox).filter(EventoOutbox.id.in_(reivindicados)).order_by(EventoOutbox.id).all()
+        agendamentos = {
+            agendamento.id: agendamento
+            for agendamento in db.query(Agendamento).filter(
+                Agendamento.id.in_({evento.agendamento_id for evento in eventos if evento.agendamento_id})
+            )
+        }
+        
+        contextos = []
+        for evento in eventos:
+            agendamento = agendamentos.get(evento.agendamento_id)
+            contextos.append({
+                "id": evento.id,
+                "tipo": evento.tipo,
+                "chave": evento.chave,
+                "payload": json.loads(evento.payload) if evento.payload else {},
+                "tentativas": evento.tentativas,
+                "criado_em": evento.criado_em,
+                "agendamento": {
+                    "id": agendamento.id,
+                    "calendar_event_id": agendamento.calendar_event_id,
+                    "trello_card_id": agendamento.trello_card_id
+                } if agendamento else None
+            })
+        return contextos
+    
+    def _chamada(self, contexto: dict):
+        handler = self.handlers.get(contexto["tipo"])
+        if handler is None:
+            raise ValueError(f"Tipo de evento desconhecido: {contexto['tipo']}")
+        return lambda: handler(contexto)
+    
+    def processar_lote(self) -> int:
+        db = self._session_factory()
+        try:
+            contextos = self._reivindicar(db)
+        finally:
+            db.close()
+        
+        if not contextos:
+            return 0
+        
+        chamadas = {}
+        erros_preparo = {}
+        for contexto in contextos:
+            try:
+                chamadas[contexto["id"]] = self._chamada(contexto)
+            except Exception as e:
+                erros_preparo[contexto["id"]] = str(e)
+        
+        resultados = self._executar(chamadas) if chamadas else {}
+        for evento_id, erro in erros_preparo.items():
+            resultados[evento_id] = {"success": False, "resultado": None, "erro": erro}
+        
+        self._registrar_resultados(contextos, resultados)
+        return len(contextos)
+    
+    def _registrar_resultados(self, contextos: list, resultados: dict):
+        agora = datetime.utcnow()
+        db = self._session_factory()
+        try:
+            for contexto in contextos:
+                resultado = resultados[contexto["id"]]
+                evento = db.query(EventoOutbox).filter(EventoOutbox.id == contexto["id"]).first()
+                evento.tentativas += 1
+                
+                if resultado["success"]:
+                    retorno = resultado["resultado"] or {}
+                    evento.status = STATUS_CONCLUIDO
+                    evento.processado_em = agora
+                    evento.ultimo_erro = None
+                    
+                    atualizacoes = retorno.get("agendamento") if isinstance(retorno, dict) else None
+                    if atualizacoes and evento.agendamento_id:
+                        db.query(Agendamento).filter(
+                            Agendamento.id == evento.agendamento_id
+                        ).update(atualizacoes, synchronize_session=False)
+                    
+                    for novo in (retorno.get("eventos", []) if isinstance(retorno, dict) else []):
+                        registrar_evento(db, agendamento_id=evento.agendamento_id, **novo)
+                    
+                    with self._lock:
+                        self._counters["processados"] += 1
+                        self._concluidos.append(time.monotonic())
+                        self._atrasos.append((agora - contexto["criado_em"]).total_seconds())
+                        if evento.tentativas > 1:
+                            self._atrasos_retentativa.append((agora - contexto["criado_em"]).total_seconds())
+                    continue
+                
+                evento.ultimo_erro = resultado["erro"]
+                with self._lock:
+                    self._counters["falhas"] += 1
+                
+                if evento.tentativas >= settings.outbox_max_tentativas:
+                    evento.status = STATUS_FALHOU
+                    evento.processado_em = agora
+                    print(f"Evento {evento.chave} movido para dead-letter: {resultado['erro']}")
+                    with self._lock:
+                        self._counters["dead_letters"] += 1
+                else:
+                    evento.status = STATUS_PENDENTE
+                    evento.proxima_tentativa_em = agora + timedelta(seconds=calcular_backoff(evento.tentativas))
+                    with self._lock:
+                        self._counters["retentativas"] += 1
+            
+            db.commit()
+        finally:
+            db.close()
+    
+    def reprocessar(self, evento_id: int) -> bool:
+        db = self._session_factory()
+        try:
+            atualizados = db.query(EventoOutbox).filter(
+                EventoOutbox.id == evento_id,
+                EventoOutbox.status == STATUS_FALHOU
+            ).update(
+                {
+                    "status": STATUS_PENDENTE,
+                    "tentativas": 0,
+                    "proxima_tentativa_em": datetime.utcnow(),
+                    "processado_em": None
+                },
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        
+        if atualizados:
+            self.notificar()
+        return bool(atualizados)
+    
+    def get_metrics(self) -> dict:
+        agora = time.monotonic()
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics["por_minuto"] = sum(1 for instante in self._concluidos if agora - instante <= 60)
+            atrasos = sorted(self._atrasos)
+            atrasos_retentativa = sorted(self._atrasos_retentativa)
+        
+        if atrasos:
+            metrics["atraso_medio_s"] = round(sum(atrasos) / len(atrasos), 3)
+            metrics["atraso_p95_s"] = round(atrasos[min(int(len(atrasos) * 0.95), len(atrasos) - 1)], 3)
+        if atrasos_retentativa:
+            metrics["atraso_retentativa_medio_s"] = round(sum(atrasos_retentativa) / len(atrasos_retentativa), 3)
+        
+        db = self._session_factory()
+        try:
+            por_status = dict(
+                db.query(EventoOutbox.status, func.count(EventoOutbox.id)).group_by(EventoOutbox.status).all()
+            )
+            mais_antigo = db.query(func.min(EventoOutbox.criado_em)).filter(
+                EventoOutbox.status.in_([STATUS_PENDENTE, STATUS_PROCESSANDO])
+            ).scalar()
+        finally:
+            db.close()
+        
+        metrics["pendentes"] = por_status.get(STATUS_PENDENTE, 0) + por_status.get(STATUS_PROCESSANDO, 0)
+        metrics["dead_letter_total"] = por_status.get(STATUS_FALHOU, 0)
+        metrics["pendente_mais_antigo_s"] = (
+            round((datetime.utcnow() - mais_antigo).total_seconds(), 1) if mais_antigo else 0
+        )
+        return metrics
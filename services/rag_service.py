@@ -1,81 +1,462 @@
+import hashlib
+import json
 import os
+import re
+import threading
+from cachetools import LRUCache, TTLCache
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from services.catalogo_service import normalizar_nome
+from services.faq_service import buscar_resposta_faq, gerar_faq
+from services.indexacao_service import EmbeddingsFalsos, indexar_documentos
+from services.indice_bm25 import ARQUIVO_BM25, IndiceBM25
+from services.indice_numpy import Documento, IndiceNumpy
 from config import get_settings
 
 settings = get_settings()
 
 DOCUMENTS_DIR = "./documents"
 CHROMA_DIR = "./chroma_db"
+NUMPY_DIR = "./vector_index"
+PARAMETROS_INDICE = {
+    "modelo": settings.rag_embedding_model,
+    "chunk_size": 800,
+    "chunk_overlap": 100
+}
 
 vectorstore = None
+_vectorstore_lock = threading.Lock()
+_bm25 = None
+_bm25_lock = threading.Lock()
+
+_embeddings = None
+_llm = None
+_clientes_lock = threading.Lock()
+
+_versao_indice = 0
+_assinatura = None
+_marcas_indice = None
+_sincronizar_lock = threading.Lock()
+_respostas_cache = TTLCache(
+    maxsize=settings.rag_answer_cache_size,
+    ttl=settings.rag_answer_cache_ttl_seconds
+)
+_embeddings_cache = LRUCache(maxsize=settings.rag_embedding_cache_size)
+_cache_lock = threading.Lock()
+_reindex_lock = threading.Lock()
+_rag_stats = {
+    "hits_exatos": 0,
+    "hits_normalizados": 0,
+    "misses": 0,
+    "embeddings_hits": 0,
+    "embeddings_misses": 0,
+    "invalidacoes": 0,
+    "buscas_lexicas": 0,
+    "buscas_hibridas": 0,
+    "buscas_vetoriais": 0
+}
 
 
 def get_embeddings():
-    return OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        openai_api_key=settings.openai_api_key
+    global _embeddings
+    
+    if _embeddings is None:
+        with _clientes_lock:
+            if _embeddings is None:
+                if settings.rag_embedding_model == "falso":
+                    _embeddings = EmbeddingsFalsos()
+                else:
+                    _embeddings = OpenAIEmbeddings(
+                        model=settings.rag_embedding_model,
+                        openai_api_key=settings.openai_api_key
+                    )
+    return _embeddings
+
+
+def get_llm():
+    global _llm
+    
+    if _llm is None:
+        with _clientes_lock:
+            if _llm is None:
+                _llm = ChatOpenAI(
+                    model="gpt-4o-mini",
+                    openai_api_key=settings.openai_api_key,
+                    temperature=0.3,
+                    max_tokens=400
+                )
+    return _llm
+
+
+def normalizar_pergunta(question: str) -> str:
+    texto = re.sub(r'[^\w\s]', ' ', normalizar_nome(question))
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def invalidar_cache_rag():
+    global _versao_indice, _assinatura
+    
+    with _cache_lock:
+        _versao_indice += 1
+        _assinatura = None
+        _respostas_cache.clear()
+        _rag_stats["invalidacoes"] += 1
+
+
+def _buscar_resposta_cache(question: str, context_step: str):
+    with _cache_lock:
+        resposta = _respostas_cache.get(("exata", _versao_indice, context_step, question))
+        if resposta is not None:
+            _rag_stats["hits_exatos"] += 1
+            return resposta
+        
+        resposta = _respostas_cache.get(("normalizada", _versao_indice, context_step, normalizar_pergunta(question)))
+        if resposta is not None:
+            _rag_stats["hits_normalizados"] += 1
+            return resposta
+        
+        _rag_stats["misses"] += 1
+        return None
+
+
+def _guardar_resposta_cache(question: str, context_step: str, versao: int, resposta: dict):
+    with _cache_lock:
+        if versao != _versao_indice:
+            return
+        _respostas_cache[("exata", versao, context_step, question)] = resposta
+        _respostas_cache[("normalizada", versao, context_step, normalizar_pergunta(question))] = resposta
+
+
+def _embedding_pergunta(question: str) -> list:
+    with _cache_lock:
+        embedding = _embeddings_cache.get(question)
+        if embedding is not None:
+            _rag_stats["embeddings_hits"] += 1
+            return embedding
+        _rag_stats["embeddings_misses"] += 1
+    
+    embedding = get_embeddings().embed_query(question)
+    
+    with _cache_lock:
+        _embeddings_cache[question] = embedding
+    return embedding
+
+
+def get_rag_cache_stats() -> dict:
+    with _cache_lock:
+        consultas = _rag_stats["hits_exatos"] + _rag_stats["hits_normalizados"] + _rag_stats["misses"]
+        hits = _rag_stats["hits_exatos"] + _rag_stats["hits_normalizados"]
+        return {
+            **_rag_stats,
+            "versao_indice": _versao_indice,
+            "respostas_em_cache": len(_respostas_cache),
+            "embeddings_em_cache": len(_embeddings_cache),
+            "hit_ratio": round(hits / consultas, 4) if consultas else 0.0
+        }
+
+
+def _diretorio_indice() -> str:
+    return NUMPY_DIR if settings.rag_vector_backend == "numpy" else CHROMA_DIR
+
+
+def assinatura_indice() -> str:
+    global _assinatura
+    
+    if _assinatura is None:
+        try:
+            with open(os.path.join(_diretorio_indice(), "manifest.json"), encoding="utf-8") as arquivo:
+                manifesto = json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return None
+        conteudo = json.dumps([manifesto["parametros"], manifesto["arquivos"]], sort_keys=True)
+        _assinatura = hashlib.sha256(conteudo.encode()).hexdigest()
+    return _assinatura
+
+
+def _marcas_arquivos() -> tuple:
+    marcas = []
+    for nome in ("manifest.json", ARQUIVO_BM25):
+        try:
+            marcas.append(os.stat(os.path.join(_diretorio_indice(), nome)).st_mtime_ns)
+        except FileNotFoundError:
+            marcas.append(None)
+    return tuple(marcas)
+
+
+def _registrar_marcas() -> tuple:
+    global _assinatura
+    
+    marcas = _marcas_arquivos()
+    with _cache_lock:
+        _assinatura = None
+    return (*marcas, assinatura_indice())
+
+
+def sincronizar_indice():
+    global _marcas_indice, _bm25
+    
+    with _sincronizar_lock:
+        if _marcas_indice is not None and _marcas_arquivos() == _marcas_indice[:2]:
+            return
+        anteriores = _marcas_indice
+        _marcas_indice = _registrar_marcas()
+        atuais = _marcas_indice
+    
+    if anteriores is None:
+        return
+    
+    if atuais[1] != anteriores[1]:
+        with _bm25_lock:
+            _bm25 = None
+    
+    if atuais[2] != anteriores[2]:
+        if settings.rag_vector_backend == "numpy":
+            _reabrir_vectorstore()
+        invalidar_cache_rag()
+
+
+def _abrir_chroma():
+    from langchain_community.vectorstores import Chroma
+    
+    return Chroma(
+        persist_directory=CHROMA_DIR,
+        embedding_function=get_embeddings()
     )
+    
 
+def _abrir_vectorstore():
+    if settings.rag_vector_backend == "numpy":
+        return IndiceNumpy(NUMPY_DIR, embeddings=get_embeddings(), criar=False)
+    return _abrir_chroma()
 
-def load_and_index_documents():
+
+def get_vectorstore():
     global vectorstore
     
-    if not settings.openai_api_key:
-        return {"success": False, "message": "OPENAI_API_KEY não configurada"}
+    indice = vectorstore
+    if indice is None:
+        with _vectorstore_lock:
+            if vectorstore is None:
+                vectorstore = _abrir_vectorstore()
+            indice = vectorstore
+    return indice
+
+
+def _reabrir_vectorstore():
+    global vectorstore
+    
+    try:
+        indice = _abrir_vectorstore()
+    except Exception:
+        return
+    
+    with _vectorstore_lock:
+        vectorstore = indice
+
+
+class DestinoChroma:
+    
+    def __init__(self):
+        self.store = _abrir_chroma()
+    
+    def recriar(self):
+        self.store.delete_collection()
+        self.store = _abrir_chroma()
+    
+    def upsert(self, ids: list, textos: list, vetores: list, metadados: list):
+        self.store._collection.upsert(
+            ids=ids,
+            documents=textos,
+            embeddings=vetores,
+            metadatas=metadados
+        )
+    
+    def excluir(self, ids: list):
+        self.store.delete(ids=ids)
+    
+    def persistir(self):
+        pass
+
+    def documentos(self) -> tuple:
+        dados = self.store.get(include=["documents", "metadatas"])
+        return dados["documents"], dados["metadatas"]
+
+
+def _abrir_destino():
+    if settings.rag_vector_backend == "numpy":
+        return IndiceNumpy(NUMPY_DIR, embeddings=get_embeddings())
+    return DestinoChroma()
+
+
+def _construir_bm25(destino) -> IndiceBM25:
+    textos, metadados = destino.documentos()
+    indice = IndiceBM25().construir(textos, metadados)
+    if len(indice):
+        indice.salvar(_diretorio_indice())
+    return indice
+
+
+def get_bm25() -> IndiceBM25:
+    global _bm25
     
-    documents = []
-    for filename in os.listdir(DOCUMENTS_DIR):
-        if filename.endswith(".pdf"):
-            filepath = os.path.join(DOCUMENTS_DIR, filename)
-            loader = PyPDFLoader(filepath)
-            documents.extend(loader.load())
+    if _bm25 is None:
+        with _bm25_lock:
+            if _bm25 is None:
+                try:
+                    _bm25 = IndiceBM25.carregar(_diretorio_indice())
+                except FileNotFoundError:
+                    _bm25 = _construir_bm25(_abrir_destino())
+    return _bm25
+
+
+def _lexico_confiavel(lexicos: list, cobertura: float, margem: float) -> bool:
+    return bool(lexicos) and cobertura >= settings.rag_bm25_cobertura and margem >= settings.rag_bm25_margem
+
+
+def usa_atalho_lexical(question: str) -> bool:
+    if settings.rag_modo_busca != "hibrido":
+        return settings.rag_modo_busca == "lexical"
+    return _lexico_confiavel(*get_bm25().buscar(question, 2))
+
+
+def recuperar_trechos(question: str, k: int, modo: str = None) -> list:
+    modo = modo or settings.rag_modo_busca
+    candidatos = max(k * 3, 10)
+    
+    if modo == "vetorial":
+        with _cache_lock:
+            _rag_stats["buscas_vetoriais"] += 1
+        return get_vectorstore().similarity_search_by_vector(_embedding_pergunta(question), k=k)
+    
+    bm25 = get_bm25()
+    lexicos, cobertura, margem = bm25.buscar(question, candidatos)
     
-    if not documents:
-        return {"success": False, "message": "Nenhum PDF encontrado na pasta documents/"}
+    if modo == "lexical" or _lexico_confiavel(lexicos, cobertura, margem):
+        with _cache_lock:
+            _rag_stats["buscas_lexicas"] += 1
+        return [
+            Documento(bm25.textos[posicao], bm25.metadados[posicao], score)
+            for posicao, score in lexicos[:k]
+        ]
     
+    with _cache_lock:
+        _rag_stats["buscas_hibridas"] += 1
+    densos = get_vectorstore().similarity_search_by_vector(_embedding_pergunta(question), k=candidatos)
+    
+    scores = {}
+    documentos = {}
+    for rank, doc in enumerate(densos):
+        scores[doc.page_content] = scores.get(doc.page_content, 0.0) + 1 / (settings.rag_rrf_k + rank + 1)
+        documentos.setdefault(doc.page_content, doc)
+    for rank, (posicao, _) in enumerate(lexicos):
+        texto = bm25.textos[posicao]
+        scores[texto] = scores.get(texto, 0.0) + 1 / (settings.rag_rrf_k + rank + 1)
+        documentos.setdefault(texto, Documento(texto, bm25.metadados[posicao]))
+    
+    melhores = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documentos[texto] for texto in melhores]
+
+
+def _dividir_pdf(filepath: str, filename: str):
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,
-        chunk_overlap=100,
+        chunk_size=PARAMETROS_INDICE["chunk_size"],
+        chunk_overlap=PARAMETROS_INDICE["chunk_overlap"],
         separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
     )
-    chunks = splitter.split_documents(documents)
+    for pagina in PyPDFLoader(filepath).lazy_load():
+        yield from splitter.split_documents([pagina])
+
+
+def load_and_index_documents():
+    global vectorstore, _bm25, _marcas_indice
     
-    embeddings = get_embeddings()
+    if not settings.openai_api_key and settings.rag_embedding_model != "falso":
+        return {"success": False, "message": "OPENAI_API_KEY não configurada"}
     
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=CHROMA_DIR
-    )
+    with _reindex_lock:
+        arquivos = {
+            filename: os.path.join(DOCUMENTS_DIR, filename)
+            for filename in os.listdir(DOCUMENTS_DIR)
+            if filename.endswith(".pdf")
+        }
+        if not arquivos:
+            return {"success": False, "message": "Nenhum PDF encontrado na pasta documents/"}
+    
+        destino = _abrir_destino()
+        
+        try:
+            relatorio = indexar_documentos(
+                arquivos,
+                os.path.join(_diretorio_indice(), "manifest.json"),
+                PARAMETROS_INDICE,
+                destino,
+                get_embeddings(),
+                _dividir_pdf
+            )
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Indexação interrompida, o progresso foi salvo: {str(e)}"
+            }
+        
+        if relatorio["recriado"] or relatorio["chunks_novos"] or relatorio["chunks_removidos"]:
+            with _vectorstore_lock:
+                vectorstore = destino if settings.rag_vector_backend == "numpy" else destino.store
+            with _bm25_lock:
+                _bm25 = _construir_bm25(destino)
+            invalidar_cache_rag()
+        
+        with _sincronizar_lock:
+            _marcas_indice = _registrar_marcas()
     
-    return {
-        "success": True, 
-        "message": f"Indexados {len(chunks)} chunks"
-    }
+        total = relatorio["chunks_mantidos"] + relatorio["chunks_novos"]
+        return {
+            "success": True, 
+            "message": (
+                f"Indexados {total} chunks ({relatorio['chunks_novos']} novos, "
+                f"{relatorio['chunks_removidos']} removidos)"
+            ),
+            **relatorio
+        }
 
 
 def ask_question(question: str, context_step: str = None) -> dict:
-    global vectorstore
-    
     if not settings.openai_api_key:
         return {"success": False, "answer": "OPENAI_API_KEY não configurada"}
     
-    if vectorstore is None:
-        try:
-            embeddings = get_embeddings()
-            vectorstore = Chroma(
-                persist_directory=CHROMA_DIR,
-                embedding_function=embeddings
-            )
-        except:
-            return {
-                "success": False, 
-                "answer": "Base de conhecimento não encontrada. Reindexe os documentos."
-            }
+    sincronizar_indice()
+    try:
+        get_vectorstore()
+    except:
+        return {
+            "success": False, 
+            "answer": "Base de conhecimento não encontrada. Reindexe os documentos."
+        }
+    
+    resposta_cache = _buscar_resposta_cache(question, context_step)
+    if resposta_cache is not None:
+        return resposta_cache
+    versao = _versao_indice
+    
+    if settings.faq_habilitado and context_step != "aguardando_especialidade":
+        resposta_faq = buscar_resposta_faq(
+            question,
+            normalizar_pergunta(question),
+            _diretorio_indice(),
+            assinatura_indice(),
+            None if usa_atalho_lexical(question) else _embedding_pergunta
+        )
+        if resposta_faq is not None:
+            return resposta_faq
     
+    resposta = gerar_resposta(question, context_step)
+    if resposta["success"]:
+        _guardar_resposta_cache(question, context_step, versao, resposta)
+    return resposta
+
+
+def gerar_resposta(question: str, context_step: str = None) -> dict:
     pergunta_lower = question.lower()
     
     is_especialidades = any(word in pergunta_lower for word in [
@@ -95,7 +476,7 @@ def ask_question(question: str, context_step: str = None) -> dict:
     ])
     
     k = 6 if is_especialidades else 3
-    docs = vectorstore.similarity_search(question, k=k)
+    docs = recuperar_trechos(question, k)
     
     if not docs:
         return {
@@ -190,16 +571,9 @@ INSTRUÇÕES:
 
 RESPOSTA:"""
     
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        openai_api_key=settings.openai_api_key,
-        temperature=0.3,
-        max_tokens=400
-    )
-    
     try:
-        response = llm.invoke(prompt)
-        
+        response = get_llm().invoke(prompt)
+    
         return {
             "success": True, 
             "answer": response.content,
@@ -216,17 +590,28 @@ RESPOSTA:"""
         }
 
 
-def search_similar_content(query: str, k: int = 5) -> list:
-    global vectorstore
+def gerar_faq_canonico() -> dict:
+    assinatura = assinatura_indice()
+    if assinatura is None:
+        return {"success": False, "message": "Índice não encontrado. Reindexe os documentos antes de gerar o FAQ."}
     
-    if vectorstore is None:
-        embeddings = get_embeddings()
-        vectorstore = Chroma(
-            persist_directory=CHROMA_DIR,
-            embedding_function=embeddings
-        )
+    get_vectorstore()
+    
+    relatorio = gerar_faq(
+        _diretorio_indice(),
+        assinatura,
+        gerar_resposta,
+        get_embeddings(),
+        normalizar_pergunta
+    )
+    return {"success": True, **relatorio}
+
+
+def search_similar_content(query: str, k: int = 5) -> list:
+    sincronizar_indice()
+    get_vectorstore()
     
-    docs = vectorstore.similarity_search(query, k=k)
+    docs = recuperar_trechos(query, k)
     
     return [
         {
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from database.models import ReservaHorario
+from config import get_settings
+
+settings = get_settings()
+
+STATUS_RESERVADO = "reservado"
+STATUS_CONFIRMADO = "confirmado"
+
+
+def _filtro_horario(db, especialidade_id: int, inicio: datetime):
+    return db.query(ReservaHorario).filter(
+        ReservaHorario.especialidade_id == especialidade_id,
+        ReservaHorario.inicio == inicio,
+        ReservaHorario.status == STATUS_RESERVADO
+    )
+
+
+def reservar_horario(db, especialidade_id: int, inicio: datetime, session_id: str) -> bool:
+    agora = datetime.now()
+    expira_em = agora + timedelta(seconds=settings.reserva_ttl_seconds)
+    
+    db.query(ReservaHorario).filter(
+        ReservaHorario.session_id == session_id,
+        ReservaHorario.status == STATUS_RESERVADO,
+        or_(
+            ReservaHorario.especialidade_id != especialidade_id,
+            ReservaHorario.inicio != inicio
+        )
+    ).delete(synchronize_session=False)
+    
+    renovadas = _filtro_horario(db, especialidade_id, inicio).filter(
+        or_(ReservaHorario.session_id == session_id, ReservaHorario.expira_em < agora)
+    ).update(
+        {"session_id": session_id, "expira_em": expira_em},
+        synchronize_session=False
+    )
+    
+    if renovadas:
+        db.commit()
+        return True
+    
+    try:
+        db.add(ReservaHorario(
+            especialidade_id=especialidade_id,
+            inicio=inicio,
+            status=STATUS_RESERVADO,
+            session_id=session_id,
+            expira_em=expira_em
+        ))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def confirmar_reserva(db, especialidade_id: int, inicio: datetime, agendamento_id: int, session_id: str = None) -> bool:
+    agora = datetime.now()
+    
+    donos = [ReservaHorario.expira_em < agora]
+    if session_id:
+        donos.append(ReservaHorario.session_id == session_id)
+    
+    confirmadas = _filtro_horario(db, especialidade_id, inicio).filter(or_(*donos)).update(
+        {
+            "status": STATUS_CONFIRMADO,
+            "agendamento_id": agendamento_id,
+            "expira_em": None
+        },
+        synchronize_session=False
+    )
+    
+    if confirmadas:
+        return True
+    
+    try:
+        with db.begin_nested():
+            db.add(ReservaHorario(
+                especialidade_id=especialidade_id,
+                inicio=inicio,
+                status=STATUS_CONFIRMADO,
+                session_id=session_id,
+                agendamento_id=agendamento_id
+            ))
+        return True
+    except IntegrityError:
+        return False
+
+
+def liberar_reservas_sessao(db, session_id: str) -> int:
+    liberadas = db.query(ReservaHorario).filter(
+        ReservaHorario.session_id == session_id,
+        ReservaHorario.status == STATUS_RESERVADO
+    ).delete(synchronize_session=False)
+    db.commit()
+    return liberadas
+
+
+def liberar_reserva_agendamento(db, agendamento_id: int) -> int:
+    return db.query(ReservaHorario).filter(
+        ReservaHorario.agendamento_id == agendamento_id
+    ).delete(synchronize_session=False)
+
+
+def limpar_reservas_expiradas(db) -> int:
+    removidas = db.query(ReservaHorario).filter(
+        ReservaHorario.status == STATUS_RESERVADO,
+        ReservaHorario.expira_em < datetime.now()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return removidas
@@ -0,0 +1,166 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemorySessionStore:
+    
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: int = 14400, measure=None, purge_every: int = 500):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.purge_every = purge_every
+        self._measure = measure
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.evicted = 0
+    
+    def get(self, session_id: str):
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            
+            state, last_interaction = item
+            if time.time() - last_interaction > self.ttl_seconds:
+                del self._sessions[session_id]
+                self.evicted += 1
+                return None
+            
+            self._sessions.move_to_end(session_id)
+            return state
+    
+    def save(self, session_id: str, state, last_interaction: float):
+        with self._lock:
+            self._sessions[session_id] = (state, last_interaction)
+            self._sessions.move_to_end(session_id)
+            
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            self._writes += 1
+        
+        if self._writes % self.purge_every == 0:
+            self.purge_expired()
+    
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def purge_expired(self) -> int:
+        limite = time.time() - self.ttl_seconds
+        with self._lock:
+            expiradas = [
+                session_id for session_id, (_, last_interaction) in self._sessions.items()
+                if last_interaction < limite
+            ]
+            for session_id in expiradas:
+                del self._sessions[session_id]
+            self.evicted += len(expiradas)
+            return len(expiradas)
+    
+    def stats(self, sample_size: int = 100) -> dict:
+        with self._lock:
+            sessions = len(self._sessions)
+            amostra = [state for state, _ in list(self._sessions.values())[-sample_size:]]
+        
+        stats = {
+            "backend": "memory",
+            "sessions": sessions,
+            "max_sessions": self.max_sessions,
+            "evicted": self.evicted
+        }
+        
+        if self._measure and amostra:
+            stats["avg_session_bytes"] = sum(self._measure(state) for state in amostra) // len(amostra)
+        
+        return stats
+
+
+class SQLiteSessionStore:
+    
+    def __init__(self, path: str, serialize, deserialize, ttl_seconds: int = 14400, purge_every: int = 500):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.purge_every = purge_every
+        self._serialize = serialize
+        self._deserialize = deserialize
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.evicted = 0
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, "
+            "payload TEXT NOT NULL, "
+            "last_interaction REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_sessions_last_interaction "
+            "ON sessions (last_interaction)"
+        )
+    
+    def get(self, session_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, last_interaction FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            
+            if row is None:
+                return None
+            
+            payload, last_interaction = row
+            if time.time() - last_interaction > self.ttl_seconds:
+                self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self.evicted += 1
+                return None
+        
+        return self._deserialize(payload)
+    
+    def save(self, session_id: str, state, last_interaction: float):
+        payload = self._serialize(state)
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, payload, last_interaction) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET "
+                "payload = excluded.payload, last_interaction = excluded.last_interaction",
+                (session_id, payload, last_interaction)
+            )
+            self._writes += 1
+        
+        if self._writes % self.purge_every == 0:
+            self.purge_expired()
+    
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+    
+    def purge_expired(self) -> int:
+        limite = time.time() - self.ttl_seconds
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE last_interaction < ?", (limite,)
+            )
+            self.evicted += cursor.rowcount
+            return cursor.rowcount
+    
+    def stats(self) -> dict:
+        with self._lock:
+            sessions, payload_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM sessions"
+            ).fetchone()
+        
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "payload_bytes": payload_bytes,
+            "avg_payload_bytes": payload_bytes // sessions if sessions else 0,
+            "evicted": self.evicted
+        }
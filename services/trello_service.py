@@ -1,29 +1,187 @@
-from trello import TrelloClient
 from datetime import datetime
+import re
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from config import get_settings
 
 settings = get_settings()
 
+REGEX_REFERENCIA = re.compile(r'Agendamento #(\d+)\b')
 
-def get_trello_client():
+_trello_session = None
+_trello_session_lock = threading.Lock()
+
+_trello_list = None
+_trello_list_lock = threading.Lock()
+
+_rate_limit = {
+    'remaining': None,
+    'reset_at': 0.0
+}
+_rate_limit_lock = threading.Lock()
+
+
+class TokenBucket:
+    
+    def __init__(self, taxa: float, capacidade: int):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = float(capacidade)
+        self._atualizado_em = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def adquirir(self):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(
+                    self.capacidade,
+                    self._tokens + (agora - self._atualizado_em) * self.taxa
+                )
+                self._atualizado_em = agora
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                espera = (1 - self._tokens) / self.taxa
+            
+            time.sleep(espera)
+
+
+_limitador = TokenBucket(settings.trello_requests_per_second, settings.trello_burst)
+
+
+def get_trello_session() -> requests.Session:
+    global _trello_session
+    
+    if _trello_session is None:
+        with _trello_session_lock:
+            if _trello_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.trello_pool_size
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _trello_session = session
+    
+    return _trello_session
+
+
+def _aguardar_rate_limit():
+    with _rate_limit_lock:
+        espera = 0.0
+        if _rate_limit['remaining'] is not None and _rate_limit['remaining'] <= 0:
+            espera = _rate_limit['reset_at'] - time.monotonic()
+    
+    if espera > 0:
+        time.sleep(espera)
+
+
+def _registrar_rate_limit(response: requests.Response):
+    remaining = response.headers.get('x-rate-limit-api-token-remaining')
+    if remaining is None:
+        return
+    
+    interval_ms = response.headers.get('x-rate-limit-api-token-interval-ms')
+    with _rate_limit_lock:
+        _rate_limit['remaining'] = int(remaining)
+        if interval_ms:
+            _rate_limit['reset_at'] = time.monotonic() + int(interval_ms) / 1000
+
+
+def _tempo_retry(response: requests.Response, tentativa: int) -> float:
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    
+    interval_ms = response.headers.get('x-rate-limit-api-token-interval-ms')
+    if interval_ms:
+        return int(interval_ms) / 1000
+    
+    return min(2 ** tentativa, 30)
+
+
+def _verificar_credenciais():
     if not settings.trello_api_key or not settings.trello_token:
         raise ValueError(
             "Credenciais do Trello não configuradas. "
             "Configure TRELLO_API_KEY e TRELLO_TOKEN no arquivo .env"
         )
+
+
+def trello_request(method: str, path: str, **params) -> requests.Response:
+    _verificar_credenciais()
     
-    client = TrelloClient(
-        api_key=settings.trello_api_key,
-        token=settings.trello_token
-    )
+    params['key'] = settings.trello_api_key
+    params['token'] = settings.trello_token
+    session = get_trello_session()
+    
+    tentativa = 0
+    while True:
+        _limitador.adquirir()
+        _aguardar_rate_limit()
+        response = session.request(
+            method,
+            f"{settings.trello_api_url}{path}",
+            params=params,
+            timeout=settings.trello_timeout_seconds
+        )
+        _registrar_rate_limit(response)
+        
+        if response.status_code != 429 or tentativa >= settings.trello_max_retries:
+            return response
+        
+        time.sleep(_tempo_retry(response, tentativa))
+        tentativa += 1
+
+
+def get_trello_list() -> dict:
+    global _trello_list
+    
+    if _trello_list is not None:
+        return _trello_list
+    
+    if not settings.trello_list_id:
+        raise ValueError(
+            "TRELLO_LIST_ID não configurado no .env. "
+            "Configure o ID da lista onde os cards serão criados."
+        )
+    
+    with _trello_list_lock:
+        if _trello_list is None:
+            response = trello_request('GET', f"/lists/{settings.trello_list_id}", fields='name,idBoard')
+            if response.status_code in (400, 404):
+                raise ValueError(f"Lista com ID {settings.trello_list_id} não encontrada no board")
+            response.raise_for_status()
+            
+            dados = response.json()
+            _trello_list = {
+                'id': dados['id'],
+                'name': dados.get('name'),
+                'board_id': dados.get('idBoard')
+            }
+    
+    return _trello_list
+
+
+def reset_trello_list_cache():
+    global _trello_list
     
-    return client
+    with _trello_list_lock:
+        _trello_list = None
 
 
 def test_trello_connection():
     try:
-        client = get_trello_client()
+        _verificar_credenciais()
         
         if not settings.trello_board_id:
             return {
@@ -32,13 +190,15 @@ def test_trello_connection():
                 "message": "Configure o ID do board do Trello"
             }
         
-        board = client.get_board(settings.trello_board_id)
-        lists = board.list_lists()
-        list_names = [lst.name for lst in lists]
+        board = trello_request('GET', f"/boards/{settings.trello_board_id}", fields='name')
+        board.raise_for_status()
+        lists = trello_request('GET', f"/boards/{settings.trello_board_id}/lists", fields='name')
+        lists.raise_for_status()
+        list_names = [lst['name'] for lst in lists.json()]
         
         return {
             "success": True,
-            "board_name": board.name,
+            "board_name": board.json().get('name'),
             "board_id": settings.trello_board_id,
             "lists": list_names,
             "configured_list_id": settings.trello_list_id
@@ -58,32 +218,12 @@ def test_trello_connection():
         }
 
 
-def create_trello_card(
-    title: str,
+def montar_descricao_card(
     description: str = None,
     start_datetime: datetime = None,
     due_datetime: datetime = None,
     calendar_event_link: str = None
-):
-    client = get_trello_client()
-    
-    if not settings.trello_list_id:
-        raise ValueError(
-            "TRELLO_LIST_ID não configurado no .env. "
-            "Configure o ID da lista onde os cards serão criados."
-        )
-    
-    board = client.get_board(settings.trello_board_id)
-    trello_list = None
-    
-    for lst in board.list_lists():
-        if lst.id == settings.trello_list_id:
-            trello_list = lst
-            break
-    
-    if not trello_list:
-        raise ValueError(f"Lista com ID {settings.trello_list_id} não encontrada no board")
-    
+) -> str:
     full_description = ""
     
     if description:
@@ -98,77 +238,105 @@ def create_trello_card(
     if calendar_event_link:
         full_description += f"\n**Link do evento:** {calendar_event_link}"
     
-    card = trello_list.add_card(
-        name=title,
-        desc=full_description.strip()
-    )
+    return full_description.strip()
+
+
+def create_trello_card(
+    title: str,
+    description: str = None,
+    start_datetime: datetime = None,
+    due_datetime: datetime = None,
+    calendar_event_link: str = None
+):
+    trello_list = get_trello_list()
     
+    params = {
+        'idList': trello_list['id'],
+        'name': title,
+        'desc': montar_descricao_card(
+            description, start_datetime, due_datetime, calendar_event_link
+        )
+    }
     if due_datetime:
-        card.set_due(due_datetime)
+        params['due'] = due_datetime.isoformat()
+    
+    response = trello_request('POST', "/cards", **params)
+    response.raise_for_status()
+    card = response.json()
     
     return {
-        'card_id': card.id,
-        'card_url': card.url,
-        'card_name': card.name,
-        'list_name': trello_list.name
+        'card_id': card['id'],
+        'card_url': card.get('url'),
+        'card_name': card.get('name'),
+        'list_name': trello_list['name']
     }
 
 
 def get_trello_cards(limit: int = 20):
-    client = get_trello_client()
+    trello_list = get_trello_list()
     
-    if not settings.trello_list_id:
-        raise ValueError("TRELLO_LIST_ID não configurado no .env")
-    
-    board = client.get_board(settings.trello_board_id)
-    trello_list = None
-    
-    for lst in board.list_lists():
-        if lst.id == settings.trello_list_id:
-            trello_list = lst
-            break
-    
-    if not trello_list:
-        raise ValueError(f"Lista com ID {settings.trello_list_id} não encontrada")
+    response = trello_request(
+        'GET',
+        f"/lists/{trello_list['id']}/cards",
+        fields='id,name,desc,url,due'
+    )
+    response.raise_for_status()
     
-    cards = trello_list.list_cards()[:limit]
+    cards = response.json()
+    if limit:
+        cards = cards[:limit]
     
     formatted_cards = []
     for card in cards:
         formatted_cards.append({
-            'id': card.id,
-            'name': card.name,
-            'description': card.description,
-            'url': card.url,
-            'due_date': card.due_date.isoformat() if card.due_date else None
+            'id': card['id'],
+            'name': card['name'],
+            'description': card.get('desc'),
+            'url': card.get('url'),
+            'due_date': card.get('due')
         })
     
     return formatted_cards
 
 
+def buscar_card_por_agendamento(agendamento_id: int):
+    trello_list = get_trello_list()
+    
+    response = trello_request(
+        'GET',
+        f"/lists/{trello_list['id']}/cards",
+        fields='id,name,desc,url'
+    )
+    response.raise_for_status()
+    
+    for card in response.json():
+        match = REGEX_REFERENCIA.search(card.get('desc') or '')
+        if match and int(match.group(1)) == agendamento_id:
+            return {
+                'card_id': card['id'],
+                'card_url': card.get('url'),
+                'card_name': card.get('name')
+            }
+    
+    return None
+
+
 def archive_trello_card(card_id: str) -> bool:
     try:
-        url = f"https://api.trello.com/1/cards/{card_id}"
-        params = {
-            'key': settings.trello_api_key,
-            'token': settings.trello_token,
-            'closed': 'true'
-        }
-        response = requests.put(url, params=params)
+        response = trello_request('PUT', f"/cards/{card_id}", closed='true')
         return response.status_code == 200
     except Exception:
         return False
 
 
-def update_trello_card(card_id: str, due_datetime: datetime) -> bool:
+def update_trello_card(card_id: str, due_datetime: datetime = None, description: str = None) -> bool:
     try:
-        url = f"https://api.trello.com/1/cards/{card_id}"
-        params = {
-            'key': settings.trello_api_key,
-            'token': settings.trello_token,
-            'due': due_datetime.isoformat()
-        }
-        response = requests.put(url, params=params)
+        params = {}
+        if due_datetime:
+            params['due'] = due_datetime.isoformat()
+        if description is not None:
+            params['desc'] = description
+        response = trello_request('PUT', f"/cards/{card_id}", **params)
         return response.status_code == 200
     except Exception:
         return False
\ No newline at end of file
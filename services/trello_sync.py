@@ -0,0 +1,194 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
+from database.database import SessionLocal
+from database.models import Agendamento
+from services.integracao_service import referencia_card
+from services.trello_service import (
+    get_trello_cards,
+    create_trello_card,
+    update_trello_card,
+    archive_trello_card,
+    REGEX_REFERENCIA
+)
+
+
+def _parse_due(valor: str):
+    if not valor:
+        return None
+    return datetime.fromisoformat(valor.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def _fim(agendamento) -> datetime:
+    return agendamento.data_hora + timedelta(minutes=agendamento.duracao_minutos or 60)
+
+
+def planejar_sync(agendamentos: list, cards: list, inicio: datetime, fim: datetime) -> dict:
+    cards_por_id = {card['id']: card for card in cards}
+    cards_por_agendamento = {}
+    for card in cards:
+        match = REGEX_REFERENCIA.search(card.get('description') or '')
+        if match:
+            cards_por_agendamento.setdefault(int(match.group(1)), card)
+    
+    plano = {"criar": [], "atualizar": [], "arquivar": [], "vincular": [], "inalterados": 0}
+    for agendamento in agendamentos:
+        card = cards_por_id.get(agendamento.trello_card_id) or cards_por_agendamento.get(agendamento.id)
+        ativo = agendamento.status == "agendado" and inicio <= agendamento.data_hora <= fim
+        
+        if not ativo:
+            if card and agendamento.status != "agendado":
+                plano["arquivar"].append((agendamento.id, card['id']))
+            continue
+        
+        if not card:
+            plano["criar"].append(agendamento)
+            continue
+        
+        if card['id'] != agendamento.trello_card_id:
+            plano["vincular"].append((agendamento.id, card['id']))
+        
+        due = _parse_due(card.get('due_date'))
+        if due is None or abs((due - _fim(agendamento)).total_seconds()) >= 60:
+            plano["atualizar"].append((agendamento.id, card['id'], _fim(agendamento)))
+        else:
+            plano["inalterados"] += 1
+    
+    return plano
+
+
+def _criar(agendamento) -> str:
+    card = create_trello_card(
+        title=f"{agendamento.especialidade.nome} - {agendamento.paciente.nome}",
+        description=(
+            f"{agendamento.paciente.telefone}\n{agendamento.paciente.email}\n"
+            f"{referencia_card(agendamento.id)}"
+        ),
+        start_datetime=agendamento.data_hora,
+        due_datetime=_fim(agendamento)
+    )
+    return card['card_id']
+
+
+def sincronizar_trello(dias: int = 1, concorrencia: int = 4, dry_run: bool = False, progresso=None) -> dict:
+    inicio_execucao = time.monotonic()
+    agora = datetime.now()
+    hoje = agora.replace(hour=0, minute=0, second=0, microsecond=0)
+    fim = hoje + timedelta(days=dias)
+    
+    cards = get_trello_cards(limit=None)
+    referencias = {
+        int(match.group(1))
+        for match in (REGEX_REFERENCIA.search(card.get('description') or '') for card in cards)
+        if match
+    }
+    ids_cards = {card['id'] for card in cards}
+    
+    db = SessionLocal()
+    try:
+        agendamentos = db.query(Agendamento).options(
+            joinedload(Agendamento.paciente),
+            joinedload(Agendamento.especialidade)
+        ).filter(
+            (
+                (Agendamento.status == "agendado")
+                & (Agendamento.data_hora >= hoje)
+                & (Agendamento.data_hora <= fim)
+            )
+            | Agendamento.trello_card_id.in_(ids_cards)
+            | Agendamento.id.in_(referencias)
+        ).all()
+        
+        plano = planejar_sync(agendamentos, cards, hoje, fim)
+        relatorio = {
+            "cards_trello": len(cards),
+            "agendamentos": len(agendamentos),
+            "criar": len(plano["criar"]),
+            "atualizar": len(plano["atualizar"]),
+            "arquivar": len(plano["arquivar"]),
+            "inalterados": plano["inalterados"],
+            "erros": 0,
+            "dry_run": dry_run
+        }
+        
+        if dry_run:
+            relatorio["segundos"] = round(time.monotonic() - inicio_execucao, 2)
+            return relatorio
+        
+        operacoes = (
+            [("criar", agendamento.id, lambda a=agendamento: _criar(a)) for agendamento in plano["criar"]]
+            + [
+                ("atualizar", agendamento_id, lambda c=card_id, d=due: update_trello_card(c, due_datetime=d))
+                for agendamento_id, card_id, due in plano["atualizar"]
+            ]
+            + [
+                ("arquivar", agendamento_id, lambda c=card_id: archive_trello_card(c))
+                for agendamento_id, card_id in plano["arquivar"]
+            ]
+        )
+        
+        vinculos = dict(plano["vincular"])
+        total = len(operacoes)
+        concluidas = 0
+        
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            futuros = {executor.submit(chamada): (tipo, agendamento_id) for tipo, agendamento_id, chamada in operacoes}
+            
+            for futuro in as_completed(futuros):
+                tipo, agendamento_id = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                    if resultado is False:
+                        raise RuntimeError("A chamada retornou falha")
+                    if tipo == "criar":
+                        vinculos[agendamento_id] = resultado
+                except Exception as e:
+                    relatorio["erros"] += 1
+                    print(f"Erro ao {tipo} card do agendamento {agendamento_id}: {e}")
+                
+                concluidas += 1
+                if progresso:
+                    progresso(concluidas, total, time.monotonic() - inicio_execucao)
+        
+        for agendamento in agendamentos:
+            if agendamento.id in vinculos:
+                agendamento.trello_card_id = vinculos[agendamento.id]
+        db.commit()
+        
+        relatorio["vinculados"] = len(vinculos)
+        relatorio["segundos"] = round(time.monotonic() - inicio_execucao, 2)
+        return relatorio
+    finally:
+        db.close()
+
+
+def _imprimir_progresso(concluidas: int, total: int, segundos: float):
+    if concluidas == total or concluidas % 25 == 0:
+        taxa = concluidas / segundos if segundos else 0
+        restante = (total - concluidas) / taxa if taxa else 0
+        print(f"  {concluidas}/{total} ({concluidas * 100 // total}%) - {taxa:.1f} req/s - ~{restante:.0f}s restantes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza os agendamentos com os cards do Trello")
+    parser.add_argument("--dias", type=int, default=1, help="Janela de agendamentos a partir de hoje")
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o que seria feito")
+    args = parser.parse_args()
+    
+    relatorio = sincronizar_trello(
+        dias=args.dias,
+        concorrencia=args.concorrencia,
+        dry_run=args.dry_run,
+        progresso=_imprimir_progresso
+    )
+    
+    print()
+    for chave, valor in relatorio.items():
+        print(f"{chave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
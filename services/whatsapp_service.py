@@ -2,23 +2,47 @@ from neonize.client import NewClient
 from neonize.events import MessageEv, ConnectedEv, PairStatusEv
 from datetime import datetime, timedelta
 import re
+import time
 from services.conversation_service import (
     get_or_create_conversation,
+    save_conversation,
     reset_conversation,
+    get_session_store_stats,
     get_all_especialidades,
     get_especialidade_by_name,
-    get_paciente_by_telefone
+    get_paciente_by_telefone,
+    subconsulta_paciente_id
 )
-from services.openai_service import detect_intent_and_extract
-from services.rag_service import ask_question
-from services.google_calendar_service import get_available_slots, create_calendar_event
-from services.trello_service import create_trello_card
+from services.openai_service import detect_intent_and_extract, get_intent_cache_stats
+from services.faq_service import get_faq_stats
+from services.rag_service import ask_question, get_rag_cache_stats
+from services.google_calendar_service import get_available_slots
+from services.integracao_service import (
+    registrar_novo_agendamento,
+    registrar_cancelamento,
+    registrar_remarcacao,
+    outbox_worker,
+    get_outbox_metrics
+)
+from services.message_dispatcher import MessageDispatcher
+from services.date_parser import detectar_mes, tem_horario
+from services.reserva_service import (
+    reservar_horario,
+    confirmar_reserva,
+    liberar_reservas_sessao,
+    liberar_reserva_agendamento
+)
+from sqlalchemy.orm import joinedload
 from database.database import SessionLocal
-from database.models import Paciente, Agendamento, Especialidade
+from database.models import Paciente, Agendamento
 from config import get_settings
 
 settings = get_settings()
 client = None
+dispatcher = MessageDispatcher(
+    num_workers=settings.whatsapp_workers,
+    max_pending=settings.whatsapp_max_pending
+)
 
 
 def format_disponibilidade(dias: int = 7) -> str:
@@ -178,30 +202,7 @@ def responder_pergunta_inteligente(user_message: str, context_step: str = None)
     )
 
 def detectar_mes_especifico(user_message: str) -> dict:
-    msg_lower = user_message.lower()
-    
-    meses = {
-        'janeiro': 1, 'fevereiro': 2, 'março': 3, 'marco': 3,
-        'abril': 4, 'maio': 5, 'junho': 6,
-        'julho': 7, 'agosto': 8, 'setembro': 9,
-        'outubro': 10, 'novembro': 11, 'dezembro': 12
-    }
-    
-    for nome_mes, numero in meses.items():
-        if nome_mes in msg_lower:
-            hoje = datetime.now()
-            ano = hoje.year
-            
-            if numero < hoje.month:
-                ano += 1
-            
-            return {
-                'mes_nome': nome_mes.capitalize(),
-                'mes_numero': numero,
-                'ano': ano
-            }
-    
-    return None
+    return detectar_mes(user_message)
 
 
 def responder_sobre_disponibilidade(user_message: str, conversation=None) -> str:
@@ -439,38 +440,26 @@ def detectar_escolha_de_dia(user_message: str) -> str:
 def buscar_consultas_paciente(telefone: str) -> list:
     db = SessionLocal()
     try:
-        telefone_limpo = ''.join(filter(str.isdigit, telefone))
-        
-        pacientes = db.query(Paciente).filter(
-            Paciente.telefone.like(f"%{telefone_limpo[-9:]}")
-        ).all()
+        paciente_id = subconsulta_paciente_id(db, telefone)
         
-        if not pacientes:
-            pacientes = db.query(Paciente).all()
-            pacientes = [p for p in pacientes if telefone_limpo[-8:] in ''.join(filter(str.isdigit, p.telefone))]
-        
-        if not pacientes:
+        if paciente_id is None:
             return []
         
-        paciente = pacientes[0]
-        
         agora = datetime.now()
         consultas = db.query(Agendamento).filter(
-            Agendamento.paciente_id == paciente.id,
+            Agendamento.paciente_id == paciente_id,
             Agendamento.status == "agendado",
             Agendamento.data_hora > agora
+        ).options(
+            joinedload(Agendamento.especialidade)
         ).order_by(Agendamento.data_hora).all()
         
         resultado = []
         for consulta in consultas:
-            especialidade = db.query(Especialidade).filter(
-                Especialidade.id == consulta.especialidade_id
-            ).first()
-            
             resultado.append({
                 'id': consulta.id,
                 'data_hora': consulta.data_hora,
-                'especialidade': especialidade.nome if especialidade else "Não identificada",
+                'especialidade': consulta.especialidade.nome if consulta.especialidade else "Não identificada",
                 'num_remarcacoes': consulta.num_remarcacoes,
                 'calendar_event_id': consulta.calendar_event_id,
                 'trello_card_id': consulta.trello_card_id
@@ -515,22 +504,11 @@ def cancelar_consulta(consulta_id: int, motivo: str = "Solicitado pelo paciente"
         consulta.status = "cancelado"
         consulta.data_cancelamento = datetime.now()
         consulta.motivo_cancelamento = motivo
-        
-        if consulta.calendar_event_id:
-            try:
-                from services.google_calendar_service import delete_calendar_event
-                delete_calendar_event(consulta.calendar_event_id)
-            except Exception:
-                pass
-        
-        if consulta.trello_card_id:
-            try:
-                from services.trello_service import archive_trello_card
-                archive_trello_card(consulta.trello_card_id)
-            except Exception:
-                pass
+        liberar_reserva_agendamento(db, consulta.id)
+        registrar_cancelamento(db, consulta)
         
         db.commit()
+        outbox_worker.notificar()
         
         return {
             "success": True,
@@ -578,33 +556,16 @@ def remarcar_consulta(consulta_id: int, nova_data_hora: datetime) -> dict:
             taxa["valor"] = 50.00
             taxa["motivo"] = "Remarcação com menos de 24h de antecedência"
         
-        paciente = db.query(Paciente).filter(Paciente.id == consulta.paciente_id).first()
-        especialidade = db.query(Especialidade).filter(Especialidade.id == consulta.especialidade_id).first()
-        
-        if consulta.calendar_event_id:
-            try:
-                from services.google_calendar_service import update_calendar_event
-                update_calendar_event(
-                    event_id=consulta.calendar_event_id,
-                    start_datetime=nova_data_hora,
-                    end_datetime=nova_data_hora + timedelta(hours=1)
-                )
-            except Exception:
-                pass
-        
-        if consulta.trello_card_id:
-            try:
-                from services.trello_service import update_trello_card
-                update_trello_card(
-                    card_id=consulta.trello_card_id,
-                    due_datetime=nova_data_hora
-                )
-            except Exception:
-                pass
+        liberar_reserva_agendamento(db, consulta.id)
+        if not confirmar_reserva(db, consulta.especialidade_id, nova_data_hora, consulta.id):
+            db.rollback()
+            return {"success": False, "message": "Esse horário acabou de ser ocupado"}
         
         consulta.data_hora = nova_data_hora
         consulta.num_remarcacoes += 1
+        registrar_remarcacao(db, consulta)
         db.commit()
+        outbox_worker.notificar()
         
         return {
             "success": True,
@@ -622,7 +583,14 @@ def remarcar_consulta(consulta_id: int, nova_data_hora: datetime) -> dict:
 def process_whatsapp_message(phone: str, user_message: str) -> str:
     session_id = f"whatsapp_{phone}"
     conversation = get_or_create_conversation(session_id)
-    user_message = user_message.strip()
+    
+    try:
+        return responder_mensagem(phone, user_message.strip(), session_id, conversation)
+    finally:
+        save_conversation(conversation)
+
+
+def responder_mensagem(phone: str, user_message: str, session_id: str, conversation) -> str:
     
     conversation.add_message("user", user_message)
     
@@ -683,15 +651,6 @@ def process_whatsapp_message(phone: str, user_message: str) -> str:
     palavras_sim = ['sim', 'pode ser', 'pode', 'ok', 'quero', 's']
     mensagem_curta = len(user_message.split()) <= 3
     
-    context = {"step": conversation.step, **conversation.data}
-    ai_result = detect_intent_and_extract(user_message, context, conversation.history)
-    
-    intent = ai_result.get('intent', 'greeting')
-    extracted = ai_result.get('extracted_data', {})
-    
-    palavras_sim = ['sim', 'pode ser', 'pode', 'ok', 'quero', 's']
-    mensagem_curta = len(user_message.split()) <= 3
-    
     if (intent == 'confirm' or any(w == user_message.lower().strip() for w in palavras_sim)) and mensagem_curta:
         last_q = conversation.last_question
         
@@ -739,7 +698,7 @@ def process_whatsapp_message(phone: str, user_message: str) -> str:
                     conversation.update(especialidade_id=e['id'], especialidade_nome=e['nome'])
                     break
     
-    if extracted.get('start_datetime'):
+    if tem_horario(extracted.get('start_datetime')):
         conversation.update(data_hora=extracted['start_datetime'])
     
     if last_question_backup and not conversation.last_question:
@@ -905,11 +864,28 @@ def process_whatsapp_message(phone: str, user_message: str) -> str:
                 return resposta
         
         if conversation.is_complete():
-            conversation.step = "confirmando"
             data_hora = datetime.fromisoformat(conversation.data['data_hora'])
             data_fmt = data_hora.strftime('%d/%m/%Y às %H:%M')
             primeiro_nome = get_primeiro_nome(conversation.data['nome'])
             
+            db = SessionLocal()
+            try:
+                reservado = reservar_horario(db, conversation.data['especialidade_id'], data_hora, session_id)
+            finally:
+                db.close()
+            
+            if not reservado:
+                conversation.step = "aguardando_data"
+                conversation.update(data_hora=None, last_question='perguntou_data')
+                resposta = (
+                    f"Poxa, {primeiro_nome}, alguém acabou de reservar {data_fmt}...\n\n"
+                    f"Qual outro horário fica bom pra você?"
+                )
+                conversation.add_message("assistant", resposta)
+                return resposta
+            
+            conversation.step = "confirmando"
+            
             resposta = (
                 f"Fechado então, {primeiro_nome}!\n\n"
                 f"Só confirma comigo:\n\n"
@@ -1299,36 +1275,37 @@ def process_whatsapp_message(phone: str, user_message: str) -> str:
                 data_hora = datetime.fromisoformat(conversation.data['data_hora'])
                 titulo = f"{conversation.data['especialidade_nome']} - {conversation.data['nome']}"
                 
-                calendar_event = create_calendar_event(
-                    title=titulo,
-                    start_datetime=data_hora,
-                    end_datetime=data_hora.replace(hour=data_hora.hour + 1),
-                    description=f"Paciente: {conversation.data['nome']}\nTelefone: {conversation.data['telefone']}",
-                    attendee_email=conversation.data['email']
-                )         
-            
-                trello_card = None
-                try:
-                    trello_card = create_trello_card(
-                        title=titulo,
-                        description=f"{conversation.data['telefone']}\n{conversation.data['email']}",
-                        start_datetime=data_hora,
-                        due_datetime=data_hora.replace(hour=data_hora.hour + 1),
-                        calendar_event_link=calendar_event.get('event_link')
-                    )
-                except Exception:
-                    pass
-                
                 agendamento = Agendamento(
                     paciente_id=paciente_id,
                     especialidade_id=conversation.data['especialidade_id'],
-                    data_hora=data_hora,
-                    calendar_event_id=calendar_event.get('event_id'),
-                    trello_card_id=trello_card.get('card_id') if trello_card else None
+                    data_hora=data_hora
                 )
                 db.add(agendamento)
+                db.flush()
+                
+                if not confirmar_reserva(db, agendamento.especialidade_id, data_hora, agendamento.id, session_id):
+                    db.rollback()
+                    db.close()
+                    conversation.step = "aguardando_data"
+                    conversation.update(data_hora=None, last_question='perguntou_data')
+                    resposta = (
+                        f"Poxa, {primeiro_nome}, esse horário acabou de ser ocupado...\n\n"
+                        f"Qual outro horário fica bom pra você?"
+                    )
+                    conversation.add_message("assistant", resposta)
+                    return resposta
+                
+                registrar_novo_agendamento(
+                    db,
+                    agendamento,
+                    title=titulo,
+                    calendar_description=f"Paciente: {conversation.data['nome']}\nTelefone: {conversation.data['telefone']}",
+                    trello_description=f"{conversation.data['telefone']}\n{conversation.data['email']}",
+                    attendee_email=conversation.data['email']
+                )
                 db.commit()
                 db.close()
+                outbox_worker.notificar()
                 
                 data_fmt = data_hora.strftime('%d/%m/%Y às %H:%M')
                 conversation.step = "finalizado"
@@ -1352,6 +1329,11 @@ def process_whatsapp_message(phone: str, user_message: str) -> str:
                 return resposta
         
         if intent == 'cancel' or any(w in user_message.lower() for w in ['não', 'nao', 'cancelar']):
+            db = SessionLocal()
+            try:
+                liberar_reservas_sessao(db, session_id)
+            finally:
+                db.close()
             reset_conversation(session_id)
             resposta = "Sem problemas! Se precisar de algo depois, é só chamar."
             conversation.add_message("assistant", resposta)
@@ -1385,6 +1367,35 @@ def process_whatsapp_message(phone: str, user_message: str) -> str:
     return resposta
 
 
+def handle_whatsapp_message(phone: str, chat, user_message: str):
+    try:
+        inicio = time.monotonic()
+        response = process_whatsapp_message(phone, user_message)
+        dispatcher.record_latency("process", time.monotonic() - inicio)
+        
+        inicio = time.monotonic()
+        client.send_message(chat, response)
+        dispatcher.record_latency("send", time.monotonic() - inicio)
+        
+    except Exception:
+        try:
+            client.send_message(chat, f"Erro técnico. Ligue: {settings.clinica_telefone}")
+        except:
+            pass
+        raise
+
+
+def get_whatsapp_metrics() -> dict:
+    return {
+        **dispatcher.get_metrics(),
+        "intent_cache": get_intent_cache_stats(),
+        "rag_cache": get_rag_cache_stats(),
+        "faq": get_faq_stats(),
+        "sessions": get_session_store_stats(),
+        "outbox": get_outbox_metrics()
+    }
+
+
 def start_whatsapp():
     global client
     
@@ -1405,6 +1416,7 @@ def start_whatsapp():
                 return
             
             phone = message.Info.MessageSource.Sender.User
+            chat = message.Info.MessageSource.Chat
             msg = message.Message
             user_message = None
             
@@ -1416,8 +1428,17 @@ def start_whatsapp():
             if not user_message:
                 return
             
-            response = process_whatsapp_message(phone, user_message)
-            client.send_message(message.Info.MessageSource.Chat, response)
+            aceito = dispatcher.submit(
+                phone,
+                lambda: handle_whatsapp_message(phone, chat, user_message),
+                timeout=settings.whatsapp_enqueue_timeout_seconds
+            )
+            
+            if not aceito:
+                client.send_message(
+                    chat,
+                    "Estamos com muitas mensagens agora. Pode mandar de novo em alguns minutos?"
+                )
             
         except Exception:
             try:
@@ -1428,4 +1449,6 @@ def start_whatsapp():
             except:
                 pass
     
-    client.connect()         
\ No newline at end of file
+    dispatcher.start()
+    outbox_worker.start()
+    client.connect()